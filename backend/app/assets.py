@@ -0,0 +1,93 @@
+# Статичні файли фронтенду
+#
+# Зібраний фронтенд (`npm run build` у frontend/, див. frontend/build.mjs)
+# лежить у frontend/dist: бандли з хешем вмісту в імені та їхні стиснуті
+# копії .br/.gz, а manifest.json зіставляє логічні імена ('app.js') з
+# хешованими. Бандли віддаються на /assets/... з кешуванням назавжди
+# (immutable): нова збірка - нові імена. Сторінки (index.html) віддаються з
+# 'no-cache' та ETag, тож браузер щоразу перевіряє їх і отримує 304, поки
+# збірка не змінилась.
+#
+# Якщо маніфесту немає (розробка без збірки), шаблон підключає React
+# development і Babel з CDN, а src/app.jsx віддається без кешування на /src/...
+
+import json
+import logging
+import mimetypes
+import os
+
+from flask import abort, current_app, request, send_from_directory, url_for
+
+logger = logging.getLogger(__name__)
+
+# Заздалегідь стиснуті варіанти в порядку переваги
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MAX_AGE = 365 * 24 * 3600  # секунд; хешовані файли не змінюються
+
+
+class Assets:
+    """Маніфест зібраного фронтенду; у шаблонах доступний як 'assets'."""
+
+    def __init__(self, dist_dir, files):
+        self.dist_dir = dist_dir
+        self.assets_dir = os.path.join(dist_dir, 'assets')
+        self.files = files
+        self.served = set(files.values())
+
+    @classmethod
+    def load(cls, dist_dir):
+        try:
+            with open(os.path.join(dist_dir, 'manifest.json'), encoding='utf-8') as f:
+                files = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(dist_dir, files)
+
+    def url(self, name):
+        return url_for('asset', filename=self.files[name])
+
+
+def _asset_view(filename):
+    assets = current_app.extensions['assets']
+    if filename not in assets.served:
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(assets.assets_dir, filename + suffix)):
+            response = send_from_directory(assets.assets_dir, filename + suffix, mimetype=mimetype,
+                                           max_age=MAX_AGE)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(assets.assets_dir, filename, mimetype=mimetype, max_age=MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+def _source_view(filename):
+    response = send_from_directory(os.path.join(current_app.template_folder, 'src'), filename,
+                                   mimetype='text/javascript')
+    response.cache_control.no_cache = True
+    return response
+
+
+def revalidate(response):
+    """Сторінка, що посилається на хешовані бандли: кешувати лише з перевіркою (ETag/304)."""
+    response.cache_control.no_cache = True
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def init_app(app):
+    """Завантажує маніфест збірки і реєструє роути статики. Викликається в контексті додатку."""
+    dist_dir = app.config['ASSETS_DIST_DIR'] or os.path.join(app.template_folder, 'dist')
+    assets = Assets.load(dist_dir)
+    app.extensions['assets'] = assets
+    app.context_processor(lambda: {'assets': assets})
+    if assets is not None:
+        app.add_url_rule('/assets/<path:filename>', 'asset', _asset_view)
+    else:
+        logger.warning('No frontend build in %s (run `npm run build` in frontend/); '
+                       'serving the JSX sources for in-browser compilation', dist_dir)
+        app.add_url_rule('/src/<path:filename>', 'asset_source', _source_view)
@@ -0,0 +1,97 @@
+# Допоміжні примітиви кешування для проксі до зовнішніх сервісів
+
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Потокобезпечний in-process LRU-кеш з часом життя записів.
+    Найдавніше використаний запис витісняється при переповненні.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Повертає значення, якщо воно є і ще не застаріло."""
+        value, expires_at = self.get_entry(key)
+        if value is MISSING or expires_at < time.monotonic():
+            return default
+        return value
+
+    def get_entry(self, key):
+        """Повертає (значення, момент застарівання) без перевірки TTL."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING, 0.0
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Об'єднує одночасні однакові запити: для кожного ключа функція виконується
+    лише один раз, інші потоки чекають на її результат.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
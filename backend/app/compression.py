@@ -0,0 +1,71 @@
+# Стиснення відповідей (gzip / brotli)
+#
+# Відповіді від COMPRESS_MIN_SIZE байт із текстовими типами (JSON, HTML,
+# текст метрик) стискаються в after_request кодуванням, яке приймає клієнт:
+# brotli (якщо встановлено пакет brotli), інакше gzip. Потокові відповіді
+# (експорт), уже стиснуті (статика фронтенду, див. assets.py) та 304 не
+# чіпаються. ETag стисненої відповіді стає слабким: вміст той самий, а байти
+# відрізняються для різних кодувань.
+
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # необов'язкова залежність
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/geo+json',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript'
+}
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def negotiate(accept_encodings):
+    """Кодування для заголовка Accept-Encoding клієнта або None."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _after_request(response):
+    config = current_app.config
+    if (
+        response.status_code < 200 or response.status_code in (204, 206, 304)
+        or response.direct_passthrough or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+    response.set_data(compress(data, encoding, config))
+    response.content_encoding = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Вмикає стиснення відповідей, якщо COMPRESS_ENABLED."""
+    if app.config['COMPRESS_ENABLED']:
+        app.after_request(_after_request)
@@ -0,0 +1,135 @@
+# Профіль підключення до БД
+#
+# SQLite: на кожне нове з'єднання встановлюються PRAGMA з DB_SQLITE_PRAGMAS
+# (WAL - читачі не чекають на запис і навпаки, busy_timeout - записи чекають
+# один на одного замість "database is locked", synchronous=NORMAL - без fsync
+# на кожен commit). Транзакціями й далі керує драйвер sqlite3: він починає
+# транзакцію лише перед першим INSERT/UPDATE/DELETE, тож блокування запису
+# тримається від першої зміни до commit, а не весь запит (BEGIN IMMEDIATE на
+# старті транзакції в бенчмарку давав гірші хвости затримок).
+#
+# Серверні БД (PostgreSQL, MySQL): розмір пулу, pre-ping і recycle з DB_POOL_*.
+#
+# Якщо задано DATABASE_REPLICA_URL, читання в GET/HEAD-запитах ідуть на
+# репліку (bind 'replica'), а все інше - на основну БД. Після запиту, що
+# змінив дані, читання користувача ще DB_REPLICA_STICKY_SECONDS секунд
+# ідуть на основну БД, щоб він одразу бачив свої зміни незалежно від
+# відставання репліки.
+
+import time
+
+import sqlalchemy as sa
+from flask import has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def _is_sqlite(url):
+    return sa.engine.make_url(url).get_backend_name() == 'sqlite'
+
+
+def engine_options(url, config):
+    """Параметри create_engine для URL з урахуванням профілю."""
+    if _is_sqlite(url):
+        # PRAGMA встановлюються подією connect (див. _setup_sqlite)
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True
+    }
+
+
+def configure(app):
+    """
+    Доповнює конфігурацію параметрами рушіїв. Викликається до db.init_app:
+    Flask-SQLAlchemy створює рушії саме там. Явно задані
+    SQLALCHEMY_ENGINE_OPTIONS мають пріоритет.
+    """
+    config = app.config
+    if not config['DB_PROFILE_ENABLED']:
+        return
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(config['SQLALCHEMY_DATABASE_URI'], config),
+        **config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    if config['DATABASE_REPLICA_URL']:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA] = {'url': config['DATABASE_REPLICA_URL'],
+                          **engine_options(config['DATABASE_REPLICA_URL'], config)}
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+def _setup_sqlite(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def init_app(app, db):
+    """Налаштовує створені рушії. Викликається в контексті додатку після db.init_app."""
+    if not app.config['DB_PROFILE_ENABLED']:
+        return
+    for engine in db.engines.values():
+        if engine.dialect.name == 'sqlite':
+            _setup_sqlite(engine, app.config['DB_SQLITE_PRAGMAS'])
+
+    if REPLICA in db.engines:
+        sticky = app.config['DB_REPLICA_STICKY_SECONDS']
+
+        @app.after_request
+        def stick_to_primary(response):
+            if sticky and db.session.info.pop('wrote_primary', False):
+                session['db_primary_until'] = time.time() + sticky
+            return response
+
+
+def dispose_pools(app, db):
+    """
+    Скидає пули з'єднань, успадковані від батьківського процесу (post_fork у
+    gunicorn.conf.py): сокет чи файл SQLite, відкритий у master до fork, не
+    можна ділити між процесами. close=False - з'єднання належать master,
+    воркер відкриє власні з першим запитом.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+class RoutingSession(Session):
+    """
+    Сесія, що відправляє читання GET/HEAD-запитів на репліку (якщо вона є).
+    Записи, SELECT ... FOR UPDATE та всі запити транзакції після першого
+    запису йдуть на основну БД.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self._db.engines.get(REPLICA) if bind is None else None
+        if replica is not None:
+            if self._writes(clause):
+                self.info['wrote_primary'] = True
+            elif self._reads_from_replica():
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _writes(self, clause):
+        return (
+            self._flushing
+            or isinstance(clause, sa.sql.expression.UpdateBase)
+            or getattr(clause, '_for_update_arg', None) is not None
+        )
+
+    def _reads_from_replica(self):
+        if self.info.get('wrote_primary') or not has_request_context():
+            return False
+        if request.method not in READ_METHODS:
+            return False
+        return session.get('db_primary_until', 0) < time.time()
@@ -0,0 +1,144 @@
+# Потоковий експорт подорожей (GeoJSON, NDJSON, GPX)
+#
+# Рядки читаються з БД пачками (yield_per), а результат віддається
+# генератором, тож пікове споживання пам'яті не залежить від кількості
+# пунктів призначення. Подорож без пунктів теж потрапляє в експорт (рядок
+# з порожніми полями пункту), тож резервна копія містить усі подорожі.
+
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+from sqlalchemy import select
+
+from . import db
+from .models import Trip, Destination
+
+# Розмір частини відповіді, яку накопичуємо перед відправкою
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    'geojson': ('application/geo+json', 'geojson'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'gpx': ('application/gpx+xml', 'gpx')
+}
+
+
+def scope_filter(scope):
+    """
+    Умова на подорожі для області експорту: {'trip_id': id} - одна подорож,
+    {'user_id': id} - усі подорожі користувача, {} - усі подорожі (резервна копія).
+    """
+    if 'trip_id' in scope:
+        return (Trip.id == scope['trip_id'],)
+    if 'user_id' in scope:
+        return (Trip.user_id == scope['user_id'],)
+    return ()
+
+
+def export_rows(trip_filter, batch_size):
+    """
+    Рядки (подорож + пункт призначення), впорядковані за подорожжю та order_index.
+    Для подорожі без пунктів - один рядок, у якому поля пункту (id, ...) - None.
+    Результат читається з курсора пачками по batch_size рядків.
+    """
+    stmt = (
+        select(
+            Trip.id.label('trip_id'),
+            Trip.name.label('trip_name'),
+            Trip.user_id,
+            Destination.id,
+            Destination.name,
+            Destination.address,
+            Destination.lat,
+            Destination.lng,
+            Destination.visit_date,
+            Destination.notes,
+            Destination.order_index
+        )
+        .select_from(Trip)
+        .outerjoin(Destination, Destination.trip_id == Trip.id)
+        .where(*trip_filter)
+        .order_by(Trip.id, Destination.order_index, Destination.id)
+        .execution_options(yield_per=batch_size)
+    )
+    return db.session.execute(stmt)
+
+
+def _feature(row):
+    if row.id is None:
+        # Подорож без пунктів: Feature без геометрії лише з полями подорожі
+        return {
+            'type': 'Feature',
+            'geometry': None,
+            'properties': {'trip_id': row.trip_id, 'trip_name': row.trip_name, 'user_id': row.user_id}
+        }
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [row.lng, row.lat]},
+        'properties': {
+            'id': row.id,
+            'name': row.name,
+            'address': row.address,
+            'notes': row.notes,
+            'visit_date': row.visit_date,
+            'order_index': row.order_index,
+            'trip_id': row.trip_id,
+            'trip_name': row.trip_name,
+            'user_id': row.user_id
+        }
+    }
+
+
+def _geojson(rows):
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ''
+    for row in rows:
+        yield separator + json.dumps(_feature(row), ensure_ascii=False)
+        separator = ','
+    yield ']}\n'
+
+
+def _ndjson(rows):
+    for row in rows:
+        yield json.dumps(_feature(row), ensure_ascii=False) + '\n'
+
+
+def _gpx(rows):
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<gpx version="1.1" creator="Travel Planner" xmlns="http://www.topografix.com/GPX/1/1">\n')
+    current_trip = None
+    for row in rows:
+        if row.trip_id != current_trip:
+            if current_trip is not None:
+                yield '</rte>\n'
+            current_trip = row.trip_id
+            yield f'<rte><name>{escape(row.trip_name)}</name>\n'
+        if row.id is None:
+            continue
+        point = f'<rtept lat={quoteattr(repr(row.lat))} lon={quoteattr(repr(row.lng))}><name>{escape(row.name)}</name>'
+        if row.notes:
+            point += f'<desc>{escape(row.notes)}</desc>'
+        yield point + '</rtept>\n'
+    if current_trip is not None:
+        yield '</rte>\n'
+    yield '</gpx>\n'
+
+
+WRITERS = {
+    'geojson': _geojson,
+    'ndjson': _ndjson,
+    'gpx': _gpx
+}
+
+
+def generate(fmt, rows):
+    """Генератор тексту експорту, що віддає частини приблизно по OUTPUT_CHUNK_SIZE."""
+    buffer, size = [], 0
+    for piece in WRITERS[fmt](rows):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= OUTPUT_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,116 @@
+# Повнотекстовий пошук по подорожах і пунктах призначення
+#
+# SQLite: віртуальні таблиці FTS5 trip_search і destination_search (rowid =
+# id запису). PostgreSQL: колонки search_vector (tsvector) з GIN-індексами.
+# Індекс оновлюють тригери БД (див. міграцію 7c3a9e51b2d4), тож він
+# змінюється в тій самій транзакції, що й дані: окремі роути, пакетний імпорт
+# (Core INSERT), /batch та каскадне видалення подорожі не потребують
+# окремого коду.
+#
+# Кожне слово в індексі має префікс власника: 'Музей' користувача 42 -
+# токен 'u42xмузей'. Тож список документів кожного токена містить записи
+# лише одного користувача, і пошук не залежить від розміру всієї таблиці
+# (фільтр за власником після збігу читав би збіги всіх користувачів).
+# Для тригерів SQLite слова з префіксом формує SQL-функція search_tokens,
+# яку додаток реєструє на кожному з'єднанні (див. init_app); запис у ці
+# таблиці з інших клієнтів SQLite без неї завершиться помилкою
+# "no such function". PostgreSQL робить те саме через regexp_replace.
+#
+# Кожне слово запиту шукається як префікс ("льві" -> "львів"), збігтися
+# мають усі слова. Результати впорядковані за релевантністю: збіг у назві
+# важить більше, ніж в адресі, а в адресі - більше, ніж у нотатках.
+
+import re
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from . import db
+from .models import Destination, Trip, rows_to_dicts
+
+# Слово - послідовність літер і цифр ('_' токенізатор FTS5 вважає роздільником)
+TERM = re.compile(r'[^\W_]+')
+
+# Тип результату: (модель, таблиця FTS5)
+KINDS = {
+    'trips': (Trip, 'trip_search'),
+    'destinations': (Destination, 'destination_search')
+}
+
+# Об'єкти індексу створює міграція, а не моделі (див. include_object)
+SEARCH_TABLES = tuple(table for _, table in KINDS.values())
+SEARCH_COLUMN = 'search_vector'
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+def parse_terms(text, max_terms):
+    """Слова запиту в нижньому регістрі без повторів (не більше max_terms)."""
+    terms = []
+    for term in TERM.findall((text or '').lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms[:max_terms]
+
+
+def owner_token(user_id, term):
+    """Токен індексу: слово з префіксом власника."""
+    return f'u{user_id}x{term}'
+
+
+def search_tokens(user_id, text):
+    """Текст для індексу FTS5 (SQL-функція search_tokens у тригерах)."""
+    if text is None:
+        return None
+    return ' '.join(owner_token(user_id, term) for term in TERM.findall(text.lower()))
+
+
+def _statement(dialect, kind, user_id, terms, limit):
+    model, table = KINDS[kind]
+    stmt = model.select_dicts().order_by(None).limit(limit)
+    if dialect == 'sqlite':
+        index = sa.table(table, sa.column('rowid'), sa.column('rank'))
+        query = ' AND '.join(f'"{owner_token(user_id, term)}"*' for term in terms)
+        return (
+            stmt.join(index, index.c.rowid == model.id)
+            .where(sa.literal_column(table).match(query))
+            .order_by(index.c.rank)
+        )
+    if dialect == 'postgresql':
+        vector = sa.literal_column(f'{model.__tablename__}.{SEARCH_COLUMN}')
+        # Рядок приводиться до tsquery як є, без нормалізації парсером
+        query = sa.cast(' & '.join(f"'{owner_token(user_id, term)}':*" for term in terms), postgresql.TSQUERY)
+        return stmt.where(vector.op('@@')(query)).order_by(sa.func.ts_rank(vector, query).desc())
+    raise SearchUnavailable(f'Full-text search is not supported on {dialect}')
+
+
+def search(user_id, terms, kinds, limit):
+    """Найрелевантніші записи користувача: {тип: [словники як у to_dict()]}."""
+    dialect = db.engine.dialect.name
+    return {
+        kind: rows_to_dicts(db.session.execute(_statement(dialect, kind, user_id, terms, limit)))
+        for kind in kinds
+    }
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Для `flask db migrate`: не пропонувати видалення індексу пошуку, якого немає в моделях."""
+    if type_ == 'table':
+        return not name.startswith(SEARCH_TABLES)
+    if type_ in ('column', 'index'):
+        return SEARCH_COLUMN not in name
+    return True
+
+
+def _register_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function('search_tokens', 2, search_tokens, deterministic=True)
+
+
+def init_app(app):
+    """Реєструє search_tokens на з'єднаннях SQLite. Викликається в контексті додатку після db.init_app."""
+    for engine in db.engines.values():
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _register_functions)
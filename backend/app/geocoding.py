@@ -0,0 +1,162 @@
+# Проксі до геокодера Nominatim з двохрівневим кешем
+#
+# 1) in-process LRU з TTL - найшвидший шлях для популярних запитів;
+# 2) таблиця geocode_cache у БД - спільна для всіх воркерів і переживає перезапуск.
+# Однакові одночасні запити об'єднуються (SingleFlight), а кількість
+# одночасних звернень до Nominatim обмежена семафором.
+
+import hashlib
+import json
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .cache import SingleFlight, TTLCache
+from .models import GeocodeCache
+
+# INSERT ... ON CONFLICT для БД, що його підтримують
+UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+class GeocoderError(Exception):
+    """Зовнішній геокодер недоступний або повернув помилку."""
+
+
+class GeocoderBusy(GeocoderError):
+    """Перевищено ліміт одночасних звернень до геокодера."""
+
+
+class _GeocoderState:
+    """Стан геокодера для одного додатку (кеш, семафор, об'єднання запитів)."""
+
+    def __init__(self, config):
+        self.base_url = config['NOMINATIM_URL'].rstrip('/')
+        self.user_agent = config['NOMINATIM_USER_AGENT']
+        self.timeout = config['GEOCODE_TIMEOUT']
+        self.ttl = config['GEOCODE_CACHE_TTL']
+        self.precision = config['GEOCODE_REVERSE_PRECISION']
+        self.queue_timeout = config['GEOCODE_QUEUE_TIMEOUT']
+        self.min_interval = config['GEOCODE_MIN_INTERVAL']
+        self.memory = TTLCache(maxsize=config['GEOCODE_MEMORY_CACHE_SIZE'], ttl=min(self.ttl, 3600))
+        self.flight = SingleFlight()
+        self.semaphore = threading.BoundedSemaphore(config['GEOCODE_MAX_CONCURRENCY'])
+        self.rate_lock = threading.Lock()
+        self.last_request = 0.0
+        self.last_prune = time.time()
+
+
+def init_app(app):
+    app.extensions['geocoder'] = _GeocoderState(app.config)
+
+
+def _state():
+    return current_app.extensions['geocoder']
+
+
+def _cache_key(kind, params):
+    raw = kind + '|' + json.dumps(params, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _fetch(state, path, params):
+    """Запит до Nominatim з урахуванням ліміту одночасності та інтервалу між запитами."""
+    if not state.semaphore.acquire(timeout=state.queue_timeout):
+        raise GeocoderBusy('Geocoder is busy, try again later')
+    try:
+        if state.min_interval:
+            with state.rate_lock:
+                wait = state.last_request + state.min_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                state.last_request = time.monotonic()
+        url = f'{state.base_url}/{path}?{urlencode(params)}'
+        request = Request(url, headers={'User-Agent': state.user_agent, 'Accept': 'application/json'})
+        try:
+            with urlopen(request, timeout=state.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except (HTTPError, URLError, TimeoutError, ValueError) as e:
+            raise GeocoderError(f'Geocoder request failed: {e}')
+    finally:
+        state.semaphore.release()
+
+
+def _store(key, value, expires_at):
+    """
+    Записує відповідь у таблицю-кеш. Той самий ключ міг щойно записати інший
+    воркер (або читання з репліки, що відстає, не побачило рядок), тож запис -
+    upsert, а не INSERT після SELECT.
+    """
+    values = {'key': key, 'payload': json.dumps(value), 'expires_at': expires_at}
+    insert = UPSERT_INSERTS.get(db.engine.dialect.name)
+    if insert is None:
+        db.session.merge(GeocodeCache(**values))
+        return
+    stmt = insert(GeocodeCache).values(**values)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[GeocodeCache.key],
+        set_={'payload': stmt.excluded.payload, 'expires_at': stmt.excluded.expires_at}
+    ))
+
+
+def _load(state, key, path, params):
+    """Читає відповідь з таблиці-кешу або звертається до Nominatim і зберігає її."""
+    now = time.time()
+    row = db.session.get(GeocodeCache, key)
+    if row is not None and row.expires_at > now:
+        value = json.loads(row.payload)
+    else:
+        value = _fetch(state, path, params)
+        _store(key, value, now + state.ttl)
+        # Час від часу прибираємо застарілі записи
+        if now - state.last_prune > 3600:
+            state.last_prune = now
+            GeocodeCache.query.filter(GeocodeCache.expires_at < now).delete(synchronize_session=False)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # БД без upsert (merge): рядок уже записав інший воркер - відповідь та сама
+            db.session.rollback()
+    state.memory.set(key, value)
+    return value
+
+
+def _cached(kind, path, params):
+    state = _state()
+    key = _cache_key(kind, params)
+    value = state.memory.get(key)
+    if value is not None:
+        return value
+    return state.flight.do(key, lambda: _load(state, key, path, params))
+
+
+def search(query, limit=5, language='en'):
+    """Пошук місць за текстом (Nominatim /search)."""
+    params = {
+        'format': 'json',
+        'q': ' '.join(query.split()).lower(),
+        'limit': limit,
+        'accept-language': language
+    }
+    return _cached('search', 'search', params)
+
+
+def reverse(lat, lng, language='en'):
+    """
+    Зворотне геокодування (Nominatim /reverse). Координати округлюються,
+    тож сусідні кліки по карті потрапляють в один запис кешу.
+    """
+    precision = _state().precision
+    params = {
+        'format': 'json',
+        'lat': round(lat, precision),
+        'lon': round(lng, precision),
+        'accept-language': language
+    }
+    return _cached('reverse', 'reverse', params)
@@ -0,0 +1,292 @@
+# Потоковий розбір файлів з пунктами призначення (GPX, GeoJSON, NDJSON, CSV)
+#
+# Усі парсери читають файл частинами і віддають записи по одному, тож
+# пам'ять не залежить від розміру файлу. Кожен запис - це пара
+# (номер рядка/елемента, словник з "сирими" полями), яку потім перевіряє
+# validate_record().
+
+import csv
+import io
+import json
+import math
+import re
+import xml.etree.ElementTree as ET
+
+# Розмір частини, яку читаємо з потоку за раз
+CHUNK_SIZE = 64 * 1024
+
+# Альтернативні назви колонок CSV / властивостей GeoJSON
+FIELD_ALIASES = {
+    'name': ('name', 'title'),
+    'lat': ('lat', 'latitude'),
+    'lng': ('lng', 'lon', 'long', 'longitude'),
+    'address': ('address',),
+    'notes': ('notes', 'description', 'desc'),
+    'visit_date': ('visit_date', 'date')
+}
+
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+class ImportFormatError(ValueError):
+    """Файл неможливо розібрати далі (пошкоджений або невідомий формат)."""
+
+
+def _pick(values, field):
+    """Повертає значення поля з урахуванням альтернативних назв."""
+    for alias in FIELD_ALIASES[field]:
+        value = values.get(alias)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _text_stream(binary_stream):
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+
+# ------------------------------------------------------
+# CSV
+# ------------------------------------------------------
+
+def iter_csv(stream):
+    """Рядки CSV з заголовком (name, lat, lng/lon, address, notes, visit_date)."""
+    reader = csv.DictReader(_text_stream(stream))
+    try:
+        if reader.fieldnames is None:
+            return
+        for row in reader:
+            values = {(key or '').strip().lower(): value for key, value in row.items()}
+            # Номер рядка з урахуванням заголовка
+            yield reader.line_num, {field: _pick(values, field) for field in FIELD_ALIASES}
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFormatError(f'Invalid CSV: {e}')
+
+
+# ------------------------------------------------------
+# GPX
+# ------------------------------------------------------
+
+GPX_POINT_TAGS = ('wpt', 'rtept', 'trkpt')
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_gpx(stream):
+    """Точки <wpt>, <rtept> та <trkpt> з GPX-файлу."""
+    # Відкриті елементи від кореня до поточного: оброблений елемент видаляємо
+    # з його батька, інакше точки <trk><trkseg> накопичувались би в сегменті
+    open_elements = []
+    open_points = 0
+    number = 0
+    try:
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            is_point = _local_name(elem.tag) in GPX_POINT_TAGS
+            if event == 'start':
+                open_elements.append(elem)
+                open_points += is_point
+                continue
+            open_elements.pop()
+            if is_point:
+                open_points -= 1
+                number += 1
+                children = {_local_name(child.tag): (child.text or '').strip() for child in elem}
+                yield number, {
+                    'name': children.get('name') or f'Point {number}',
+                    'lat': elem.get('lat'),
+                    'lng': elem.get('lon'),
+                    'notes': children.get('desc') or children.get('cmt'),
+                    'address': None,
+                    'visit_date': (children.get('time') or '')[:10] or None
+                }
+            # Дочірні елементи точки потрібні, доки вона не завершиться
+            if open_elements and not open_points:
+                open_elements[-1].remove(elem)
+    except ET.ParseError as e:
+        raise ImportFormatError(f'Invalid GPX: {e}')
+
+
+# ------------------------------------------------------
+# GeoJSON / NDJSON
+# ------------------------------------------------------
+
+def _feature_record(feature):
+    """Запис з GeoJSON Feature; None - для Feature без геометрії (нічого імпортувати)."""
+    if not isinstance(feature, dict) or feature.get('type') != 'Feature':
+        raise ValueError('Item is not a GeoJSON Feature')
+    # Так експорт (exporters.py) позначає подорож без пунктів призначення
+    if feature.get('geometry') is None and 'geometry' in feature:
+        return None
+    geometry = feature.get('geometry') or {}
+    if geometry.get('type') != 'Point':
+        raise ValueError('Only Point geometries are supported')
+    coords = geometry.get('coordinates') or []
+    if len(coords) < 2:
+        raise ValueError('Point must have [lng, lat] coordinates')
+    properties = {str(k).lower(): v for k, v in (feature.get('properties') or {}).items()}
+    record = {field: _pick(properties, field) for field in FIELD_ALIASES}
+    record['lng'], record['lat'] = coords[0], coords[1]
+    return record
+
+
+def iter_json_array(stream, key):
+    """
+    Потоково віддає елементи масиву верхнього рівня '<key>': [...] з JSON-документа.
+    У пам'яті одночасно тримається лише поточний елемент.
+    """
+    text = _text_stream(stream)
+    decoder = json.JSONDecoder()
+    buf = ''
+    eof = False
+
+    def read_more():
+        nonlocal buf, eof
+        try:
+            chunk = text.read(CHUNK_SIZE)
+        except UnicodeDecodeError as e:
+            raise ImportFormatError(f'Invalid JSON: {e}')
+        if not chunk:
+            eof = True
+        buf += chunk
+
+    # Шукаємо початок масиву
+    marker = f'"{key}"'
+    while True:
+        pos = buf.find(marker)
+        if pos >= 0:
+            bracket = buf.find('[', pos + len(marker))
+            if bracket >= 0:
+                buf = buf[bracket + 1:]
+                break
+            buf = buf[pos:]
+        else:
+            # Залишаємо хвіст, у якому може бути розірваний маркер
+            buf = buf[-len(marker):]
+        if eof:
+            raise ImportFormatError(f'No "{key}" array found')
+        read_more()
+
+    while True:
+        stripped = buf.lstrip(' \t\r\n,')
+        if not stripped:
+            if eof:
+                raise ImportFormatError(f'Unterminated "{key}" array')
+            buf = ''
+            read_more()
+            continue
+        buf = stripped
+        if buf[0] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ImportFormatError(f'Invalid JSON: {e}')
+            # Елемент ще не прочитано повністю
+            read_more()
+            continue
+        buf = buf[end:]
+        yield item
+
+
+def iter_geojson(stream):
+    """Точки з GeoJSON FeatureCollection."""
+    for number, feature in enumerate(iter_json_array(stream, 'features'), start=1):
+        try:
+            record = _feature_record(feature)
+        except ValueError as e:
+            yield number, e
+            continue
+        if record is not None:
+            yield number, record
+
+
+def iter_ndjson(stream):
+    """Точки з NDJSON / GeoJSONSeq: по одному GeoJSON Feature в рядку."""
+    try:
+        for number, line in enumerate(_text_stream(stream), start=1):
+            line = line.strip().lstrip('\x1e')  # RFC 8142 розділювач записів
+            if not line:
+                continue
+            try:
+                record = _feature_record(json.loads(line))
+            except ValueError as e:
+                yield number, e
+                continue
+            if record is not None:
+                yield number, record
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f'Invalid NDJSON: {e}')
+
+
+PARSERS = {
+    'csv': iter_csv,
+    'gpx': iter_gpx,
+    'geojson': iter_geojson,
+    'ndjson': iter_ndjson
+}
+
+EXTENSIONS = {
+    'csv': 'csv',
+    'gpx': 'gpx',
+    'geojson': 'geojson',
+    'json': 'geojson',
+    'ndjson': 'ndjson',
+    'geojsonl': 'ndjson',
+    'jsonl': 'ndjson'
+}
+
+
+def detect_format(filename=None, explicit=None):
+    """Визначає формат за явним параметром або розширенням файлу."""
+    if explicit:
+        fmt = explicit.lower()
+        return fmt if fmt in PARSERS else None
+    if filename and '.' in filename:
+        return EXTENSIONS.get(filename.rsplit('.', 1)[-1].lower())
+    return None
+
+
+# ------------------------------------------------------
+# Перевірка записів
+# ------------------------------------------------------
+
+def _coordinate(value, name, limit):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} is not a number')
+    if not math.isfinite(number) or not -limit <= number <= limit:
+        raise ValueError(f'{name} must be between -{limit} and {limit}')
+    return number
+
+
+def validate_record(record):
+    """Повертає очищений словник для Destination або кидає ValueError."""
+    if isinstance(record, Exception):
+        raise record
+    name = record.get('name')
+    if not name or not str(name).strip():
+        raise ValueError('name is required')
+    name = str(name).strip()
+    if len(name) > 140:
+        raise ValueError('name is longer than 140 characters')
+    address = record.get('address')
+    if address is not None:
+        address = str(address)
+        if len(address) > 255:
+            raise ValueError('address is longer than 255 characters')
+    visit_date = record.get('visit_date')
+    if visit_date is not None and not DATE_RE.match(str(visit_date)):
+        raise ValueError('visit_date must be YYYY-MM-DD')
+    notes = record.get('notes')
+    return {
+        'name': name,
+        'lat': _coordinate(record.get('lat'), 'lat', 90),
+        'lng': _coordinate(record.get('lng'), 'lng', 180),
+        'address': address,
+        'visit_date': visit_date,
+        'notes': str(notes) if notes is not None else None
+    }
@@ -0,0 +1,212 @@
+# Розподіл пунктів подорожі по днях (POST /api/trips/<id>/plan-days)
+#
+# Точки кластеризуються сферичним k-means: координати - одиничні вектори
+# в 3D, близькість - скалярний добуток. Він монотонно спадає з відстанню по
+# великому колу (гаверсинус), тож найближчий центр за косинусом - найближчий
+# і за гаверсинусом, а центр кластера - нормований середній вектор. Матриця
+# N x k рахується одним множенням, тож тисячі точок кластеризуються за
+# мілісекунди - без матриці N x N.
+#
+# Задано кількість днів - k = days (не більше кількості точок), жоден день
+# не перевищує середній більше ніж у DAY_SIZE_SLACK разів (жадібний
+# перерозподіл точок) і не лишається порожнім (навіть якщо координати
+# збігаються - тоді ділиться найбільший кластер). Задано бюджет часу на
+# день - спершу k за сумарним часом відвідувань, а день, що не вміщується
+# (відвідування + переїзди по прямій із заданою швидкістю), ріжеться вздовж
+# свого маршруту. Порядок у межах дня - optimizer.optimize_order, дні
+# йдуть у порядку короткого маршруту через їхні центри.
+
+import math
+
+from .lazy import LazyModule
+from .optimizer import haversine_matrix, optimize_order, path_length
+
+# numpy імпортується з першим викликом (див. lazy.py)
+np = LazyModule('numpy')
+
+# Максимум ітерацій k-means (зазвичай збігається за 10-20)
+KMEANS_MAX_ITERATIONS = 50
+
+# У режимі кількості днів - максимум пунктів на день відносно середнього
+DAY_SIZE_SLACK = 1.5
+
+
+def _unit_vectors(lats, lngs):
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    return np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _centers(points, labels, k):
+    sums = np.column_stack([np.bincount(labels, weights=points[:, axis], minlength=k) for axis in range(3)])
+    return _normalize(sums)
+
+
+def spherical_kmeans(points, k, seed=0):
+    """
+    Мітки кластерів (0..k-1) для одиничних векторів 'points'. Початкові
+    центри - k-means++ з фіксованим seed, тож та сама подорож дає той самий
+    план (попередній перегляд і збереження збігаються).
+    """
+    n = len(points)
+    rng = np.random.default_rng(seed)
+    centers = np.empty((k, 3))
+    centers[0] = points[rng.integers(n)]
+    # 1 - cos пропорційне квадрату хордової відстані (обрізаємо похибку float нижче нуля)
+    gap = np.maximum(1.0 - points @ centers[0], 0.0)
+    for c in range(1, k):
+        total = gap.sum()
+        index = rng.choice(n, p=gap / total) if total > 0 else rng.integers(n)
+        centers[c] = points[index]
+        gap = np.minimum(gap, np.maximum(1.0 - points @ centers[c], 0.0))
+
+    labels = np.full(n, -1)
+    for _ in range(KMEANS_MAX_ITERATIONS):
+        new_labels = np.argmax(points @ centers.T, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        centers = _centers(points, labels, k)
+        empty = np.flatnonzero(np.bincount(labels, minlength=k) == 0)
+        if len(empty):
+            # Порожній кластер отримує точку, найдальшу від свого центру
+            similarity = np.einsum('ij,ij->i', points, centers[labels])
+            for c, index in zip(empty, np.argsort(similarity)[:len(empty)]):
+                labels[index] = c
+            centers = _centers(points, labels, k)
+    return labels
+
+
+def _limit_sizes(points, labels, k, capacity):
+    """
+    Перерозподіляє точки так, щоб у кластері було не більше 'capacity'.
+    Першими місце отримують точки, яким найбільше програє другий за
+    близькістю центр; решта йде до найближчого центру з вільним місцем.
+    """
+    if np.bincount(labels, minlength=k).max() <= capacity:
+        return labels
+    similarity = points @ _centers(points, labels, k).T
+    preference = np.argsort(-similarity, axis=1)
+    ranked = np.take_along_axis(similarity, preference[:, :2], axis=1)
+    regret = ranked[:, 0] - ranked[:, 1]
+    sizes = np.zeros(k, dtype=int)
+    for index in np.argsort(-regret):
+        for c in preference[index]:
+            if sizes[c] < capacity:
+                labels[index] = c
+                sizes[c] += 1
+                break
+    return labels
+
+
+def _fill_empty(points, labels, k):
+    """
+    Гарантує k непорожніх кластерів: на збіглих координатах k-means лишає
+    кластери порожніми. Кожен порожній отримує половину найбільшого кластера,
+    поділеного вздовж напрямку найбільшого розкиду його точок.
+    """
+    sizes = np.bincount(labels, minlength=k)
+    for c in np.flatnonzero(sizes == 0):
+        largest = np.argmax(sizes)
+        members = np.flatnonzero(labels == largest)
+        spread = points[members] - points[members].mean(axis=0)
+        axis = np.linalg.svd(spread, full_matrices=False)[2][0]
+        moved = members[np.argsort(spread @ axis, kind='stable')][len(members) // 2:]
+        labels[moved] = c
+        sizes[largest] -= len(moved)
+        sizes[c] = len(moved)
+    return labels
+
+
+def _day_minutes(dist, order, visit_minutes, speed_kmh):
+    return len(order) * visit_minutes + path_length(dist, order) / speed_kmh * 60
+
+
+def _split_day(dist, order, day_minutes, visit_minutes, speed_kmh):
+    """Ріже маршрут дня на відрізки, кожен з яких вміщується в 'day_minutes'."""
+    parts, current, minutes = [], [order[0]], visit_minutes
+    for prev, index in zip(order, order[1:]):
+        step = dist[prev, index] / speed_kmh * 60 + visit_minutes
+        if minutes + step > day_minutes:
+            parts.append(current)
+            current, minutes = [index], visit_minutes
+        else:
+            current.append(index)
+            minutes += step
+    parts.append(current)
+    return parts
+
+
+def plan_days(lats, lngs, days=None, day_minutes=None, visit_minutes=60, speed_kmh=30,
+              first=0, max_days=None, time_budget=0.3):
+    """
+    Розподіляє точки по днях. Задається або 'days' (кількість днів), або
+    'day_minutes' (бюджет часу на день: 'visit_minutes' на кожен пункт плюс
+    переїзди зі швидкістю 'speed_kmh'). 'first' - індекс точки, з дня якої
+    починається подорож; 'time_budget' (секунди) ділиться між днями на
+    покращення порядку.
+
+    Повертає список днів, кожен - (індекси точок у порядку відвідування,
+    довжина маршруту дня в км). Кидає ValueError, якщо з бюджетом на день
+    знадобилося б більше 'max_days' днів.
+    """
+    n = len(lats)
+    if n == 0:
+        return []
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    points = _unit_vectors(lats, lngs)
+
+    if days is not None:
+        k = min(days, n)
+    else:
+        k = min(n, max(1, math.ceil(n * visit_minutes / day_minutes)))
+    labels = spherical_kmeans(points, k) if k > 1 else np.zeros(n, dtype=int)
+    if days is not None and k > 1:
+        labels = _limit_sizes(points, labels, k, math.ceil(n / k * DAY_SIZE_SLACK))
+        labels = _fill_empty(points, labels, k)
+    groups = [group for group in (np.flatnonzero(labels == c) for c in range(k)) if len(group)]
+
+    if day_minutes is not None:
+        # Кожен день упорядковується жадібно (без покращення) і, якщо не
+        # вміщується, ріжеться; 2-opt далі лише скорочує переїзди
+        fitted = []
+        for group in groups:
+            dist = haversine_matrix(lats[group], lngs[group])
+            order, _ = optimize_order(dist, time_budget=0)
+            if _day_minutes(dist, order, visit_minutes, speed_kmh) <= day_minutes:
+                fitted.append(group)
+            else:
+                fitted.extend(group[part] for part in
+                              _split_day(dist, order, day_minutes, visit_minutes, speed_kmh))
+        groups = fitted
+        if max_days is not None and len(groups) > max_days:
+            raise ValueError(f"The destinations do not fit into {max_days} days with this day budget")
+
+    # Послідовність днів - маршрут через центри кластерів від дня точки 'first'
+    centers = _normalize(np.array([points[group].sum(axis=0) for group in groups]))
+    center_lats = np.degrees(np.arcsin(np.clip(centers[:, 2], -1.0, 1.0)))
+    center_lngs = np.degrees(np.arctan2(centers[:, 1], centers[:, 0]))
+    start = next(i for i, group in enumerate(groups) if first in group)
+    sequence, _ = optimize_order(haversine_matrix(center_lats, center_lngs), start=start, time_budget=0.01)
+
+    plan = []
+    previous = None
+    for day in sequence:
+        group = groups[day]
+        dist = haversine_matrix(lats[group], lngs[group])
+        order, distance_km = optimize_order(dist, time_budget=time_budget / len(groups))
+        stops = group[order]
+        # Маршрут дня починається з кінця, ближчого до останнього пункту попереднього дня
+        if previous is not None and len(stops) > 1:
+            ends = haversine_matrix(lats[[previous, stops[0], stops[-1]]], lngs[[previous, stops[0], stops[-1]]])
+            if ends[0, 2] < ends[0, 1]:
+                stops = stops[::-1]
+        plan.append(([int(index) for index in stops], distance_km))
+        previous = stops[-1]
+    return plan
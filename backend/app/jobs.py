@@ -0,0 +1,551 @@
+# Фонові задачі без зовнішнього брокера
+#
+# Задачі зберігаються в таблиці job (див. models.Job) і виконуються в
+# процесах самого додатку: потік-диспетчер вибирає готові задачі й віддає
+# їх у пул потоків або процесів (JOBS_EXECUTOR). Черга - це сама таблиця,
+# тож задачі переживають перезапуск, а кілька воркерів gunicorn (і окремий
+# `flask jobs work`) ділять її між собою.
+#
+# Задачу бере той процес, чий умовний UPDATE ... WHERE id = ? AND status
+# IN (...) AND run_after <= now змінив рядок (однаково для SQLite і
+# PostgreSQL, без SELECT ... FOR UPDATE SKIP LOCKED). Воркер орендує задачу
+# на JOBS_LEASE_SECONDS і продовжує оренду, поки вона виконується; задачу
+# воркера, що зупинився, інший перехопить після завершення оренди.
+#
+# Кожен запис стану задачі перевіряє lease_owner, тож воркер, який втратив
+# оренду, не може ні завершити задачу, ні зберегти її проміжні результати:
+# вони фіксуються в одній транзакції з роботою обробника і відкочуються
+# разом з нею. Скасування (cancel_requested) перевіряється так само - на
+# контрольних точках обробника та при завершенні.
+#
+# Виняток обробника - повтор з експоненційною затримкою, доки не вичерпано
+# max_attempts спроб; JobFailed - остаточна помилка без повторів.
+
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from . import db, sync
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+# Задачу 'running' можна взяти лише після завершення оренди (run_after)
+CLAIMABLE = (QUEUED, RUNNING)
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Скільки завершених задач видаляти за один запит при прибиранні
+PRUNE_BATCH_SIZE = 1000
+
+# Обробники за типом задачі: fn(JobContext) -> результат (JSON); див. tasks.py
+HANDLERS = {}
+
+# Додаток дочірнього процесу пулу (JOBS_EXECUTOR = 'process')
+_process_app = None
+
+
+class JobFailed(Exception):
+    """Остаточна помилка задачі: повтор не допоможе (подорож видалено, некоректний файл)."""
+
+
+class JobInterrupted(Exception):
+    """Задачу скасовано або її перехопив інший воркер - роботу слід припинити."""
+
+
+def handler(kind):
+    """Реєструє обробник задач типу 'kind'."""
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+class _JobsState:
+    """Налаштування та диспетчер фонових задач для одного додатку."""
+
+    def __init__(self, config):
+        self.workers = config['JOBS_WORKERS']
+        self.executor = config['JOBS_EXECUTOR']
+        self.autostart = config['JOBS_AUTOSTART']
+        self.poll_interval = config['JOBS_POLL_INTERVAL']
+        self.lease = config['JOBS_LEASE_SECONDS']
+        self.max_attempts = config['JOBS_MAX_ATTEMPTS']
+        self.backoff = config['JOBS_RETRY_BACKOFF']
+        self.max_backoff = config['JOBS_RETRY_MAX_BACKOFF']
+        self.retention = config['JOBS_RETENTION']
+        self.progress_interval = config['JOBS_PROGRESS_INTERVAL']
+        self.output_dir = config['JOBS_OUTPUT_DIR']
+        self.lock = threading.Lock()
+        # Будить диспетчер: нова задача в цьому процесі або завершення поточної
+        self.wake = threading.Event()
+        self.runner = None
+        self.runner_pid = None
+
+
+def init_app(app):
+    state = app.extensions['jobs'] = _JobsState(app.config)
+    # Реєстрація обробників
+    from . import tasks  # noqa: F401
+
+    if state.workers and state.autostart:
+        @app.before_request
+        def start_job_runner():
+            # Диспетчер запускається з першим запитом і окремо в кожному процесі:
+            # потоки не переживають fork воркерів gunicorn, а CLI-команди його не потребують
+            if state.runner_pid != os.getpid():
+                start(app)
+
+
+def _state():
+    return current_app.extensions['jobs']
+
+
+def output_path(job_id):
+    """Файл з результатом задачі (експорт) у JOBS_OUTPUT_DIR."""
+    return os.path.join(_state().output_dir, f'job-{job_id}')
+
+
+# ------------------------------------------------------
+# Черга (викликається з роутів)
+# ------------------------------------------------------
+
+def enqueue(kind, user_id, params, payload=None, idempotency_key=None):
+    """
+    Додає задачу в чергу і фіксує транзакцію. Повертає (задача, створено).
+    Якщо користувач уже має задачу з таким idempotency_key, повертається вона.
+    """
+    state = _state()
+    if idempotency_key is not None:
+        job = Job.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+        if job is not None:
+            return job, False
+
+    now = time.time()
+    job = Job(
+        user_id=user_id,
+        kind=kind,
+        status=QUEUED,
+        params=json.dumps(params),
+        payload=payload,
+        progress=0,
+        attempts=0,
+        max_attempts=state.max_attempts,
+        cancel_requested=False,
+        idempotency_key=idempotency_key,
+        run_after=now,
+        created_at=now
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Паралельний запит з тим самим ключем створив задачу першим
+        db.session.rollback()
+        if idempotency_key is None:
+            raise
+        return Job.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).one(), False
+    state.wake.set()
+    return job, True
+
+
+def cancel(job):
+    """
+    Скасовує задачу: з черги - одразу, під час виконання - на найближчій
+    контрольній точці обробника. False, якщо задача вже завершилась.
+    """
+    if job.status in FINISHED:
+        return False
+    db.session.execute(
+        update(Job).where(Job.id == job.id, Job.status == QUEUED)
+        .values(status=CANCELLED, finished_at=time.time())
+        .execution_options(synchronize_session=False)
+    )
+    # Якщо задачу тим часом узяв воркер, він побачить прапорець
+    db.session.execute(
+        update(Job).where(Job.id == job.id, Job.status == RUNNING)
+        .values(cancel_requested=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return True
+
+
+# ------------------------------------------------------
+# Виконання задачі
+# ------------------------------------------------------
+
+def _owned(job_id, owner):
+    return update(Job).where(Job.id == job_id, Job.lease_owner == owner).execution_options(synchronize_session=False)
+
+
+class JobContext:
+    """Задача з боку обробника: параметри, вхідні дані, прогрес і контрольні точки."""
+
+    def __init__(self, job, owner, state):
+        self.id = job.id
+        self.user_id = job.user_id
+        self.params = json.loads(job.params)
+        # Проміжний результат, збережений попередньою спробою (None - починаємо спочатку)
+        self.result = json.loads(job.result) if job.result else None
+        self.owner = owner
+        self.lease = state.lease
+        self.progress_interval = state.progress_interval
+        self._reported = time.monotonic()
+
+    @property
+    def payload(self):
+        """Вхідні дані задачі (байти), якщо вони є."""
+        return db.session.scalar(select(Job.payload).where(Job.id == self.id))
+
+    def _progress(self, connection, done, total, result):
+        values = {'progress': done, 'progress_total': total, 'run_after': time.time() + self.lease}
+        if result is not None:
+            values['result'] = json.dumps(result)
+        stmt = _owned(self.id, self.owner).where(Job.cancel_requested.is_(False)).values(**values)
+        if connection.execute(stmt).rowcount != 1:
+            raise JobInterrupted(f'Job {self.id} was cancelled or taken over')
+
+    def checkpoint(self, done, total=None, result=None):
+        """
+        Фіксує зміни обробника в сесії разом з прогресом і проміжним
+        результатом (з нього продовжить наступна спроба). Якщо задачу
+        скасовано або перехоплено - JobInterrupted, зміни не фіксуються.
+        """
+        self._progress(db.session, done, total, result)
+        if result is not None:
+            self.result = result
+        db.session.commit()
+        self._reported = time.monotonic()
+
+    def report(self, done, total=None):
+        """
+        Прогрес без фіксації сесії обробника (окремою короткою транзакцією,
+        не частіше ніж раз на JOBS_PROGRESS_INTERVAL) - для задач, що лише
+        читають дані. JobInterrupted - як у checkpoint().
+        """
+        now = time.monotonic()
+        if now - self._reported < self.progress_interval:
+            return
+        self._reported = now
+        with db.engine.begin() as connection:
+            self._progress(connection, done, total, None)
+
+
+def _finish(job_id, owner, status, **values):
+    """Остаточний стан задачі (якщо оренда ще наша). True, якщо записано."""
+    stmt = _owned(job_id, owner).values(status=status, lease_owner=None, finished_at=time.time(), **values)
+    return db.session.execute(stmt).rowcount == 1
+
+
+def _cancelled(job_id, owner):
+    """Позначає скасовану задачу; False, якщо скасування не було (оренду втрачено)."""
+    stmt = _owned(job_id, owner).where(Job.cancel_requested.is_(True)).values(
+        status=CANCELLED, lease_owner=None, finished_at=time.time())
+    done = db.session.execute(stmt).rowcount == 1
+    db.session.commit()
+    return done
+
+
+def _retry_or_fail(job_id, owner, error):
+    """Після помилки: повтор з експоненційною затримкою або, якщо спроби вичерпано, failed."""
+    state = _state()
+    job = db.session.get(Job, job_id)
+    if job is None or job.lease_owner != owner:
+        return
+    if job.cancel_requested:
+        _cancelled(job_id, owner)
+        return
+    if job.attempts >= job.max_attempts:
+        _finish(job_id, owner, FAILED, error=error)
+    else:
+        delay = min(state.backoff * 2 ** (job.attempts - 1), state.max_backoff)
+        # Випадкова частка затримки, щоб задачі, що впали разом, не повторювались разом
+        db.session.execute(_owned(job_id, owner).values(
+            status=QUEUED, lease_owner=None, error=error, run_after=time.time() + delay * random.uniform(0.5, 1.0)))
+    db.session.commit()
+
+
+def _execute(job_id, owner):
+    """Виконує взяту задачу. Викликається в контексті додатку (потік або процес пулу)."""
+    job = db.session.get(Job, job_id)
+    if job is None or job.lease_owner != owner:
+        return
+    if job.cancel_requested:
+        _cancelled(job_id, owner)
+        return
+    if job.attempts > job.max_attempts:
+        # Оренду кілька разів не продовжили - воркери зупинялись на цій задачі
+        _finish(job_id, owner, FAILED, error='Job was interrupted too many times')
+        db.session.commit()
+        return
+
+    kind = job.kind
+    context = JobContext(job, owner, _state())
+    try:
+        fn = HANDLERS.get(kind)
+        if fn is None:
+            raise JobFailed(f'Unknown job type: {kind}')
+        result = fn(context)
+        # Завершення - у тій самій транзакції, що й остання частина роботи обробника
+        stmt = _owned(job_id, owner).where(Job.cancel_requested.is_(False)).values(
+            status=SUCCEEDED, lease_owner=None, finished_at=time.time(), error=None,
+            result=json.dumps(result) if result is not None else None)
+        if db.session.execute(stmt).rowcount != 1:
+            raise JobInterrupted(f'Job {job_id} was cancelled or taken over')
+        db.session.commit()
+    except JobInterrupted:
+        db.session.rollback()
+        _cancelled(job_id, owner)
+    except JobFailed as e:
+        db.session.rollback()
+        _finish(job_id, owner, FAILED, error=str(e))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Job %s (%s) failed', job_id, kind)
+        _retry_or_fail(job_id, owner, f'{type(e).__name__}: {e}')
+
+
+def _run(app, job_id, owner):
+    """Точка входу пулу: у пулі процесів app - None, береться додаток процесу."""
+    with (app or _process_app).app_context():
+        _execute(job_id, owner)
+
+
+def _init_process(config):
+    """Ініціалізатор процесу пулу: власний додаток (рушій БД, обробники) з тією ж конфігурацією."""
+    global _process_app
+    from . import create_app
+    _process_app = create_app(type('JobProcessConfig', (), config))
+
+
+def _claim(owner, limit, state):
+    """Бере до 'limit' готових задач (у т.ч. з простроченою орендою). Повертає їхні id."""
+    now = time.time()
+    due = (Job.status.in_(CLAIMABLE), Job.run_after <= now)
+    candidates = db.session.scalars(select(Job.id).where(*due).order_by(Job.run_after).limit(limit)).all()
+    claimed = []
+    for job_id in candidates:
+        # Ту саму задачу могли вибрати інші процеси - UPDATE змінить рядок лише в одного
+        result = db.session.execute(
+            update(Job).where(Job.id == job_id, *due)
+            .values(status=RUNNING, lease_owner=owner, run_after=now + state.lease,
+                    attempts=Job.attempts + 1, started_at=func.coalesce(Job.started_at, now))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def prune(older_than):
+    """Видаляє задачі, завершені понад 'older_than' секунд тому, разом з їхніми файлами."""
+    cutoff = time.time() - older_than
+    removed = 0
+    while True:
+        ids = db.session.scalars(select(Job.id).where(Job.finished_at < cutoff).limit(PRUNE_BATCH_SIZE)).all()
+        if not ids:
+            return removed
+        for job_id in ids:
+            try:
+                os.remove(output_path(job_id))
+            except FileNotFoundError:
+                pass
+        Job.query.filter(Job.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
+
+
+# ------------------------------------------------------
+# Диспетчер
+# ------------------------------------------------------
+
+def _owner_id():
+    return f'{socket.gethostname()[:32]}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _mp_context():
+    # Як у security.py: forkserver безпечніший за fork багатопотокового сервера
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+class _Runner:
+    """Потік, що бере задачі з черги, віддає їх у пул і продовжує оренду."""
+
+    def __init__(self, app, state):
+        self.app = app
+        self.state = state
+        self.owner = _owner_id()
+        self.running = {}  # future -> id задачі
+        self.stopping = threading.Event()
+        self.thread = None
+        self.last_heartbeat = self.last_prune = 0.0
+        self.executor = self._new_executor()
+
+    def _new_executor(self):
+        if self.state.executor == 'process':
+            config = {key: value for key, value in self.app.config.items() if key.isupper()}
+            return ProcessPoolExecutor(max_workers=self.state.workers, mp_context=_mp_context(),
+                                       initializer=_init_process, initargs=(config,))
+        return ThreadPoolExecutor(max_workers=self.state.workers, thread_name_prefix='job')
+
+    def loop(self, burst=False):
+        """Цикл диспетчера; burst - вийти, коли черга порожня і задач у роботі немає."""
+        while not self.stopping.is_set():
+            self.state.wake.clear()
+            claimed = 0
+            try:
+                with self.app.app_context():
+                    self._reap()
+                    self._heartbeat()
+                    claimed = self._submit()
+                    self._prune()
+            except Exception:
+                # БД тимчасово недоступна тощо - спробуємо на наступній ітерації
+                logger.exception('Job runner iteration failed')
+            if burst and not claimed and not self.running:
+                return
+            self.state.wake.wait(self.state.poll_interval)
+
+    def _submit(self):
+        free = self.state.workers - len(self.running)
+        if free <= 0:
+            return 0
+        app = None if self.state.executor == 'process' else self.app
+        job_ids = _claim(self.owner, free, self.state)
+        for job_id in job_ids:
+            future = self.executor.submit(_run, app, job_id, self.owner)
+            future.add_done_callback(lambda _: self.state.wake.set())
+            self.running[future] = job_id
+        return len(job_ids)
+
+    def _reap(self):
+        broken = False
+        for future in [f for f in self.running if f.done()]:
+            job_id = self.running.pop(future)
+            error = future.exception()
+            if error is None:
+                continue
+            # Помилка поза обробником (напр. аварійне завершення процесу пулу) - повторимо
+            logger.error('Job %s crashed: %r', job_id, error)
+            broken = broken or isinstance(error, BrokenProcessPool)
+            _retry_or_fail(job_id, self.owner, f'{type(error).__name__}: {error}')
+        if broken:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._new_executor()
+
+    def _heartbeat(self):
+        now = time.time()
+        if not self.running or now - self.last_heartbeat < self.state.lease / 3:
+            return
+        self.last_heartbeat = now
+        db.session.execute(
+            update(Job).where(Job.id.in_(list(self.running.values())), Job.lease_owner == self.owner)
+            .values(run_after=now + self.state.lease)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def _prune(self):
+        now = time.time()
+        if now - self.last_prune < 3600:
+            return
+        self.last_prune = now
+        removed = prune(self.state.retention)
+        if removed:
+            logger.info('Pruned %d finished jobs', removed)
+        # Заодно - застарілі надгробки журналу синхронізації
+        removed = sync.compact(self.app.config['SYNC_TOMBSTONE_TTL'])
+        if removed:
+            logger.info('Compacted %d sync tombstones', removed)
+
+    def stop(self):
+        """Зупиняє диспетчер і чекає на задачі, що вже виконуються; нові не беруться."""
+        self.stopping.set()
+        self.state.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def start(app):
+    """Запускає диспетчер у поточному процесі (якщо JOBS_WORKERS > 0 і його ще немає)."""
+    state = app.extensions['jobs']
+    with state.lock:
+        if state.workers <= 0:
+            return None
+        if state.runner is None or state.runner_pid != os.getpid():
+            state.runner = _Runner(app, state)
+            state.runner_pid = os.getpid()
+            state.runner.thread = threading.Thread(target=state.runner.loop, name='job-runner', daemon=True)
+            state.runner.thread.start()
+        return state.runner
+
+
+def shutdown(app):
+    """Зупиняє диспетчер (для скриптів, які створюють додаток лише на час роботи)."""
+    state = app.extensions['jobs']
+    with state.lock:
+        runner, state.runner = state.runner, None
+    if runner is not None:
+        runner.stop()
+
+
+def run_pending(app):
+    """
+    Виконує всі готові задачі по одній у поточному потоці, без пулу
+    (перевірка планів запитів, бенчмарки). Повертає кількість виконаних.
+    """
+    state = app.extensions['jobs']
+    owner = _owner_id()
+    count = 0
+    while True:
+        with app.app_context():
+            job_ids = _claim(owner, 1, state)
+            if not job_ids:
+                return count
+            _execute(job_ids[0], owner)
+        count += 1
+
+
+jobs_cli = AppGroup('jobs', help='Background jobs.')
+
+
+@jobs_cli.command('work')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def work_command(burst):
+    """Run queued jobs in this process (alongside or instead of the web workers)."""
+    app = current_app._get_current_object()
+    state = app.extensions['jobs']
+    if state.workers <= 0:
+        raise click.ClickException('JOBS_WORKERS is 0')
+    runner = _Runner(app, state)
+    click.echo(f'Job runner {runner.owner}: {state.workers} {state.executor} worker(s)')
+    try:
+        runner.loop(burst=burst)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
@@ -0,0 +1,76 @@
+# JSON-провайдер додатку
+#
+# jsonify, request.get_json та app.json працюють через провайдер, заданий
+# JSON_PROVIDER: 'orjson' (у кілька разів швидший за stdlib на великих
+# списках подорожей), 'stdlib' (стандартний провайдер Flask) або 'auto' -
+# orjson, якщо пакет встановлено, інакше stdlib.
+#
+# Вивід orjson збігається зі стандартним за змістом: дати - у форматі HTTP,
+# як у Flask, нерядкові ключі словників - рядками, скаляри numpy - числами.
+# Відмінності лише у форматуванні: ключі не сортуються, не-ASCII символи не
+# екрануються (відповідь і так у UTF-8).
+
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # необов'язкова залежність
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Провайдер на orjson; типи, яких orjson не знає, перетворює як DefaultJSONProvider."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+    @staticmethod
+    def _default(o):
+        # Підкласи float (напр. numpy.float64 після round) orjson сам не серіалізує
+        if isinstance(o, float):
+            return float(o)
+        return DefaultJSONProvider.default(o)
+
+    def _dumps_bytes(self, obj, indent=False):
+        options = self.options | orjson.OPT_INDENT_2 if indent else self.options
+        return orjson.dumps(obj, default=self._default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        # Параметри stdlib (ensure_ascii, sort_keys, ...) не мають сенсу для orjson
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is None and self._app.debug or self.compact is False
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+PROVIDERS = {
+    'stdlib': DefaultJSONProvider,
+    'orjson': OrjsonProvider
+}
+
+
+def provider_class(name):
+    """Клас провайдера для значення JSON_PROVIDER."""
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name not in PROVIDERS:
+        raise ValueError(f'Unknown JSON_PROVIDER {name!r} (use auto, orjson or stdlib)')
+    if name == 'orjson' and orjson is None:
+        logger.warning('JSON_PROVIDER is orjson, but the package is not installed; using the stdlib encoder')
+        name = 'stdlib'
+    return PROVIDERS[name]
+
+
+def init_app(app):
+    """Встановлює JSON-провайдер з JSON_PROVIDER."""
+    app.json = provider_class(app.config['JSON_PROVIDER'])(app)
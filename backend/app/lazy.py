@@ -0,0 +1,38 @@
+# Відкладений імпорт важких залежностей
+#
+# numpy потрібен лише оптимізатору маршруту та дорожньому графу, а його
+# імпорт - помітна частина старту процесу (десятки мс і ~12 МБ пам'яті). Для
+# CLI-команд, процесів пулів (security.py, jobs.py) і waitress це зайве:
+# модуль імпортується під час першого звернення до його атрибута.
+#
+# gunicorn з preload_app навпаки імпортує всі такі модулі в master-процесі
+# (load_all, див. gunicorn.conf.py): воркери отримують їх уже готовими і
+# ділять сторінки пам'яті з master (copy-on-write).
+
+import importlib
+
+# Назви модулів, оголошених через LazyModule
+_NAMES = set()
+
+
+class LazyModule:
+    """Замінник модуля: `np = LazyModule('numpy')` замість `import numpy as np`."""
+
+    def __init__(self, name):
+        self._name = name
+        _NAMES.add(name)
+
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self._name), attr)
+        # Наступні звернення - звичайний атрибут екземпляра, без __getattr__
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        return f'<LazyModule {self._name}>'
+
+
+def load_all():
+    """Імпортує всі відкладені модулі (перед fork воркерів)."""
+    for name in sorted(_NAMES):
+        importlib.import_module(name)
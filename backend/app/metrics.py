@@ -0,0 +1,225 @@
+# Метрики продуктивності запитів
+#
+# Для кожного запиту рахуються тривалість, кількість SQL-запитів і сумарний
+# час у БД (через події SQLAlchemy engine). Дані накопичуються в гістограмах
+# за роутом і віддаються у текстовому форматі Prometheus на /api/metrics, а
+# для окремого запиту - у заголовку Server-Timing. Повільні запити, повільні
+# SQL та ймовірні N+1 (один і той самий SQL багато разів за запит) пишуться в лог.
+#
+# Якщо METRICS_ENABLED вимкнено, init_app нічого не реєструє - накладних
+# витрат немає. Метрики зберігаються в пам'яті процесу: кожен воркер gunicorn
+# віддає власні значення.
+
+import logging
+import threading
+import time
+from collections import Counter
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestMetrics:
+    """Дані одного запиту (зберігаються в g)."""
+
+    __slots__ = ('started', 'status', 'sql_count', 'sql_time', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class _Registry:
+    """Накопичені метрики процесу."""
+
+    def __init__(self, config):
+        self.buckets = tuple(config['METRICS_BUCKETS'])
+        self.slow_request = config['METRICS_SLOW_REQUEST_MS'] / 1000.0
+        self.slow_query = config['METRICS_SLOW_QUERY_MS'] / 1000.0
+        self.n_plus_one = config['METRICS_N_PLUS_ONE_THRESHOLD']
+        self.token = config['METRICS_TOKEN']
+        self.lock = threading.Lock()
+        self.latency = {}  # (endpoint, method, status) -> _Histogram
+        self.sql_count = Counter()  # endpoint -> кількість SQL
+        self.sql_time = Counter()  # endpoint -> секунд у БД
+        self.slow_requests = Counter()
+        self.slow_queries = Counter()
+        self.n_plus_one_requests = Counter()
+
+    def record(self, endpoint, method, status, duration, metrics, repeated):
+        key = (endpoint, method, status)
+        with self.lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = _Histogram(self.buckets)
+            histogram.observe(duration)
+            self.sql_count[endpoint] += metrics.sql_count
+            self.sql_time[endpoint] += metrics.sql_time
+            if duration >= self.slow_request:
+                self.slow_requests[endpoint] += 1
+            if repeated:
+                self.n_plus_one_requests[endpoint] += 1
+
+    def count_slow_query(self, endpoint):
+        with self.lock:
+            self.slow_queries[endpoint] += 1
+
+    def render(self):
+        """Метрики у текстовому форматі Prometheus (exposition format 0.0.4)."""
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by route.',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        with self.lock:
+            for (endpoint, method, status), histogram in sorted(self.latency.items()):
+                labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram.total:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {histogram.count}')
+
+            for name, help_text, values in (
+                ('db_statements_total', 'SQL statements executed, by route.', self.sql_count),
+                ('db_time_seconds_total', 'Time spent in SQL statements, by route.', self.sql_time),
+                ('http_slow_requests_total', 'Requests slower than METRICS_SLOW_REQUEST_MS.', self.slow_requests),
+                ('db_slow_queries_total', 'SQL statements slower than METRICS_SLOW_QUERY_MS.', self.slow_queries),
+                ('db_n_plus_one_requests_total', 'Requests that repeated one SQL statement '
+                                                 'at least METRICS_N_PLUS_ONE_THRESHOLD times.',
+                 self.n_plus_one_requests)
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{name}{{endpoint="{endpoint}"}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+def _endpoint():
+    # Невідомі URL (404) групуємо, щоб не роздувати кількість серій
+    return request.endpoint or 'unmatched'
+
+
+# ------------------------------------------------------
+# Хуки запиту
+# ------------------------------------------------------
+
+def _before_request():
+    g._metrics = _RequestMetrics()
+
+
+def _after_request(response):
+    metrics = g.get('_metrics')
+    if metrics is not None:
+        metrics.status = response.status_code
+        elapsed_ms = (time.perf_counter() - metrics.started) * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={elapsed_ms:.1f}, db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.sql_count} queries"'
+        )
+    return response
+
+
+def _teardown_request(exc):
+    # Для потокових відповідей викликається після відправки тіла, тож
+    # тривалість і SQL враховують увесь запит
+    metrics = g.pop('_metrics', None)
+    if metrics is None or request.endpoint == 'metrics':
+        return
+    registry = current_app.extensions['metrics']
+    duration = time.perf_counter() - metrics.started
+    endpoint = _endpoint()
+    status = metrics.status or 500
+
+    # N+1 - однаковий SELECT у циклі (ліниве завантаження зв'язків тощо);
+    # повторні INSERT пакетних операцій сюди не потрапляють
+    repeated = [(sql, n) for sql, n in metrics.statements.items()
+                if n >= registry.n_plus_one and sql.lstrip()[:6].upper() == 'SELECT']
+    registry.record(endpoint, request.method, status, duration, metrics, bool(repeated))
+
+    if duration >= registry.slow_request:
+        logger.warning('Slow request %s %s (%s): %.0f ms, %d SQL statements, %.0f ms in SQL',
+                       request.method, request.path, endpoint, duration * 1000,
+                       metrics.sql_count, metrics.sql_time * 1000)
+    for sql, n in repeated:
+        logger.warning('Possible N+1 in %s: statement executed %d times: %s',
+                       endpoint, n, ' '.join(sql.split())[:300])
+
+
+# ------------------------------------------------------
+# Події SQLAlchemy
+# ------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not has_request_context():
+        return
+    metrics = g.get('_metrics')
+    if metrics is None:
+        return
+    elapsed = time.perf_counter() - context._metrics_started
+    metrics.sql_count += 1
+    metrics.sql_time += elapsed
+    metrics.statements[statement] += 1
+
+    registry = current_app.extensions['metrics']
+    if elapsed >= registry.slow_query:
+        registry.count_slow_query(_endpoint())
+        logger.warning('Slow query in %s: %.0f ms: %s',
+                       _endpoint(), elapsed * 1000, ' '.join(statement.split())[:300])
+
+
+# ------------------------------------------------------
+# Ендпоінт /api/metrics
+# ------------------------------------------------------
+
+def _metrics_view():
+    registry = current_app.extensions['metrics']
+    if registry.token and request.headers.get('Authorization') != f'Bearer {registry.token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_app(app):
+    """Вмикає метрики, якщо METRICS_ENABLED. Викликається в контексті додатку."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.extensions['metrics'] = _Registry(app.config)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    for engine in db.engines.values():
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.add_url_rule('/api/metrics', 'metrics', _metrics_view)
@@ -1,18 +1,24 @@
 # Тут описуємо структуру бази даних
 
-from app import db, login_manager
-from werkzeug.security import generate_password_hash, check_password_hash
+from app import db
 from flask_login import UserMixin
+from sqlalchemy import case, insert, select, update
+from . import security
 import json  # знадобиться для to_dict
 
+# Крок між сусідніми order_index. Завдяки "проміжкам" вставка чи переміщення
+# пункту змінює лише один рядок; перенумерація всієї подорожі потрібна
+# тільки тоді, коли проміжок між сусідами вичерпано.
+ORDER_GAP = 1024
 
-@login_manager.user_loader
-def load_user(user_id):
+
+def rows_to_dicts(result):
     """
-    Flask-Login вимагає цю функцію, щоб знати, як завантажити
-    користувача з сесії за його ID.
+    Рядки Core-запиту як словники (ключі - назви колонок). Для читання:
+    без створення ORM-об'єктів, identity map та відстеження атрибутів.
     """
-    return User.query.get(int(user_id))
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
 
 
 class User(UserMixin, db.Model):
@@ -24,21 +30,52 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(64), index=True, unique=True, nullable=False)
     # Змінено на nullable=True, щоб дозволити міграцію на існуючих даних
     email = db.Column(db.String(120), index=True, unique=True, nullable=True)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
 
     # Поле для реалізації вимоги про "адміністративних користувачів"
     is_admin = db.Column(db.Boolean, default=False)
 
+    # Агрегована версія всіх подорожей користувача (для ETag списку подорожей)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Кількість подорожей (оновлюється разом з data_version, див. bump_version)
+    trip_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+
+    # Найбільший seq видаленого при ущільненні надгробка: курсор синхронізації,
+    # менший за нього, застарів (див. app/sync.py)
+    sync_horizon = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
     # Зв'язок з подорожами (один користувач - багато подорожей)
     trips = db.relationship('Trip', backref='author', lazy='dynamic', cascade="all, delete-orphan")
 
+    # Фільтр адмін-списку за is_admin з курсором за id
+    __table_args__ = (
+        db.Index('ix_user_is_admin_id', 'is_admin', 'id'),
+    )
+
     def set_password(self, password):
-        """Створює хеш пароля."""
-        self.password_hash = generate_password_hash(password)
+        """Створює хеш пароля (у пулі процесів, див. app/security.py)."""
+        self.password_hash = security.hash_password(password)
 
     def check_password(self, password):
         """Перевіряє хеш пароля."""
-        return check_password_hash(self.password_hash, password)
+        return security.verify_password(self.password_hash, password)
+
+    @staticmethod
+    def bump_version(user_id, trip_delta=0):
+        """
+        Позначає, що подорожі користувача змінились.
+        'trip_delta' - на скільки змінилась кількість подорожей.
+        """
+        values = {'data_version': User.data_version + 1}
+        if trip_delta:
+            values['trip_count'] = User.trip_count + trip_delta
+        db.session.execute(
+            update(User).where(User.id == user_id)
+            .values(**values)
+            # data_version не входить у знімок користувача (див. app/usercache.py)
+            .execution_options(synchronize_session=False, preserves_user_cache=True)
+        )
 
     def to_dict(self):
         """Повертає дані користувача у форматі JSON."""
@@ -63,6 +100,14 @@ class Trip(db.Model):
     # Зв'язок з користувачем (багато подорожей - один користувач)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Лічильник змін подорожі та її пунктів призначення (для ETag)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Останній запис журналу змін для цього рядка і час зміни (unix).
+    # Заповнюють тригери БД (див. app/sync.py), ORM їх не записує
+    change_seq = db.Column(db.BigInteger, nullable=True)
+    updated_at = db.Column(db.Float, nullable=True)
+
     # Зв'язок з пунктами призначення
     destinations = db.relationship(
         'Destination',
@@ -72,17 +117,47 @@ class Trip(db.Model):
         order_by='Destination.order_index'  # Порядок за замовчуванням
     )
 
-    def to_dict(self):
-        """Повертає дані подорожі у форматі JSON."""
-        # Отримуємо пункти призначення вже у правильному порядку
-        dests_list = [dest.to_dict() for dest in self.destinations]
+    # Список подорожей користувача (у т.ч. курсорна пагінація за id)
+    # та перевірки власника обслуговуються одним індексом
+    __table_args__ = (
+        db.Index('ix_trip_user_id_id', 'user_id', 'id'),
+    )
 
-        return {
+    def to_dict(self, destinations=None, include_destinations=True):
+        """
+        Повертає дані подорожі у форматі JSON.
+        Якщо 'destinations' (об'єкти Destination) передано, вони
+        використовуються замість окремого запиту до БД.
+        """
+        data = {
             'id': self.id,
             'name': self.name,
-            'user_id': self.user_id,
-            'destinations': dests_list
+            'user_id': self.user_id
         }
+        if include_destinations:
+            if destinations is None:
+                # Отримуємо пункти призначення вже у правильному порядку
+                destinations = self.destinations
+            data['destinations'] = [dest.to_dict() for dest in destinations]
+        return data
+
+    @staticmethod
+    def select_dicts():
+        """SELECT полів to_dict() без пунктів призначення (див. rows_to_dicts)."""
+        return select(Trip.id, Trip.name, Trip.user_id)
+
+    @staticmethod
+    def bump_version(trip_id, user_id):
+        """
+        Збільшує версію подорожі та агреговану версію її власника.
+        Викликається при кожній зміні подорожі або її пунктів призначення.
+        """
+        db.session.execute(
+            update(Trip).where(Trip.id == trip_id)
+            .values(version=Trip.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        User.bump_version(user_id)
 
     def __repr__(self):
         return f'<Trip {self.name}>'
@@ -108,6 +183,16 @@ class Destination(db.Model):
     # Зв'язок з подорожжю
     trip_id = db.Column(db.Integer, db.ForeignKey('trip.id'), nullable=False)
 
+    # Як і в Trip, заповнюють тригери БД (див. app/sync.py)
+    change_seq = db.Column(db.BigInteger, nullable=True)
+    updated_at = db.Column(db.Float, nullable=True)
+
+    # Пункти подорожі у порядку маршруту, max(order_index) та пошук сусідів
+    # при переміщенні читаються з індексу без сортування
+    __table_args__ = (
+        db.Index('ix_destination_trip_id_order_index', 'trip_id', 'order_index'),
+    )
+
     def to_dict(self):
         """Повертає дані пункту призначення у форматі JSON."""
         return {
@@ -122,5 +207,274 @@ class Destination(db.Model):
             'order_index': self.order_index
         }
 
+    @staticmethod
+    def select_dicts():
+        """SELECT полів to_dict() у порядку маршруту (див. rows_to_dicts)."""
+        return (
+            select(Destination.id, Destination.name, Destination.address, Destination.lat, Destination.lng,
+                   Destination.trip_id, Destination.visit_date, Destination.notes, Destination.order_index)
+            .order_by(Destination.trip_id, Destination.order_index, Destination.id)
+        )
+
+    @staticmethod
+    def dicts_by_trip(stmt):
+        """
+        Групує за trip_id словники пунктів із запиту select_dicts().
+        Один SQL-запит замість окремого SELECT для кожної подорожі.
+        """
+        grouped = {}
+        for data in rows_to_dicts(db.session.execute(stmt)):
+            grouped.setdefault(data['trip_id'], []).append(data)
+        return grouped
+
+    @staticmethod
+    def next_order_index(trip_id):
+        """order_index для нового пункту в кінці подорожі."""
+        max_index = db.session.query(db.func.max(Destination.order_index)).filter_by(trip_id=trip_id).scalar()
+        return (max_index or 0) + ORDER_GAP
+
+    @staticmethod
+    def bulk_reorder(trip_id, destination_ids):
+        """
+        Встановлює порядок пунктів одним UPDATE ... CASE.
+        Оновлюються лише пункти цієї подорожі; повертає кількість оновлених рядків.
+        """
+        if not destination_ids:
+            return 0
+        new_indexes = {dest_id: (i + 1) * ORDER_GAP for i, dest_id in enumerate(destination_ids)}
+        stmt = (
+            update(Destination)
+            .where(Destination.trip_id == trip_id, Destination.id.in_(destination_ids))
+            .values(order_index=case(new_indexes, value=Destination.id))
+            .execution_options(synchronize_session=False)
+        )
+        return db.session.execute(stmt).rowcount
+
+    @staticmethod
+    def rebalance(trip_id):
+        """Перенумеровує пункти подорожі з кроком ORDER_GAP, зберігаючи порядок."""
+        ids = [row.id for row in db.session.query(Destination.id)
+               .filter_by(trip_id=trip_id)
+               .order_by(Destination.order_index, Destination.id)]
+        Destination.bulk_reorder(trip_id, ids)
+
+    def _neighbour_index(self, pivot, below):
+        """
+        order_index найближчого сусіда знизу/зверху від пункту 'pivot'
+        (без цього пункту та самого 'pivot'). Рівні ключі теж вважаються
+        сусідами, щоб дублікати призводили до перенумерації.
+        """
+        query = db.session.query(
+            db.func.max(Destination.order_index) if below else db.func.min(Destination.order_index)
+        ).filter(Destination.trip_id == self.trip_id, Destination.id.notin_([self.id, pivot.id]))
+        if below:
+            query = query.filter(Destination.order_index <= pivot.order_index)
+        else:
+            query = query.filter(Destination.order_index >= pivot.order_index)
+        return query.scalar()
+
+    def move(self, before=None, after=None):
+        """
+        Переміщує пункт перед 'before' або після 'after' (обидва - Destination
+        цієї ж подорожі). Зазвичай змінює лише order_index цього пункту.
+        """
+        for _ in range(2):
+            if after is not None:
+                low = after.order_index
+                high = self._neighbour_index(after, below=False)
+                if high is None:
+                    self.order_index = low + ORDER_GAP
+                    return
+            else:
+                high = before.order_index
+                low = self._neighbour_index(before, below=True)
+                if low is None:
+                    self.order_index = high - ORDER_GAP
+                    return
+            if high - low >= 2:
+                self.order_index = (low + high) // 2
+                return
+            # Проміжок вичерпано - перенумеровуємо подорож і пробуємо ще раз
+            Destination.rebalance(self.trip_id)
+            db.session.expire_all()
+        raise RuntimeError('Could not find a free order_index after rebalancing')
+
+    def __repr__(self):
+        return f'<Destination {self.name}>'
+
+class UsageCounter(db.Model):
+    """
+    Загальні лічильники для адмін-статистики ('users', 'trips', 'destinations').
+    Змінюються інкрементно в тих самих транзакціях, що й дані, тож
+    статистика не потребує COUNT(*) по великих таблицях.
+    """
+    __tablename__ = 'usage_counter'
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @staticmethod
+    def add(name, delta):
+        """Атомарно додає delta до лічильника (створює його, якщо ще немає)."""
+        if not delta:
+            return
+        result = db.session.execute(
+            update(UsageCounter).where(UsageCounter.name == name)
+            .values(value=UsageCounter.value + delta)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(UsageCounter).values(name=name, value=delta))
+
+    @staticmethod
+    def get_values(*names):
+        """Значення лічильників {назва: значення}; відсутні лічильники - 0."""
+        rows = dict(
+            db.session.query(UsageCounter.name, UsageCounter.value)
+            .filter(UsageCounter.name.in_(names))
+            .all()
+        )
+        return {name: rows.get(name, 0) for name in names}
+
+    def __repr__(self):
+        return f'<UsageCounter {self.name}={self.value}>'
+
+
+class ChangeLog(db.Model):
+    """
+    Журнал змін подорожей і пунктів для дельта-синхронізації (див. app/sync.py).
+    На кожен об'єкт користувача - один запис з номером останньої зміни:
+    тригери БД видаляють попередній запис і додають новий. Запис з
+    deleted=True - надгробок видаленого об'єкта.
+    """
+    __tablename__ = 'change_log'
+
+    # Монотонний номер зміни (AUTOINCREMENT у SQLite: номери не повторюються після видалень)
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(16), nullable=False)  # 'trip' або 'destination'
+    entity_id = db.Column(db.Integer, nullable=False)
+    trip_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        # Зміни користувача після курсора: user_id = ? AND seq > ? ORDER BY seq
+        db.Index('ix_change_log_user_id_seq', 'user_id', 'seq'),
+        # Попередній запис об'єкта, який замінює тригер
+        db.Index('ix_change_log_user_id_entity_entity_id', 'user_id', 'entity', 'entity_id'),
+        # Застарілі надгробки для ущільнення
+        db.Index('ix_change_log_deleted_changed_at', 'deleted', 'changed_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return f'<ChangeLog {self.seq} {self.entity} {self.entity_id}>'
+
+
+class GeocodeCache(db.Model):
+    """
+    Постійний кеш відповідей геокодера (Nominatim).
+    Ключ - хеш нормалізованого запиту, 'expires_at' - unix-час застарівання.
+    """
+    key = db.Column(db.String(64), primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<GeocodeCache {self.key}>'
+
+
+class Poi(db.Model):
+    """
+    Точка інтересу з локального OSM-екстракту.
+    Для ways/relations зберігається заздалегідь обчислений центроїд.
+    'cell' - номер клітинки регулярної сітки (див. app/poi.py), індекс
+    (kind, cell) дозволяє шукати точки в радіусі без повного сканування.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    osm_type = db.Column(db.String(8), nullable=False)  # node / way / relation
+    osm_id = db.Column(db.BigInteger, nullable=False)
+    kind = db.Column(db.String(64), nullable=False)  # значення amenity / tourism / ...
+    name = db.Column(db.String(255), nullable=True)
+    lat = db.Column(db.Float, nullable=False)
+    lng = db.Column(db.Float, nullable=False)
+    cell = db.Column(db.BigInteger, nullable=False)
+    tags = db.Column(db.Text, nullable=True)  # JSON
+
+    __table_args__ = (
+        db.Index('ix_poi_kind_cell', 'kind', 'cell'),
+    )
+
+    def to_dict(self):
+        """Повертає POI у форматі, близькому до елементів Overpass API."""
+        return {
+            'id': self.id,
+            'type': self.osm_type,
+            'osm_id': self.osm_id,
+            'kind': self.kind,
+            'lat': self.lat,
+            'lon': self.lng,
+            'tags': json.loads(self.tags) if self.tags else {}
+        }
+
+    def __repr__(self):
+        return f'<Poi {self.kind} {self.name}>'
+
+
+class Job(db.Model):
+    """
+    Фонова задача (див. app/jobs.py).
+    'run_after' - unix-час, з якого задачу можна взяти: для 'queued' - час
+    наступної спроби (з урахуванням backoff), для 'running' - кінець оренди
+    воркера. Задача 'running' з минулим run_after - це задача зупиненого
+    воркера, яку може перехопити інший. Обидва випадки обслуговує один індекс.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(32), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    params = db.Column(db.Text, nullable=False)  # JSON
+    # Вхідні дані задачі (напр. файл імпорту); читається лише обробником
+    payload = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    # JSON: проміжний результат під час виконання (з нього задача продовжується після перезапуску), потім остаточний
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    progress = db.Column(db.BigInteger, nullable=False, default=0)
+    progress_total = db.Column(db.BigInteger, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    idempotency_key = db.Column(db.String(64), nullable=True)
+    lease_owner = db.Column(db.String(64), nullable=True)
+    run_after = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.Float, nullable=False)
+    started_at = db.Column(db.Float, nullable=True)
+    finished_at = db.Column(db.Float, nullable=True, index=True)
+
+    __table_args__ = (
+        # Вибір наступної задачі: status IN (...) AND run_after <= now
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),
+        # Повторний запит з тим самим Idempotency-Key повертає наявну задачу
+        db.Index('ix_job_user_id_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
+
+    def to_dict(self):
+        """Повертає стан задачі у форматі JSON."""
+        return {
+            'id': self.id,
+            'type': self.kind,
+            'status': self.status,
+            'progress': {'done': self.progress, 'total': self.progress_total},
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
     def __repr__(self):
-        return f'<Destination {self.name}>'
\ No newline at end of file
+        return f'<Job {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,170 @@
+# Локальна оптимізація порядку пунктів призначення (задача комівояжера)
+#
+# Матриця відстаней рахується векторизовано через NumPy (формула гаверсинуса),
+# початковий маршрут будується жадібно (найближчий сусід), після чого
+# покращується локальними пошуками 2-opt та Or-opt у межах бюджету часу.
+
+import time
+
+from .lazy import LazyModule
+
+# numpy імпортується з першим викликом (див. lazy.py)
+np = LazyModule('numpy')
+
+# Середній радіус Землі в кілометрах
+EARTH_RADIUS_KM = 6371.0088
+
+# Мінімальне покращення, яке вважаємо значущим (захист від зациклення через похибки float)
+_EPS = 1e-9
+
+
+def haversine_matrix(lats, lngs):
+    """Повертає матрицю N x N відстаней (км) між усіма парами точок."""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def path_length(dist, order):
+    """Довжина відкритого маршруту за заданим порядком вузлів."""
+    order = np.asarray(order)
+    if len(order) < 2:
+        return 0.0
+    return float(dist[order[:-1], order[1:]].sum())
+
+
+def _nearest_neighbour(dist, start, end):
+    """Жадібний маршрут від 'start' до 'end' через усі інші вузли."""
+    size = len(dist)
+    visited = np.zeros(size, dtype=bool)
+    visited[start] = True
+    visited[end] = True
+    route = [start]
+    current = start
+    for _ in range(size - 2):
+        row = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        route.append(current)
+    route.append(end)
+    return np.array(route, dtype=np.intp)
+
+
+def _two_opt_pass(dist, route, deadline):
+    """
+    Один прохід 2-opt з фіксованими кінцями маршруту.
+    Для кожного i найкращий j шукається векторизовано.
+    """
+    improved = False
+    m = len(route)
+    for i in range(1, m - 2):
+        if time.perf_counter() > deadline:
+            break
+        a, b = route[i - 1], route[i]
+        js = np.arange(i + 1, m - 1)
+        c, d = route[js], route[js + 1]
+        delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+        k = int(np.argmin(delta))
+        if delta[k] < -_EPS:
+            j = js[k]
+            route[i:j + 1] = route[i:j + 1][::-1]
+            improved = True
+    return improved
+
+
+def _or_opt_pass(dist, route, deadline, max_segment=3):
+    """
+    Один прохід Or-opt: переносить відрізки довжиною 1..max_segment
+    на найкраще місце (в тому числі у зворотному напрямку).
+    """
+    improved = False
+    for seg_len in range(1, max_segment + 1):
+        i = 1
+        while i + seg_len < len(route):
+            if time.perf_counter() > deadline:
+                return improved
+            m = len(route)
+            first, last = route[i], route[i + seg_len - 1]
+            prev, nxt = route[i - 1], route[i + seg_len]
+            removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+
+            # Ребра (p, p + 1), які не торкаються відрізка
+            ps = np.arange(0, m - 1)
+            ps = ps[(ps < i - 1) | (ps > i + seg_len - 1)]
+            if len(ps) == 0:
+                i += 1
+                continue
+            u, v = route[ps], route[ps + 1]
+            base = dist[u, v]
+            forward = dist[u, first] + dist[last, v] - base
+            backward = dist[u, last] + dist[first, v] - base
+            best_forward, best_backward = int(np.argmin(forward)), int(np.argmin(backward))
+
+            if forward[best_forward] <= backward[best_backward]:
+                cost, p, reverse = forward[best_forward], ps[best_forward], False
+            else:
+                cost, p, reverse = backward[best_backward], ps[best_backward], True
+
+            if cost - removal_gain < -_EPS:
+                segment = route[i:i + seg_len].copy()
+                if reverse:
+                    segment = segment[::-1]
+                rest = np.concatenate((route[:i], route[i + seg_len:]))
+                # Позиція вузла route[p] у маршруті без відрізка
+                insert_at = p + 1 if p < i else p + 1 - seg_len
+                route[:] = np.concatenate((rest[:insert_at], segment, rest[insert_at:]))
+                improved = True
+            i += 1
+    return improved
+
+
+def optimize_order(dist, start=None, end=None, time_budget=0.3):
+    """
+    Повертає (порядок індексів, довжина маршруту) для відкритого маршруту.
+
+    dist        - симетрична матриця відстаней N x N;
+    start, end  - індекси фіксованих першої/останньої точок (None - вільні);
+                  якщо start == end, будується кільцевий маршрут;
+    time_budget - максимальний час покращення (секунди).
+    """
+    deadline = time.perf_counter() + time_budget
+    dist = np.asarray(dist, dtype=np.float64)
+    n = len(dist)
+    if n == 0:
+        return [], 0.0
+
+    # Вільні кінці моделюємо фіктивними вузлами з нульовими відстанями,
+    # тож алгоритм завжди працює з маршрутом з фіксованими кінцями
+    round_trip = start is not None and end == start
+    size = n + (start is None) + (end is None or round_trip)
+    aug = np.zeros((size, size), dtype=np.float64)
+    aug[:n, :n] = dist
+    extra = n
+    if start is None:
+        start = extra
+        extra += 1
+    if end is None:
+        end = extra
+    elif round_trip:
+        # Кільцевий маршрут: кінцева точка - копія початкової
+        aug[extra, :n] = dist[start]
+        aug[:n, extra] = dist[start]
+        end = extra
+
+    if size <= 3:
+        route = np.array([start] + [k for k in range(size) if k not in (start, end)] + [end])
+    else:
+        route = _nearest_neighbour(aug, start, end)
+        while time.perf_counter() < deadline:
+            improved = _two_opt_pass(aug, route, deadline)
+            improved = _or_opt_pass(aug, route, deadline) or improved
+            if not improved:
+                break
+
+    # Фіктивні вузли та копію початкової точки з маршруту прибираємо
+    order = [int(k) for k in route if k < n]
+    closed = order + [order[0]] if round_trip else order
+    return order, path_length(dist, closed)
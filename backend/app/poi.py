@@ -0,0 +1,289 @@
+# Локальний індекс точок інтересу (POI) замість живих запитів до Overpass API
+#
+# Точки з OSM-екстракту (GeoJSON/NDJSON або PBF) завантажуються в таблицю poi.
+# Для просторового пошуку використовується регулярна сітка: кожна точка
+# отримує номер клітинки, а запит у радіусі перетворюється на невеликий
+# список клітинок, який обслуговує індекс (kind, cell). Біля полюсів коло
+# охоплює тисячі клітинок - тоді запит іде діапазоном номерів (смуга рядків
+# сітки), який той самий індекс обслуговує як range scan. Така схема
+# однаково працює на SQLite і на PostgreSQL.
+
+import json
+import math
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import insert
+
+from . import db
+from .importers import iter_json_array
+from .models import Poi
+
+# Теги OSM, значення яких вважаємо типом POI (у порядку пріоритету)
+KIND_KEYS = ('amenity', 'tourism', 'shop', 'leisure', 'historic')
+
+# Середній радіус Землі - той самий для відстаней і вікна клітинок, тож вікно покриває все коло
+EARTH_RADIUS_M = 6371008.8
+
+# Більше клітинок не перелічуємо в IN (...) - запит іде діапазоном рядків сітки
+MAX_LISTED_CELLS = 1024
+
+
+# ------------------------------------------------------
+# Сітка
+# ------------------------------------------------------
+
+def _grid(cell_deg):
+    columns = int(math.ceil(360.0 / cell_deg))
+    rows = int(math.ceil(180.0 / cell_deg))
+    return columns, rows
+
+
+def cell_of(lat, lng, cell_deg):
+    """Номер клітинки сітки для точки."""
+    columns, rows = _grid(cell_deg)
+    row = min(int((lat + 90.0) / cell_deg), rows - 1)
+    column = int((lng + 180.0) / cell_deg) % columns
+    return row * columns + column
+
+
+def _window(lat, lng, radius_m, cell_deg):
+    """
+    Рядки сітки (row_min, row_max) і колонки, які перетинає коло радіуса
+    radius_m; колонки - None, якщо коло охоплює всю широтну смугу.
+    """
+    columns, rows = _grid(cell_deg)
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    row_min = max(int((lat - dlat + 90.0) / cell_deg), 0)
+    row_max = min(int((lat + dlat + 90.0) / cell_deg), rows - 1)
+    # Найбільше відхилення довготи точок кола; якщо коло містить полюс
+    # (sin(r/R) >= cos(lat)), у ньому є точки з будь-якою довготою
+    spread = math.sin(min(radius_m / EARTH_RADIUS_M, math.pi / 2)) / max(math.cos(math.radians(lat)), 1e-12)
+    if spread >= 1.0:
+        return row_min, row_max, None
+    dlng = math.degrees(math.asin(spread))
+    col_min = int(math.floor((lng - dlng + 180.0) / cell_deg))
+    col_max = int(math.floor((lng + dlng + 180.0) / cell_deg))
+    if col_max - col_min + 1 >= columns:
+        return row_min, row_max, None
+    return row_min, row_max, range(col_min, col_max + 1)
+
+
+def cells_around(lat, lng, radius_m, cell_deg):
+    """Усі клітинки, які перетинає коло радіуса radius_m."""
+    columns, _ = _grid(cell_deg)
+    row_min, row_max, cols = _window(lat, lng, radius_m, cell_deg)
+    # Перехід через антимеридіан обробляємо за модулем кількості колонок
+    cols = range(columns) if cols is None else {c % columns for c in cols}
+    return [row * columns + col for row in range(row_min, row_max + 1) for col in cols]
+
+
+def cell_filter(lat, lng, radius_m, cell_deg):
+    """
+    Умова на Poi.cell для кола: список клітинок або, якщо їх забагато (біля
+    полюсів), діапазон номерів, що покриває всі рядки сітки від row_min до row_max.
+    """
+    columns, _ = _grid(cell_deg)
+    row_min, row_max, cols = _window(lat, lng, radius_m, cell_deg)
+    count = (row_max - row_min + 1) * (columns if cols is None else len(cols))
+    if count > MAX_LISTED_CELLS:
+        return Poi.cell.between(row_min * columns, (row_max + 1) * columns - 1)
+    return Poi.cell.in_(cells_around(lat, lng, radius_m, cell_deg))
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def find_nearby(lat, lng, radius_m, kind, limit):
+    """POI заданого типу в радіусі radius_m, від найближчого до найдальшого."""
+    cell_deg = current_app.config['POI_CELL_DEG']
+    candidates = Poi.query.filter(Poi.kind == kind, cell_filter(lat, lng, radius_m, cell_deg))
+    found = []
+    for poi in candidates:
+        distance = haversine_m(lat, lng, poi.lat, poi.lng)
+        if distance <= radius_m:
+            found.append((distance, poi))
+    found.sort(key=lambda item: item[0])
+    results = []
+    for distance, poi in found[:limit]:
+        data = poi.to_dict()
+        data['distance_m'] = round(distance, 1)
+        results.append(data)
+    return results
+
+
+# ------------------------------------------------------
+# Геометрія
+# ------------------------------------------------------
+
+def _ring_centroid(ring):
+    """Центроїд полігона (формула шнурування); для вироджених - середнє вершин."""
+    area = cx = cy = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        cross = x1 * y2 - x2 * y1
+        area += cross
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+    if abs(area) < 1e-12:
+        return _mean(ring)
+    return cx / (3 * area), cy / (3 * area)
+
+
+def _mean(points):
+    return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+
+def centroid(geometry):
+    """(lng, lat) представницької точки GeoJSON-геометрії."""
+    kind = geometry.get('type')
+    coords = geometry.get('coordinates')
+    if not coords:
+        return None
+    if kind == 'Point':
+        return coords[0], coords[1]
+    if kind in ('LineString', 'MultiPoint'):
+        return _mean(coords)
+    if kind == 'Polygon':
+        return _ring_centroid([tuple(p[:2]) for p in coords[0]])
+    if kind == 'MultiPolygon':
+        # Центроїд найбільшого (за кількістю вершин) зовнішнього кільця
+        outer = max((polygon[0] for polygon in coords), key=len)
+        return _ring_centroid([tuple(p[:2]) for p in outer])
+    if kind == 'MultiLineString':
+        return _mean([p for line in coords for p in line])
+    return None
+
+
+# ------------------------------------------------------
+# Завантаження екстрактів
+# ------------------------------------------------------
+
+def _records(osm_type, osm_id, tags, lat, lng):
+    """Записи для таблиці poi (по одному на кожен тип, до якого належить об'єкт)."""
+    for key in KIND_KEYS:
+        kind = tags.get(key)
+        if kind:
+            yield {
+                'osm_type': osm_type,
+                'osm_id': osm_id,
+                'kind': kind[:64],
+                'name': (tags.get('name') or '')[:255] or None,
+                'lat': lat,
+                'lng': lng,
+                'tags': json.dumps(tags, ensure_ascii=False)
+            }
+
+
+def _parse_osm_id(properties, fallback):
+    """Ідентифікатор у форматах 'node/123', '@id', 'osm_type' + 'osm_id'."""
+    raw = properties.get('@id') or properties.get('id')
+    if isinstance(raw, str) and '/' in raw:
+        osm_type, _, number = raw.partition('/')
+        if number.isdigit():
+            return osm_type, int(number)
+    osm_type = properties.get('osm_type') or properties.get('@type') or 'node'
+    osm_id = properties.get('osm_id') or raw or fallback
+    try:
+        return str(osm_type), int(osm_id)
+    except (TypeError, ValueError):
+        return str(osm_type), fallback
+
+
+def iter_geojson_features(features):
+    """POI-записи з GeoJSON Feature (теги - у properties або properties.tags)."""
+    for number, feature in enumerate(features, start=1):
+        if not isinstance(feature, dict):
+            continue
+        properties = feature.get('properties') or {}
+        tags = properties.get('tags') if isinstance(properties.get('tags'), dict) else properties
+        tags = {str(k): str(v) for k, v in tags.items() if v is not None and not str(k).startswith('@')}
+        point = centroid(feature.get('geometry') or {})
+        if point is None:
+            continue
+        osm_type, osm_id = _parse_osm_id(properties, number)
+        yield from _records(osm_type, osm_id, tags, point[1], point[0])
+
+
+def iter_ndjson_features(stream):
+    for line in stream:
+        line = line.strip().lstrip(b'\x1e')
+        if line:
+            yield json.loads(line)
+
+
+def iter_pbf(path):
+    """POI-записи з OSM PBF (потрібен пакет 'osmium' >= 3.7)."""
+    try:
+        import osmium
+    except ImportError:
+        raise click.ClickException("Reading .pbf extracts requires the 'osmium' package (pip install osmium)")
+
+    # Локації нод потрібні для центроїдів ways, areas - для мультиполігонів
+    for obj in osmium.FileProcessor(path).with_locations().with_areas():
+        # Більшість об'єктів екстракту не є POI - відсікаємо їх до копіювання тегів
+        if not any(key in obj.tags for key in KIND_KEYS):
+            continue
+        tags = {t.k: t.v for t in obj.tags}
+        if obj.is_node():
+            yield from _records('node', obj.id, tags, obj.location.lat, obj.location.lon)
+        elif obj.is_way():
+            points = [(nd.lon, nd.lat) for nd in obj.nodes if nd.location.valid()]
+            if points:
+                lng, lat = _ring_centroid(points) if obj.is_closed() else _mean(points)
+                yield from _records('way', obj.id, tags, lat, lng)
+        elif obj.is_area() and not obj.from_way():
+            # Замкнені ways уже оброблені вище; тут - лише мультиполігони
+            rings = [[(nd.lon, nd.lat) for nd in ring] for ring in obj.outer_rings()]
+            if rings:
+                lng, lat = _ring_centroid(max(rings, key=len))
+                yield from _records('relation', obj.orig_id(), tags, lat, lng)
+
+
+def ingest(records, batch_size, cell_deg):
+    """Вставляє POI пачками (executemany); повертає кількість рядків."""
+    batch, total = [], 0
+    for record in records:
+        record['cell'] = cell_of(record['lat'], record['lng'], cell_deg)
+        batch.append(record)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(Poi), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Poi), batch)
+        total += len(batch)
+    return total
+
+
+poi_cli = AppGroup('poi', help='Local points-of-interest index.')
+
+
+@poi_cli.command('ingest')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--append', is_flag=True, help='Keep existing POIs instead of replacing them.')
+def ingest_command(path, append):
+    """Load POIs from an OSM extract (.geojson, .geojsonl/.ndjson or .pbf)."""
+    started = time.perf_counter()
+    extension = path.rsplit('.', 1)[-1].lower()
+    if not append:
+        Poi.query.delete()
+
+    if extension == 'pbf':
+        total = ingest(iter_pbf(path), current_app.config['POI_INGEST_BATCH_SIZE'], current_app.config['POI_CELL_DEG'])
+    else:
+        with open(path, 'rb') as stream:
+            if extension in ('geojsonl', 'ndjson', 'jsonl'):
+                features = iter_ndjson_features(stream)
+            else:
+                features = iter_json_array(stream, 'features')
+            total = ingest(iter_geojson_features(features),
+                           current_app.config['POI_INGEST_BATCH_SIZE'], current_app.config['POI_CELL_DEG'])
+    db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    click.echo(f'Ingested {total} POIs in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s)')
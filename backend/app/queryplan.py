@@ -0,0 +1,305 @@
+# Перевірка планів запитів (регресії індексів)
+#
+# Команда `flask check-query-plans` створює окрему тимчасову БД, проганяє на
+# ній міграції, проходить сценарієм по всіх роутах API через test client і
+# записує кожен SQL-запит. Для кожного запиту виконується EXPLAIN QUERY PLAN
+# (SQLite) або EXPLAIN (PostgreSQL); якщо в плані з'являється повне
+# сканування таблиці, команда завершується з помилкою. Той самий прогін
+# (inspect_plans) виконує tests/test_query_plans.py на тестовій БД.
+
+import os
+import re
+import shutil
+import tempfile
+
+import click
+from flask import current_app, has_request_context, request, request_started
+from sqlalchemy import event
+
+from . import db, jobs, sync
+
+# Повне сканування свідомо дозволене лише тут: {endpoint: {таблиця: причина}}
+ALLOWED_SCANS = {
+    'main.register': {'user': 'first-user EXISTS check stops at the first row'},
+    'main.admin_export': {
+        'trip': 'full backup reads every trip',
+        'destination': 'full backup reads every destination'
+    }
+}
+
+# Запити, план яких не перевіряємо (вставки без SELECT, службові команди)
+_SKIP = re.compile(r'^\s*(INSERT\s+INTO\s+\S+\s*(\(|VALUES|DEFAULT)|PRAGMA|SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)', re.I)
+
+# "SCAN t USING INDEX i" з LIMIT - це обхід індексу в потрібному порядку,
+# який зупиняється після LIMIT рядків; без LIMIT - повне сканування індексу
+_SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?"?(\w+)"?( USING (?:COVERING )?INDEX)?')
+_LIMIT = re.compile(r'\bLIMIT\b', re.I)
+_POSTGRES_SCAN = re.compile(r'\bSeq Scan on "?(\w+)"?')
+
+
+# ------------------------------------------------------
+# Сценарій
+# ------------------------------------------------------
+
+class _Client:
+    """Обгортка над test client, що перевіряє статус кожної відповіді."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __call__(self, method, url, expected, **kwargs):
+        response = self.client.open(url, method=method, **kwargs)
+        # Потокові відповіді виконують запити лише під час читання тіла
+        body = response.get_data()
+        if response.status_code != expected:
+            raise click.ClickException(
+                f'{method} {url} returned {response.status_code}, expected {expected}: {body[:200]!r}'
+            )
+        return response.get_json(silent=True)
+
+
+def run_scenario(client):
+    """Викликає кожен роут API хоча б раз (разом із гілками пагінації та ETag)."""
+    call = _Client(client)
+
+    # Автентифікація; перший користувач стає адміністратором
+    password = {'password': 'password123', 'confirmPassword': 'password123'}
+    call('POST', '/api/auth/register', 201, json={'username': 'admin', 'email': 'admin@example.com', **password})
+    call('POST', '/api/auth/logout', 200)
+    call('POST', '/api/auth/register', 201, json={'username': 'planner', 'email': 'planner@example.com', **password})
+    call('POST', '/api/auth/logout', 200)
+    call('POST', '/api/auth/login', 200, json={'username': 'admin@example.com', 'password': 'password123'})
+    call('GET', '/api/auth/status', 200)
+
+    # Подорожі та пункти призначення
+    trips = [call('POST', '/api/trips', 201, json={'name': f'Trip {n}'})['id'] for n in range(3)]
+    trip_id = trips[0]
+    dests = [
+        call('POST', f'/api/trips/{trip_id}/destinations', 201,
+             json={'name': f'Stop {n}', 'lat': 50.4 + n / 100, 'lon': 30.5 + n / 100})['id']
+        for n in range(5)
+    ]
+    csv_data = b'name,lat,lng\nImported 1,50.45,30.52\nImported 2,50.46,30.53\n'
+    call('POST', f'/api/trips/{trip_id}/destinations/import?format=csv', 201, data=csv_data)
+
+    response = client.get('/api/trips')
+    call('GET', '/api/trips', 304, headers={'If-None-Match': response.headers['ETag']})
+    response = client.get('/api/trips?limit=2')
+    call('GET', f"/api/trips?limit=2&cursor={response.headers['X-Next-Cursor']}", 200)
+    call('GET', '/api/trips?summary=1', 200)
+    response = client.get(f'/api/trips/{trip_id}')
+    call('GET', f'/api/trips/{trip_id}', 304, headers={'If-None-Match': response.headers['ETag']})
+
+    call('PATCH', f'/api/destinations/{dests[1]}', 200, json={'notes': 'Museum', 'visit_date': '2026-05-01'})
+    call('POST', f'/api/destinations/{dests[0]}/move', 200, json={'after_id': dests[2]})
+    call('POST', f'/api/destinations/{dests[4]}/move', 200, json={'before_id': dests[1]})
+    call('POST', f'/api/trips/{trip_id}/destinations/reorder', 200, json={'destination_ids': dests})
+    call('POST', f'/api/trips/{trip_id}/optimize', 200, json={'time_budget_ms': 10})
+    call('POST', f'/api/trips/{trip_id}/plan-days?preview=1', 200, json={'days': 2, 'time_budget_ms': 10})
+    call('POST', f'/api/trips/{trip_id}/plan-days', 200,
+         json={'day_minutes': 240, 'start_date': '2026-05-01', 'time_budget_ms': 10})
+    call('POST', '/api/batch', 200, json={'operations': [
+        {'op': 'create_trip', 'name': 'Batch trip'},
+        {'op': 'create_destination', 'trip_id': '$0', 'name': 'Batch 1', 'lat': 48.62, 'lon': 22.29},
+        {'op': 'create_destination', 'trip_id': '$0', 'name': 'Batch 2', 'lat': 48.63, 'lon': 22.30},
+        {'op': 'move_destination', 'id': '$2', 'before_id': '$1'},
+        {'op': 'update_destination', 'id': dests[1], 'notes': 'Batched note'},
+        {'op': 'reorder_destinations', 'trip_id': trip_id, 'destination_ids': dests[::-1]},
+        {'op': 'delete_destination', 'id': '$1'}
+    ]})
+    call('DELETE', f'/api/destinations/{dests[3]}', 204)
+
+    call('GET', '/api/search?q=stop', 200)
+    response = client.get('/api/search?q=muse&type=destinations&limit=5')
+    call('GET', '/api/search?q=muse&type=destinations&limit=5', 304,
+         headers={'If-None-Match': response.headers['ETag']})
+    call('GET', '/api/search?q=batch+tr&type=trips', 200)
+
+    for fmt in ('geojson', 'ndjson', 'gpx'):
+        call('GET', f'/api/trips/export?format={fmt}', 200)
+    call('GET', f'/api/trips/{trip_id}/export', 200)
+
+    # Фонові задачі; диспетчера тут немає - задачі виконуються явно (jobs.run_pending)
+    key = {'Idempotency-Key': 'optimize-1'}
+    optimize_job = call('POST', f'/api/trips/{trip_id}/optimize?async=1', 202, json={'time_budget_ms': 10}, headers=key)
+    call('POST', f'/api/trips/{trip_id}/optimize?async=1', 202, json={'time_budget_ms': 10}, headers=key)
+    call('POST', f'/api/trips/{trip_id}/destinations/import?format=csv&async=1', 202, data=csv_data)
+    export_job = call('POST', '/api/trips/export?format=ndjson', 202)
+    call('POST', f'/api/trips/{trip_id}/export?format=gpx', 202)
+    # Геокодер недоступний: задача адрес чекатиме на повтор
+    addresses_job = call('POST', f'/api/trips/{trip_id}/addresses', 202)
+    jobs.run_pending(client.application)
+    call('GET', f"/api/jobs/{optimize_job['id']}", 200)
+    call('GET', f"/api/jobs/{export_job['id']}/download", 200)
+    call('POST', f"/api/jobs/{addresses_job['id']}/cancel", 200)
+    call('POST', f"/api/jobs/{optimize_job['id']}/cancel", 409)
+
+    # Зовнішні сервіси недоступні: перевіряються лише запити до БД до звернення назовні
+    call('GET', '/api/geocode?q=Kyiv', 502)
+    call('GET', '/api/reverse-geocode?lat=50.45&lng=30.52', 502)
+    call('GET', f'/api/trips/{trip_id}/weather', 503)
+    call('GET', '/api/poi?lat=50.45&lng=30.52&radius=1000&type=cafe', 200)
+    # Біля полюса - діапазон клітинок замість списку
+    call('GET', '/api/poi?lat=89.9&lng=0&radius=5000&type=cafe', 200)
+    call('GET', f'/api/route?trip_id={trip_id}', 503)
+    call('GET', f'/api/matrix?trip_id={trip_id}', 503)
+
+    response = client.get('/api/admin/users?limit=1')
+    call('GET', f"/api/admin/users?limit=1&cursor={response.headers['X-Next-Cursor']}", 200)
+    call('GET', '/api/admin/users?q=plan', 200)
+    call('GET', '/api/admin/users?is_admin=1', 200)
+    call('GET', '/api/admin/stats', 200)
+    call('GET', '/api/admin/export', 200)
+    call('POST', '/api/admin/export?format=ndjson', 202)
+    call('DELETE', f'/api/trips/{trips[-1]}', 204)
+
+    # Дельта-синхронізація: сторінки, 304, а після ущільнення надгробків старий курсор - 410
+    first = call('GET', '/api/sync?limit=5', 200)
+    call('GET', f"/api/sync?since={first['cursor']}", 200)
+    response = client.get('/api/sync?since=1')
+    call('GET', '/api/sync?since=1', 304, headers={'If-None-Match': response.headers['ETag']})
+    with client.application.app_context():
+        sync.compact(-1)
+    call('GET', f"/api/sync?since={first['cursor']}", 410)
+
+
+# ------------------------------------------------------
+# Аналіз планів
+# ------------------------------------------------------
+
+class _Recorder:
+    """Збирає унікальні пари (endpoint, SQL) разом з параметрами першого виклику."""
+
+    def __init__(self):
+        self.statements = {}
+        self.endpoints = set()
+
+    def request_started(self, sender, **extra):
+        self.endpoints.add(request.endpoint)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if _SKIP.match(statement):
+            return
+        endpoint = request.endpoint if has_request_context() else None
+        if executemany:
+            parameters = parameters[0]
+        self.statements.setdefault((endpoint, statement), parameters)
+
+
+def _explain(connection, dialect, statement, parameters):
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        limited = bool(_LIMIT.search(statement))
+        return plan, {m.group(1) for line in plan for m in _SQLITE_SCAN.finditer(line)
+                      if not (m.group(2) and limited)}
+    rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+    plan = [row[0] for row in rows]
+    return plan, {m.group(1) for line in plan for m in _POSTGRES_SCAN.finditer(line)}
+
+
+def check_plans(statements):
+    """
+    Повертає (звіт, помилки). Звіт - список (endpoint, SQL, план);
+    помилки - повні сканування таблиць, не внесені до ALLOWED_SCANS.
+    """
+    tables = set(db.metadata.tables)
+    report, failures = [], []
+    with db.engine.connect() as connection:
+        dialect = connection.dialect.name
+        if dialect == 'postgresql':
+            # На маленьких таблицях PostgreSQL і так обрав би Seq Scan;
+            # забороняємо його, щоб він лишився тільки там, де немає індексу
+            connection.exec_driver_sql('SET enable_seqscan = off')
+        for (endpoint, statement), parameters in statements.items():
+            plan, scanned = _explain(connection, dialect, statement, parameters)
+            report.append((endpoint, statement, plan))
+            allowed = ALLOWED_SCANS.get(endpoint, {})
+            for table in sorted((scanned & tables) - set(allowed)):
+                failures.append((endpoint, table, statement, plan))
+    return report, failures
+
+
+def inspect_plans(app):
+    """
+    Проганяє сценарій на додатку з мігрованою порожньою БД. Повертає (звіт,
+    помилки, роути поза сценарієм); звіт і помилки - як у check_plans.
+    """
+    with app.app_context():
+        engine = db.engine
+
+    # Сценарій виконується поза контекстом додатку, щоб кожен запит мав
+    # власну сесію БД (як у робочому сервері), а не брав об'єкти з identity map
+    recorder = _Recorder()
+    event.listen(engine, 'before_cursor_execute', recorder)
+    request_started.connect(recorder.request_started, app)
+    try:
+        run_scenario(app.test_client())
+    finally:
+        event.remove(engine, 'before_cursor_execute', recorder)
+        request_started.disconnect(recorder.request_started, app)
+
+    with app.app_context():
+        report, failures = check_plans(recorder.statements)
+    missing = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                     if rule.endpoint.startswith('main.') and rule.endpoint not in recorder.endpoints)
+    return report, failures, missing
+
+
+@click.command('check-query-plans')
+@click.option('--database-url', default=None,
+              help='Empty scratch database to run on (default: a temporary SQLite file).')
+@click.option('--verbose', '-v', is_flag=True, help='Print every statement with its plan.')
+def check_query_plans_command(database_url, verbose):
+    """Fail if any API query does a full table scan."""
+    from flask_migrate import upgrade
+    from . import create_app, init_migrations
+
+    workdir = tempfile.mkdtemp(prefix='query-plans-')
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': database_url or 'sqlite:///' + os.path.join(workdir, 'plans.db'),
+        'TESTING': True,
+        # Зовнішні сервіси не викликаються
+        'NOMINATIM_URL': 'http://127.0.0.1:9',
+        'GEOCODE_MIN_INTERVAL': 0,
+        'GEOCODE_TIMEOUT': 1,
+        'OPENWEATHER_API_KEY': None,
+        # Тимчасовому додатку пул процесів не потрібен
+        'PASSWORD_HASH_WORKERS': 0,
+        # Без дорожнього графа роути маршрутів відповідають 503 після читання пунктів
+        'ROUTING_GRAPH_DIR': os.path.join(workdir, 'routing-graph'),
+        # Фонові задачі сценарій виконує сам
+        'JOBS_WORKERS': 0,
+        'JOBS_OUTPUT_DIR': os.path.join(workdir, 'job-output')
+    }
+    config = type('QueryPlanConfig', (), {**current_app.config, **overrides})
+    migrations_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+    try:
+        app = create_app(config)
+        init_migrations(app)
+        with app.app_context():
+            upgrade(directory=migrations_dir)
+        report, failures, missing = inspect_plans(app)
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if verbose:
+        for endpoint, statement, plan in report:
+            click.echo(f'[{endpoint}] {" ".join(statement.split())}')
+            for line in plan:
+                click.echo(f'    {line}')
+
+    for endpoint, table, statement, plan in failures:
+        click.echo(f'FULL SCAN of {table} in {endpoint}:\n  {" ".join(statement.split())}', err=True)
+        for line in plan:
+            click.echo(f'    {line}', err=True)
+    for endpoint in missing:
+        click.echo(f'Route {endpoint} is not exercised by the scenario; extend run_scenario()', err=True)
+
+    click.echo(f'Checked {len(report)} statements from {len({e for e, _, _ in report})} endpoints.')
+    if failures or missing:
+        raise click.ClickException(f'{len(failures)} full table scan(s), {len(missing)} route(s) not covered')
+    click.echo('No unexpected full table scans.')
@@ -1,26 +1,31 @@
+import hashlib
+import json
+import os
 import re
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, send_file, stream_with_context, url_for
 from flask_login import login_user, logout_user, current_user, login_required
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import or_
+from sqlalchemy import and_, or_
 
-from . import db, login_manager  # Імпортуємо з __init__.py в поточній папці
-from .models import User, Trip, Destination  # Імпортуємо з models.py в поточній папці
+from . import db  # Імпортуємо з __init__.py в поточній папці
+from .models import User, Trip, Destination, UsageCounter, Job, ORDER_GAP, rows_to_dicts  # Імпортуємо з models.py в поточній папці
+from .importers import PARSERS, ImportFormatError, detect_format, validate_record
+from . import exporters, fulltext, geocoding, jobs, poi, routing, security, sync, tasks, weather
 
 # Створюємо Blueprint 'main'
 main = Blueprint('main', __name__)
 
 
-# --- Функція завантаження користувача за ID для Flask-Login ---
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
-
 # ======================================================
 # РОУТИ АВТЕНТИФІКАЦІЇ
 # ======================================================
 
+def _hashing_busy(error):
+    """503 з Retry-After, коли пул хешування паролів перевантажений."""
+    response = jsonify({"error": str(error)})
+    response.headers['Retry-After'] = str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])
+    return response, 503
+
+
 @main.route('/auth/register', methods=['POST'])
 def register():
     """Реєструє нового користувача."""
@@ -43,15 +48,19 @@ def register():
     if len(password) < 8:
         return jsonify({"error": "Password must be at least 8 characters long"}), 400
 
-    hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
     new_user = User(
         username=username,
-        email=email,
-        password_hash=hashed_password
+        email=email
     )
-    if User.query.count() == 0:
+    try:
+        new_user.set_password(password)
+    except security.HashingBusy as e:
+        return _hashing_busy(e)
+    # Перший користувач стає адміністратором (достатньо перевірити наявність рядка)
+    if not db.session.query(User.query.exists()).scalar():
         new_user.is_admin = True
     db.session.add(new_user)
+    UsageCounter.add('users', 1)
     db.session.commit()
     login_user(new_user)
     return jsonify(new_user.to_dict()), 201  # 201 Created
@@ -68,8 +77,19 @@ def login():
     user = User.query.filter(
         or_(User.username == login_identifier, User.email == login_identifier)
     ).first()
-    if not user or not check_password_hash(user.password_hash, password):
-        return jsonify({"error": "Invalid credentials"}), 401
+    try:
+        if not user or not user.check_password(password):
+            return jsonify({"error": "Invalid credentials"}), 401
+    except security.HashingBusy as e:
+        return _hashing_busy(e)
+    # Хеш зі застарілими параметрами перераховуємо, поки маємо пароль;
+    # під навантаженням це можна відкласти до наступного входу
+    try:
+        if security.needs_rehash(user.password_hash):
+            user.set_password(password)
+            db.session.commit()
+    except security.HashingBusy:
+        pass
     login_user(user, remember=True)
     return jsonify(user.to_dict()), 200
 
@@ -98,14 +118,134 @@ def status():
 # РОУТИ ПОДОРОЖЕЙ
 # ======================================================
 
+# Максимальний розмір сторінки для курсорної пагінації
+MAX_PAGE_SIZE = 100
+
+
+def _is_truthy(value):
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+def _not_modified(etag):
+    """Відповідь 304, якщо клієнт уже має представлення з цим ETag, інакше None."""
+    # Слабке порівняння: стиснена відповідь має слабкий ETag (див. compression.py)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        return _with_etag(response, etag)
+    return None
+
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    # Браузер кешує відповідь, але щоразу перевіряє її актуальність
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _enqueue(kind, params, payload=None):
+    """
+    Ставить фонову задачу в чергу: 202 зі станом задачі і Location для
+    опитування. Повтор запиту з тим самим заголовком Idempotency-Key
+    повертає вже створену задачу замість нової.
+    """
+    key = request.headers.get('Idempotency-Key')
+    if key is not None and not 0 < len(key) <= 64:
+        return jsonify({"error": "Idempotency-Key must be 1-64 characters long"}), 400
+    job, _ = jobs.enqueue(kind, current_user.id, params, payload=payload, idempotency_key=key)
+    if job.kind != kind:
+        return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = url_for('main.get_job', job_id=job.id)
+    return response
+
+
 @main.route('/trips', methods=['GET'])
 @login_required
 def get_trips():
-    """Отримує всі подорожі поточного користувача."""
-    # Модель Trip тепер автоматично сортує 'destinations'
-    trips = Trip.query.filter_by(user_id=current_user.id).all()
-    trips_data = [trip.to_dict() for trip in trips]
-    return jsonify(trips_data), 200
+    """
+    Отримує подорожі поточного користувача.
+    Параметри (необов'язкові):
+      ?limit=N&cursor=<id> - курсорна пагінація, наступний курсор у заголовку X-Next-Cursor;
+      ?summary=1 - без пунктів призначення, лише їх кількість.
+    Кількість SQL-запитів не залежить від кількості подорожей.
+    Відповідь має ETag на основі версії даних користувача; якщо нічого не
+    змінилось, повертається 304 без завантаження подорожей.
+    """
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', type=int)
+    summary = _is_truthy(request.args.get('summary'))
+
+    data_version = db.session.query(User.data_version).filter_by(id=current_user.id).scalar()
+    etag = f'trips-{current_user.id}-{data_version}-{limit}-{cursor}-{int(summary)}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    # Лише читання: словники прямо з рядків результату, без ORM-об'єктів
+    stmt = Trip.select_dicts().where(Trip.user_id == current_user.id).order_by(Trip.id)
+    if cursor is not None:
+        stmt = stmt.where(Trip.id > cursor)
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        # Беремо на один запис більше, щоб знати, чи є наступна сторінка
+        stmt = stmt.limit(limit + 1)
+    trips_data = rows_to_dicts(db.session.execute(stmt))
+
+    next_cursor = None
+    if limit is not None and len(trips_data) > limit:
+        trips_data = trips_data[:limit]
+        next_cursor = trips_data[-1]['id']
+
+    if trips_data:
+        # Пункти призначення всіх подорожей сторінки - одним запитом
+        # (подорожі впорядковані за id, тому достатньо діапазону)
+        dest_filter = (
+            Trip.user_id == current_user.id,
+            Destination.trip_id >= trips_data[0]['id'],
+            Destination.trip_id <= trips_data[-1]['id']
+        )
+        if summary:
+            counts = dict(
+                db.session.query(Destination.trip_id, db.func.count(Destination.id))
+                .join(Trip).filter(*dest_filter)
+                .group_by(Destination.trip_id)
+                .all()
+            )
+            for trip_data in trips_data:
+                trip_data['destination_count'] = counts.get(trip_data['id'], 0)
+        else:
+            grouped = Destination.dicts_by_trip(Destination.select_dicts().join(Trip).where(*dest_filter))
+            for trip_data in trips_data:
+                trip_data['destinations'] = grouped.get(trip_data['id'], [])
+
+    response = _with_etag(jsonify(trips_data), etag)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response, 200
+
+
+@main.route('/trips/<int:trip_id>', methods=['GET'])
+@login_required
+def get_trip(trip_id):
+    """Отримує одну подорож з пунктами призначення (з підтримкою ETag / 304)."""
+    row = db.session.query(Trip.name, Trip.user_id, Trip.version).filter_by(id=trip_id).first()
+    if row is None:
+        return jsonify({"error": "Trip not found"}), 404
+    if row.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    etag = f'trip-{trip_id}-{row.version}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    # Лише читання: словники прямо з рядків результату, без ORM-об'єктів
+    trip_data = {'id': trip_id, 'name': row.name, 'user_id': row.user_id}
+    trip_data['destinations'] = rows_to_dicts(
+        db.session.execute(Destination.select_dicts().where(Destination.trip_id == trip_id))
+    )
+    return _with_etag(jsonify(trip_data), etag), 200
 
 
 @main.route('/trips', methods=['POST'])
@@ -117,8 +257,11 @@ def create_trip():
         return jsonify({"error": "Trip name is required"}), 400
     new_trip = Trip(name=data['name'], user_id=current_user.id)
     db.session.add(new_trip)
+    User.bump_version(current_user.id, trip_delta=1)
+    UsageCounter.add('trips', 1)
     db.session.commit()
-    return jsonify(new_trip.to_dict()), 201
+    # Нова подорож ще не має пунктів призначення - зайвий запит не потрібен
+    return jsonify(new_trip.to_dict(destinations=[])), 201
 
 
 @main.route('/trips/<int:trip_id>', methods=['DELETE'])
@@ -128,42 +271,212 @@ def delete_trip(trip_id):
     trip = Trip.query.get_or_404(trip_id)
     if trip.user_id != current_user.id:
         return jsonify({"error": "Unauthorized"}), 403
+    UsageCounter.add('destinations', -trip.destinations.count())
+    UsageCounter.add('trips', -1)
     db.session.delete(trip)
+    User.bump_version(current_user.id, trip_delta=-1)
     db.session.commit()
     return "", 204
 
 
-# ======================================================
-# РОУТИ ПУНКТІВ ПРИЗНАЧЕННЯ
-# ======================================================
+def _export_response(scope, filename):
+    """
+    Потокова відповідь з експортом подорожей області 'scope' (див.
+    exporters.scope_filter); для POST - фонова задача експорту у файл.
+    """
+    fmt = (request.args.get('format') or 'geojson').lower()
+    if fmt not in exporters.FORMATS:
+        return jsonify({"error": "Unknown export format (use geojson, ndjson or gpx)"}), 400
+    if request.method == 'POST':
+        return _enqueue('export', {'scope': scope, 'format': fmt, 'filename': filename})
+    mimetype, extension = exporters.FORMATS[fmt]
+    rows = exporters.export_rows(exporters.scope_filter(scope), current_app.config['EXPORT_BATCH_SIZE'])
+    response = Response(stream_with_context(exporters.generate(fmt, rows)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
 
-@main.route('/trips/<int:trip_id>/destinations', methods=['POST'])
+
+@main.route('/trips/export', methods=['GET', 'POST'])
 @login_required
-def add_destination(trip_id):
-    """Додає новий пункт призначення до подорожі."""
+def export_trips():
+    """
+    Експортує всі подорожі поточного користувача (?format=geojson|ndjson|gpx).
+    POST - у фоні: файл завантажується через GET /api/jobs/<id>/download.
+    """
+    return _export_response({'user_id': current_user.id}, 'trips')
+
+
+@main.route('/trips/<int:trip_id>/export', methods=['GET', 'POST'])
+@login_required
+def export_trip(trip_id):
+    """Експортує одну подорож (?format=geojson|ndjson|gpx; POST - у фоні)."""
     trip = Trip.query.get_or_404(trip_id)
     if trip.user_id != current_user.id:
         return jsonify({"error": "Unauthorized"}), 403
+    return _export_response({'trip_id': trip.id}, f'trip-{trip.id}')
 
-    data = request.get_json()
+
+# ======================================================
+# РОУТИ ПУНКТІВ ПРИЗНАЧЕННЯ
+# ======================================================
+
+# Спільні кроки окремих роутів і пакетного /batch.
+# Функції лише змінюють сесію; commit() і версії - на боці виклику.
+
+def _new_destination_error(data):
+    """Текст помилки валідації нового пункту призначення або None."""
     if not data or not data.get('name') or not data.get('lat') or not data.get('lon'):
-        return jsonify({"error": "Missing data (name, lat, lon required)"}), 400
+        return "Missing data (name, lat, lon required)"
+    return None
 
-    # Встановлюємо order_index, щоб новий елемент був останнім
-    max_index = db.session.query(db.func.max(Destination.order_index)).filter_by(trip_id=trip.id).scalar() or 0
 
+def _add_destination(trip_id, data):
+    """Додає пункт призначення в кінець подорожі."""
     new_dest = Destination(
         name=data['name'],
         lat=data['lat'],
         lng=data['lon'],
-        trip_id=trip.id,
-        order_index=max_index + 1
+        trip_id=trip_id,
+        # Новий елемент стає останнім
+        order_index=Destination.next_order_index(trip_id)
     )
     db.session.add(new_dest)
+    return new_dest
+
+
+def _apply_destination_patch(dest, data):
+    """Оновлює координати, дату та нотатки пункту (лише передані поля)."""
+    # Оновлення координат
+    if 'lat' in data:
+        dest.lat = data['lat']
+    if 'lng' in data:
+        dest.lng = data['lng']
+
+    # Оновлення нотаток і дати
+    if 'visit_date' in data:
+        dest.visit_date = data['visit_date']
+    if 'notes' in data:
+        dest.notes = data['notes']
+
+
+def _reorder_error(trip_id, destination_ids):
+    """
+    Встановлює порядок пунктів подорожі одним UPDATE ... CASE.
+    Повертає текст помилки (тоді транзакцію треба відкотити) або None.
+    """
+    if not isinstance(destination_ids, list) or not destination_ids:
+        return "Missing destination_ids"
+    if len(set(destination_ids)) != len(destination_ids):
+        return "Duplicate destination_ids"
+    # Якщо якийсь ID не належить подорожі, оновиться менше рядків
+    if Destination.bulk_reorder(trip_id, destination_ids) != len(destination_ids):
+        return "All destination_ids must belong to this trip"
+    return None
+
+
+def _move_error(dest, after_id, before_id):
+    """Переміщує пункт після after_id або перед before_id; повертає текст помилки або None."""
+    if (after_id is None) == (before_id is None):
+        return "Exactly one of after_id or before_id is required"
+
+    anchor = Destination.query.get(after_id if after_id is not None else before_id)
+    if not anchor or anchor.trip_id != dest.trip_id or anchor.id == dest.id:
+        return "Anchor destination must be another stop of the same trip"
+
+    if after_id is not None:
+        dest.move(after=anchor)
+    else:
+        dest.move(before=anchor)
+    return None
+
+
+@main.route('/trips/<int:trip_id>/destinations', methods=['POST'])
+@login_required
+def add_destination(trip_id):
+    """Додає новий пункт призначення до подорожі."""
+    trip = Trip.query.get_or_404(trip_id)
+    if trip.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json()
+    error = _new_destination_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    new_dest = _add_destination(trip.id, data)
+    Trip.bump_version(trip.id, trip.user_id)
+    UsageCounter.add('destinations', 1)
     db.session.commit()
     return jsonify(new_dest.to_dict()), 201
 
 
+@main.route('/trips/<int:trip_id>/destinations/import', methods=['POST'])
+@login_required
+def import_destinations(trip_id):
+    """
+    Масовий імпорт пунктів призначення з GPX, GeoJSON, NDJSON або CSV.
+    Файл передається як multipart-поле 'file' або як тіло запиту (?format=...).
+    Файл читається потоково, рядки вставляються пачками в одній транзакції;
+    некоректні рядки пропускаються і повертаються у списку 'errors'.
+    З ?async=1 файл імпортується фоновою задачею (відповідь 202, див. GET /api/jobs/<id>).
+    """
+    trip = Trip.query.get_or_404(trip_id)
+    if trip.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    upload = request.files.get('file')
+    if upload:
+        stream, filename = upload.stream, upload.filename
+    else:
+        stream, filename = request.stream, None
+    fmt = detect_format(filename, request.args.get('format'))
+    if not fmt:
+        return jsonify({"error": "Unknown import format (use csv, gpx, geojson or ndjson)"}), 400
+
+    if _is_truthy(request.args.get('async')):
+        max_payload = current_app.config['JOBS_MAX_PAYLOAD']
+        payload = stream.read(max_payload + 1)
+        if len(payload) > max_payload:
+            return jsonify({"error": f"Import file is larger than {max_payload} bytes"}), 413
+        return _enqueue('import', {'trip_id': trip.id, 'format': fmt}, payload=payload)
+
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    max_errors = current_app.config['IMPORT_MAX_ERRORS']
+    order_index = Destination.next_order_index(trip.id)
+    batch, errors = [], []
+    imported = failed = 0
+
+    try:
+        for row, record in PARSERS[fmt](stream):
+            try:
+                values = validate_record(record)
+            except ValueError as e:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": row, "error": str(e)})
+                continue
+            values['trip_id'] = trip.id
+            values['order_index'] = order_index
+            order_index += ORDER_GAP
+            batch.append(values)
+            if len(batch) >= batch_size:
+                db.session.execute(tasks.IMPORT_INSERT, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(tasks.IMPORT_INSERT, batch)
+            imported += len(batch)
+    except ImportFormatError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    if imported:
+        Trip.bump_version(trip.id, trip.user_id)
+        UsageCounter.add('destinations', imported)
+    db.session.commit()
+    return jsonify({"imported": imported, "failed": failed, "errors": errors}), 201
+
+
 @main.route('/destinations/<int:dest_id>', methods=['DELETE'])
 @login_required
 def delete_destination(dest_id):
@@ -171,6 +484,8 @@ def delete_destination(dest_id):
     dest = Destination.query.get_or_404(dest_id)
     if dest.trip.user_id != current_user.id:
         return jsonify({"error": "Unauthorized"}), 403
+    Trip.bump_version(dest.trip_id, current_user.id)
+    UsageCounter.add('destinations', -1)
     db.session.delete(dest)
     db.session.commit()
     return "", 204
@@ -185,20 +500,8 @@ def update_destination(dest_id):
     if dest.trip.user_id != current_user.id:
         return jsonify({"error": "Unauthorized"}), 403
 
-    data = request.get_json()
-
-    # Оновлення координат
-    if 'lat' in data:
-        dest.lat = data['lat']
-    if 'lng' in data:
-        dest.lng = data['lng']
-
-    # Оновлення нотаток і дати
-    if 'visit_date' in data:
-        dest.visit_date = data['visit_date']
-    if 'notes' in data:
-        dest.notes = data['notes']
-
+    _apply_destination_patch(dest, request.get_json())
+    Trip.bump_version(dest.trip_id, current_user.id)
     db.session.commit()
     return jsonify(dest.to_dict()), 200
 
@@ -215,28 +518,686 @@ def reorder_destinations(trip_id):
     data = request.get_json()
     destination_ids = data.get('destination_ids')  # Очікуємо [3, 1, 2]
 
-    if not destination_ids:
-        return jsonify({"error": "Missing destination_ids"}), 400
-
-    # Оновлюємо order_index для кожного ID
-    for index, dest_id in enumerate(destination_ids):
-        dest = Destination.query.get(dest_id)
-        if dest and dest.trip_id == trip.id:
-            dest.order_index = index
+    error = _reorder_error(trip.id, destination_ids)
+    if error:
+        db.session.rollback()
+        return jsonify({"error": error}), 400
 
+    Trip.bump_version(trip.id, trip.user_id)
     db.session.commit()
     return jsonify({"message": "Order updated"}), 200
 
 
+@main.route('/destinations/<int:dest_id>/move', methods=['POST'])
+@login_required
+def move_destination(dest_id):
+    """
+    Переміщує один пункт призначення: JSON {"after_id": X} або {"before_id": Y}.
+    На відміну від reorder, зазвичай змінює лише один рядок.
+    """
+    dest = Destination.query.get_or_404(dest_id)
+    if dest.trip.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json(silent=True) or {}
+    error = _move_error(dest, data.get('after_id'), data.get('before_id'))
+    if error:
+        return jsonify({"error": error}), 400
+    Trip.bump_version(dest.trip_id, current_user.id)
+    db.session.commit()
+    return jsonify(dest.to_dict()), 200
+
+
+@main.route('/trips/<int:trip_id>/optimize', methods=['POST'])
+@login_required
+def optimize_trip(trip_id):
+    """
+    Оптимізує порядок пунктів призначення локально (без зовнішнього OSRM).
+    JSON (усі поля необов'язкові):
+      start_id - фіксована перша точка (за замовчуванням поточна перша; null - вільна);
+      end_id - фіксована остання точка (за замовчуванням вільна; == start_id - кільцевий маршрут);
+      time_budget_ms - бюджет часу на оптимізацію.
+    З ?async=1 оптимізація виконується фоновою задачею (відповідь 202).
+    """
+    trip = Trip.query.get_or_404(trip_id)
+    if trip.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json(silent=True) or {}
+    dests = trip.destinations.all()
+    try:
+        start_id, end_id, budget_ms = tasks.optimize_options(dests, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if _is_truthy(request.args.get('async')):
+        return _enqueue('optimize', {'trip_id': trip.id, 'start_id': start_id, 'end_id': end_id,
+                                     'time_budget_ms': budget_ms})
+
+    trip_data = tasks.optimize_route(trip, dests, start_id, end_id, budget_ms)
+    db.session.commit()
+    return jsonify(trip_data), 200
+
+
+@main.route('/trips/<int:trip_id>/plan-days', methods=['POST'])
+@login_required
+def plan_trip_days(trip_id):
+    """
+    Розподіляє пункти призначення по днях: кластери близьких пунктів, у
+    кожному - оптимізований порядок. Зберігає visit_date і order_index.
+    JSON (days або day_minutes обов'язкове):
+      days - кількість днів;
+      day_minutes - бюджет часу на день (відвідування + переїзди), кількість
+        днів визначається ним;
+      visit_minutes, speed_kmh - час на пункт і швидкість переїздів по прямій;
+      start_date - дата першого дня (YYYY-MM-DD; за замовчуванням найраніша
+        з наявних або сьогодні);
+      time_budget_ms - бюджет часу на оптимізацію порядку всередині днів.
+    З ?preview=1 повертає план без збереження.
+    """
+    trip = Trip.query.get_or_404(trip_id)
+    if trip.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json(silent=True) or {}
+    dests = rows_to_dicts(db.session.execute(Destination.select_dicts().where(Destination.trip_id == trip.id)))
+    save = not _is_truthy(request.args.get('preview'))
+    try:
+        options = tasks.plan_days_options(dests, data)
+        trip_data = tasks.plan_trip_days(trip, dests, options, save=save)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if save:
+        db.session.commit()
+    return jsonify(trip_data), 200
+
+
+# ======================================================
+# ПОШУК
+# ======================================================
+
+@main.route('/search', methods=['GET'])
+@login_required
+def search():
+    """
+    Повнотекстовий пошук по подорожах і пунктах призначення поточного користувача.
+    Параметри: ?q=<слова> (кожне - префікс, збігтися мають усі);
+      ?type=trips|destinations - лише один тип (за замовчуванням обидва);
+      ?limit=N - скільки результатів кожного типу.
+    Результати впорядковані за релевантністю. ETag - версія даних користувача, як у GET /trips.
+    """
+    terms = fulltext.parse_terms(request.args.get('q'), current_app.config['SEARCH_MAX_TERMS'])
+    if not terms:
+        return jsonify({"error": "Search query is required"}), 400
+    kind = request.args.get('type')
+    if kind is not None and kind not in fulltext.KINDS:
+        return jsonify({"error": "Unknown type (use trips or destinations)"}), 400
+    limit = request.args.get('limit', current_app.config['SEARCH_DEFAULT_LIMIT'], type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    data_version = db.session.query(User.data_version).filter_by(id=current_user.id).scalar()
+    # Слова запиту можуть бути не-ASCII, а заголовок ETag - лише ASCII
+    digest = hashlib.sha1(' '.join(terms).encode('utf-8')).hexdigest()[:16]
+    etag = f'search-{current_user.id}-{data_version}-{digest}-{kind}-{limit}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    try:
+        results = fulltext.search(current_user.id, terms, (kind,) if kind else tuple(fulltext.KINDS), limit)
+    except fulltext.SearchUnavailable as e:
+        return jsonify({"error": str(e)}), 501
+    return _with_etag(jsonify(results), etag), 200
+
+
+# ======================================================
+# ДЕЛЬТА-СИНХРОНІЗАЦІЯ (див. sync.py)
+# ======================================================
+
+@main.route('/sync', methods=['GET'])
+@login_required
+def sync_changes():
+    """
+    Зміни подорожей і пунктів призначення поточного користувача.
+    Параметри: ?since=<курсор> з попередньої відповіді (без нього - усі
+      об'єкти, повна синхронізація); ?limit=N - записів журналу на сторінку.
+    Відповідь: змінені 'trips' (без пунктів) і 'destinations' у поточному
+    стані, id видалених у 'deleted', новий 'cursor' і 'has_more' - чи є
+    наступна сторінка. Застарілий курсор - 410: потрібна повна синхронізація.
+    """
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({"error": "since must be a cursor from a previous sync"}), 400
+    since = int(since)
+    limit = request.args.get('limit', current_app.config['SYNC_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['SYNC_MAX_PAGE_SIZE']))
+
+    data_version, sync_horizon = (
+        db.session.query(User.data_version, User.sync_horizon).filter_by(id=current_user.id).one()
+    )
+    if since and sync_horizon > since:
+        return _cursor_expired()
+    etag = f'sync-{current_user.id}-{data_version}-{since}-{limit}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    try:
+        changes = sync.changes(current_user.id, since, limit)
+    except sync.SyncUnavailable as e:
+        return jsonify({"error": str(e)}), 501
+    except sync.CursorExpired:
+        return _cursor_expired()
+    return _with_etag(jsonify(changes), etag), 200
+
+
+def _cursor_expired():
+    return jsonify({"error": "Sync cursor has expired; start a full sync without since"}), 410
+
+
+# ======================================================
+# ПАКЕТНІ ОПЕРАЦІЇ
+# ======================================================
+
+class _OperationError(Exception):
+    """Помилка однієї операції пакета; весь пакет відкочується."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _Batch:
+    """
+    Стан виконання пакета: власники подорожей, завантажені пункти
+    призначення, результати попередніх операцій і змінені подорожі.
+    """
+
+    def __init__(self, operations):
+        self.results = []
+        self.touched_trips = set()
+        # Зміни лічильників UsageCounter, застосовуються одним UPDATE на лічильник
+        self.new_trips = 0
+        self.destination_delta = 0
+
+        # Усі згадані ID збираємо наперед, щоб перевірити власника
+        # кожної подорожі одним запитом, а не в кожній операції
+        trip_ids, dest_ids = set(), set()
+        for op in operations:
+            if _is_id(op.get('trip_id')):
+                trip_ids.add(op['trip_id'])
+            for key in ('id', 'after_id', 'before_id'):
+                if _is_id(op.get(key)):
+                    dest_ids.add(op[key])
+            dest_ids.update(i for i in op.get('destination_ids') or [] if _is_id(i))
+
+        self.destinations = {}
+        if dest_ids:
+            # Пункти потрапляють в identity map сесії - далі без окремих SELECT
+            self.destinations = {d.id: d for d in Destination.query.filter(Destination.id.in_(dest_ids))}
+            trip_ids.update(d.trip_id for d in self.destinations.values())
+        self.trip_owners = {}
+        if trip_ids:
+            self.trip_owners = dict(
+                db.session.query(Trip.id, Trip.user_id).filter(Trip.id.in_(trip_ids)).all()
+            )
+
+    def ref(self, value):
+        """ID або посилання "$N" на об'єкт, створений N-ю операцією пакета."""
+        if isinstance(value, str) and value.startswith('$') and value[1:].isdigit():
+            index = int(value[1:])
+            data = self.results[index]['data'] if index < len(self.results) else None
+            if not isinstance(data, dict) or 'id' not in data:
+                raise _OperationError(f"Reference {value} does not point to a created object")
+            return data['id']
+        return value
+
+    def trip_id(self, value):
+        """ID подорожі поточного користувача (інакше 404/403)."""
+        trip_id = self.ref(value)
+        if trip_id not in self.trip_owners:
+            raise _OperationError("Trip not found", 404)
+        if self.trip_owners[trip_id] != current_user.id:
+            raise _OperationError("Unauthorized", 403)
+        return trip_id
+
+    def destination(self, value):
+        """Пункт призначення з подорожі поточного користувача (інакше 404/403)."""
+        dest_id = self.ref(value)
+        dest = self.destinations.get(dest_id) if _is_id(dest_id) else None
+        if dest is None:
+            raise _OperationError("Destination not found", 404)
+        self.trip_id(dest.trip_id)
+        return dest
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _batch_create_trip(batch, op):
+    if not op.get('name'):
+        raise _OperationError("Trip name is required")
+    trip = Trip(name=op['name'], user_id=current_user.id)
+    db.session.add(trip)
+    db.session.flush()
+    batch.trip_owners[trip.id] = current_user.id
+    batch.touched_trips.add(trip.id)
+    batch.new_trips += 1
+    return 201, trip.to_dict(destinations=[])
+
+
+def _batch_create_destination(batch, op):
+    trip_id = batch.trip_id(op.get('trip_id'))
+    error = _new_destination_error(op)
+    if error:
+        raise _OperationError(error)
+    dest = _add_destination(trip_id, op)
+    db.session.flush()
+    batch.destinations[dest.id] = dest
+    batch.touched_trips.add(trip_id)
+    batch.destination_delta += 1
+    return 201, dest.to_dict()
+
+
+def _batch_update_destination(batch, op):
+    dest = batch.destination(op.get('id'))
+    _apply_destination_patch(dest, op)
+    batch.touched_trips.add(dest.trip_id)
+    return 200, dest.to_dict()
+
+
+def _batch_delete_destination(batch, op):
+    dest = batch.destination(op.get('id'))
+    db.session.delete(dest)
+    del batch.destinations[dest.id]
+    batch.touched_trips.add(dest.trip_id)
+    batch.destination_delta -= 1
+    return 204, None
+
+
+def _batch_move_destination(batch, op):
+    dest = batch.destination(op.get('id'))
+    after_id, before_id = op.get('after_id'), op.get('before_id')
+    error = _move_error(
+        dest,
+        batch.ref(after_id) if after_id is not None else None,
+        batch.ref(before_id) if before_id is not None else None
+    )
+    if error:
+        raise _OperationError(error)
+    batch.touched_trips.add(dest.trip_id)
+    return 200, dest.to_dict()
+
+
+def _batch_reorder(batch, op):
+    trip_id = batch.trip_id(op.get('trip_id'))
+    destination_ids = op.get('destination_ids')
+    if isinstance(destination_ids, list):
+        destination_ids = [batch.ref(dest_id) for dest_id in destination_ids]
+    error = _reorder_error(trip_id, destination_ids)
+    if error:
+        raise _OperationError(error)
+    # UPDATE виконано без синхронізації сесії - наступні операції мають
+    # побачити новий order_index
+    db.session.expire_all()
+    batch.touched_trips.add(trip_id)
+    return 200, {"message": "Order updated"}
+
+
+BATCH_OPERATIONS = {
+    'create_trip': _batch_create_trip,
+    'create_destination': _batch_create_destination,
+    'update_destination': _batch_update_destination,
+    'delete_destination': _batch_delete_destination,
+    'move_destination': _batch_move_destination,
+    'reorder_destinations': _batch_reorder
+}
+
+
+@main.route('/batch', methods=['POST'])
+@login_required
+def run_batch():
+    """
+    Виконує список операцій однією транзакцією:
+      {"operations": [{"op": "create_destination", "trip_id": 1, "name": ..., "lat": ..., "lon": ...},
+                      {"op": "update_destination", "id": 7, "notes": ...}, ...]}
+    Операції: create_trip, create_destination, update_destination,
+    delete_destination, move_destination, reorder_destinations. Замість ID
+    можна передати "$N" - ID об'єкта, створеного N-ю операцією пакета.
+    Відповідь: {"results": [{"status": 201, "data": {...}}, ...]}. Якщо хоч одна
+    операція не вдалася, нічого не зберігається, а відповідь містить її
+    статус, помилку та індекс.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    max_operations = current_app.config['BATCH_MAX_OPERATIONS']
+    if len(operations) > max_operations:
+        return jsonify({"error": f"At most {max_operations} operations per batch"}), 400
+    if not all(isinstance(op, dict) for op in operations):
+        return jsonify({"error": "Each operation must be an object"}), 400
+
+    batch = _Batch(operations)
+    for index, op in enumerate(operations):
+        handler = BATCH_OPERATIONS.get(op.get('op'))
+        try:
+            if handler is None:
+                raise _OperationError(f"Unknown operation: {op.get('op')}")
+            status, result = handler(batch, op)
+        except _OperationError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e), "index": index}), e.status
+        batch.results.append({"status": status, "data": result})
+
+    for trip_id in batch.touched_trips:
+        Trip.bump_version(trip_id, current_user.id)
+    if batch.new_trips:
+        User.bump_version(current_user.id, trip_delta=batch.new_trips)
+        UsageCounter.add('trips', batch.new_trips)
+    UsageCounter.add('destinations', batch.destination_delta)
+    db.session.commit()
+    return jsonify({"results": batch.results}), 200
+
+
+# ======================================================
+# РОУТИ ГЕОКОДУВАННЯ
+# ======================================================
+
+@main.route('/geocode', methods=['GET'])
+@login_required
+def geocode():
+    """Пошук місць за назвою (кешований проксі до Nominatim)."""
+    query = (request.args.get('q') or '').strip()
+    if len(query) < 3:
+        return jsonify({"error": "Query must be at least 3 characters long"}), 400
+    limit = max(1, min(request.args.get('limit', 5, type=int), 20))
+    try:
+        return jsonify(geocoding.search(query, limit)), 200
+    except geocoding.GeocoderBusy as e:
+        return jsonify({"error": str(e)}), 503
+    except geocoding.GeocoderError as e:
+        return jsonify({"error": str(e)}), 502
+
+
+@main.route('/reverse-geocode', methods=['GET'])
+@login_required
+def reverse_geocode():
+    """Назва/адреса місця за координатами (кешований проксі до Nominatim)."""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    if lat is None or lng is None or not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        return jsonify({"error": "Valid lat and lng are required"}), 400
+    try:
+        return jsonify(geocoding.reverse(lat, lng)), 200
+    except geocoding.GeocoderBusy as e:
+        return jsonify({"error": str(e)}), 503
+    except geocoding.GeocoderError as e:
+        return jsonify({"error": str(e)}), 502
+
+
+@main.route('/trips/<int:trip_id>/weather', methods=['GET'])
+@login_required
+def trip_weather(trip_id):
+    """Погода для всіх пунктів подорожі: {"<dest_id>": {temp, description, icon} | null}."""
+    trip = Trip.query.get_or_404(trip_id)
+    if trip.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+    coords = db.session.query(Destination.id, Destination.lat, Destination.lng).filter_by(trip_id=trip.id).all()
+    try:
+        forecasts = weather.for_points([(lat, lng) for _, lat, lng in coords])
+    except weather.WeatherError as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({str(dest_id): forecast for (dest_id, _, _), forecast in zip(coords, forecasts)}), 200
+
+
+@main.route('/trips/<int:trip_id>/addresses', methods=['POST'])
+@login_required
+def fill_trip_addresses(trip_id):
+    """Фонова задача: адреси для пунктів подорожі без адреси (зворотне геокодування; відповідь 202)."""
+    trip = Trip.query.get_or_404(trip_id)
+    if trip.user_id != current_user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+    return _enqueue('addresses', {'trip_id': trip.id})
+
+
+@main.route('/poi', methods=['GET'])
+@login_required
+def find_poi():
+    """Точки інтересу поруч: ?lat=&lng=&radius=<м>&type=<amenity/tourism>&limit=."""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    kind = (request.args.get('type') or '').strip()
+    if lat is None or lng is None or not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        return jsonify({"error": "Valid lat and lng are required"}), 400
+    if not kind:
+        return jsonify({"error": "POI type is required"}), 400
+    radius = request.args.get('radius', 1000, type=float)
+    if radius <= 0 or radius > current_app.config['POI_MAX_RADIUS']:
+        return jsonify({"error": f"radius must be between 0 and {current_app.config['POI_MAX_RADIUS']} meters"}), 400
+    limit = max(1, min(request.args.get('limit', 100, type=int), 500))
+    return jsonify(poi.find_nearby(lat, lng, radius, kind, limit)), 200
+
+
+# ======================================================
+# МАРШРУТИ (локальний дорожній граф, див. routing.py)
+# ======================================================
+
+def _trip_points():
+    """
+    Пункти подорожі з ?trip_id= у порядку маршруту: (рядок подорожі, [(id, lat, lng)])
+    або (None, відповідь з помилкою).
+    """
+    trip_id = request.args.get('trip_id', type=int)
+    if trip_id is None:
+        return None, (jsonify({"error": "trip_id is required"}), 400)
+    row = db.session.query(Trip.user_id, Trip.version).filter_by(id=trip_id).first()
+    if row is None:
+        return None, (jsonify({"error": "Trip not found"}), 404)
+    if row.user_id != current_user.id:
+        return None, (jsonify({"error": "Unauthorized"}), 403)
+    points = (
+        db.session.query(Destination.id, Destination.lat, Destination.lng)
+        .filter_by(trip_id=trip_id)
+        .order_by(Destination.order_index, Destination.id)
+        .all()
+    )
+    return (trip_id, row.version), [tuple(point) for point in points]
+
+
+@main.route('/route', methods=['GET'])
+@login_required
+def trip_route():
+    """
+    Маршрут дорогами через пункти подорожі (?trip_id=): відстань (м), час (с),
+    encoded polyline і відрізки між сусідніми пунктами. ETag - версія подорожі та графа.
+    """
+    trip, points = _trip_points()
+    if trip is None:
+        return points  # відповідь з помилкою
+    if len(points) < 2:
+        return jsonify({"error": "At least 2 destinations are needed for a route"}), 400
+    graph = routing.get_graph()
+    if graph is None:
+        return jsonify({"error": "Routing graph is not available"}), 503
+
+    trip_id, version = trip
+    etag = f'route-{trip_id}-{version}-{graph.build_id}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    try:
+        data = routing.route(graph, points)
+    except routing.RoutingError as e:
+        return jsonify({"error": str(e)}), 422
+    data['trip_id'] = trip_id
+    return _with_etag(jsonify(data), etag), 200
+
+
+@main.route('/matrix', methods=['GET'])
+@login_required
+def trip_matrix():
+    """Матриця часу проїзду (с) між усіма пунктами подорожі (?trip_id=); null - шляху немає."""
+    trip, points = _trip_points()
+    if trip is None:
+        return points  # відповідь з помилкою
+    max_points = current_app.config['ROUTING_MATRIX_MAX_POINTS']
+    if len(points) > max_points:
+        return jsonify({"error": f"At most {max_points} destinations are supported"}), 400
+    graph = routing.get_graph()
+    if graph is None:
+        return jsonify({"error": "Routing graph is not available"}), 503
+
+    trip_id, version = trip
+    etag = f'matrix-{trip_id}-{version}-{graph.build_id}'
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    try:
+        durations = routing.matrix(graph, points) if points else []
+    except routing.RoutingError as e:
+        return jsonify({"error": str(e)}), 422
+    data = {'trip_id': trip_id, 'destination_ids': [dest_id for dest_id, _, _ in points], 'durations': durations}
+    return _with_etag(jsonify(data), etag), 200
+
+
+# ======================================================
+# ФОНОВІ ЗАДАЧІ (див. jobs.py)
+# ======================================================
+
+def _own_job(job_id):
+    """Задача поточного користувача: (задача, None) або (None, відповідь з помилкою)."""
+    job = Job.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        return None, (jsonify({"error": "Unauthorized"}), 403)
+    return job, None
+
+
+@main.route('/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Стан фонової задачі: status, progress {done, total}, result, error, спроби."""
+    job, error = _own_job(job_id)
+    if error:
+        return error
+    return jsonify(job.to_dict()), 200
+
+
+@main.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    """
+    Скасовує задачу. Задача з черги скасовується одразу, а та, що виконується, -
+    на найближчій контрольній точці (cancel_requested = true до того часу).
+    """
+    job, error = _own_job(job_id)
+    if error:
+        return error
+    if not jobs.cancel(job):
+        return jsonify({"error": f"Job is already {job.status}"}), 409
+    return jsonify(job.to_dict()), 200
+
+
+@main.route('/jobs/<int:job_id>/download', methods=['GET'])
+@login_required
+def download_job_output(job_id):
+    """Файл, створений задачею експорту."""
+    job, error = _own_job(job_id)
+    if error:
+        return error
+    if job.kind != 'export' or job.status != jobs.SUCCEEDED:
+        return jsonify({"error": "Job has no output to download"}), 409
+    path = jobs.output_path(job.id)
+    if not os.path.exists(path):
+        return jsonify({"error": "Job output has expired"}), 410
+    result = json.loads(job.result)
+    mimetype, _ = exporters.FORMATS[result['format']]
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=result['filename'])
+
+
 # ======================================================
 # АДМІН-РОУТИ
 # ======================================================
 
+# Розмір сторінки адмін-списку користувачів за замовчуванням
+ADMIN_PAGE_SIZE = 50
+
+
 @main.route('/admin/users', methods=['GET'])
 @login_required
 def get_all_users():
-    """Повертає список всіх користувачів (тільки для адмінів)."""
+    """
+    Список користувачів (тільки для адмінів), курсорна пагінація за id.
+    Параметри (необов'язкові):
+      ?limit=N&cursor=<id> - наступний курсор у заголовку X-Next-Cursor;
+      ?q=<префікс> - початок імені користувача або email;
+      ?is_admin=0|1 - лише адміністратори або лише звичайні користувачі.
+    """
+    if not current_user.is_admin:
+        return jsonify({"error": "Admin access required"}), 403
+
+    limit = max(1, min(request.args.get('limit', ADMIN_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor', 0, type=int)
+    # Навіть перша сторінка - це діапазон id > 0, який обслуговує первинний ключ
+    query = User.query.filter(User.id > cursor)
+
+    prefix = (request.args.get('q') or '').strip()
+    if prefix:
+        # Префікс як діапазон [prefix, prefix + max_char): використовує індекси
+        # username та email, на відміну від LIKE без урахування регістру
+        upper = prefix + '\U0010ffff'
+        query = query.filter(or_(
+            and_(User.username >= prefix, User.username < upper),
+            and_(User.email >= prefix, User.email < upper)
+        ))
+    if request.args.get('is_admin') is not None:
+        query = query.filter(User.is_admin == _is_truthy(request.args.get('is_admin')))
+
+    # Беремо на один запис більше, щоб знати, чи є наступна сторінка
+    users = query.order_by(User.id).limit(limit + 1).all()
+    next_cursor = users[limit - 1].id if len(users) > limit else None
+
+    response = jsonify([dict(user.to_dict(), trip_count=user.trip_count) for user in users[:limit]])
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response, 200
+
+
+@main.route('/admin/stats', methods=['GET'])
+@login_required
+def admin_stats():
+    """
+    Статистика використання (тільки для адмінів) з лічильників UsageCounter
+    та User.trip_count, без COUNT(*) по таблицях.
+    ?top=N - скільки користувачів з найбільшою кількістю подорожей повернути.
+    """
+    if not current_user.is_admin:
+        return jsonify({"error": "Admin access required"}), 403
+
+    top = max(1, min(request.args.get('top', 10, type=int), MAX_PAGE_SIZE))
+    counters = UsageCounter.get_values('users', 'trips', 'destinations')
+    top_users = (
+        db.session.query(User.id, User.username, User.trip_count)
+        .order_by(User.trip_count.desc(), User.id.desc())
+        .limit(top)
+        .all()
+    )
+    return jsonify({
+        "users": counters['users'],
+        "trips": counters['trips'],
+        "destinations": counters['destinations'],
+        "top_users": [
+            {"id": user_id, "username": username, "trip_count": trip_count}
+            for user_id, username, trip_count in top_users
+        ]
+    }), 200
+
+
+@main.route('/admin/export', methods=['GET', 'POST'])
+@login_required
+def admin_export():
+    """Потоковий дамп усіх подорожей усіх користувачів (для резервних копій; POST - у фоні)."""
     if not current_user.is_admin:
         return jsonify({"error": "Admin access required"}), 403
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
\ No newline at end of file
+    return _export_response({}, 'travel-planner-backup')
@@ -0,0 +1,573 @@
+# Локальна маршрутизація по дорожньому графу замість router.project-osrm.org
+#
+# `flask routing build <екстракт>` будує з OSM-екстракту (GeoJSON/NDJSON з
+# лініями доріг або PBF) орієнтований граф для автомобіля і зберігає його в
+# ROUTING_GRAPH_DIR набором .npy-файлів:
+#   - CSR-суміжність: offsets (N+1), targets, durations (секунди), lengths (метри);
+#   - координати вузлів; вузли впорядковані за клітинками сітки (як у poi.py),
+#     тож сусідні на карті вузли лежать поруч і у файлах, а пошук найближчого
+#     вузла - це searchsorted по номерах клітинок;
+#   - ALT-орієнтири (A*, Landmarks, Triangle inequality): для кількох вузлів-
+#     орієнтирів час до/від усіх вузлів. Нерівність трикутника дає нижню межу
+#     часу до цілі, і A* розкриває на порядки менше вузлів, ніж Дейкстра.
+# Файли відкриваються через np.load(mmap_mode='r'): завантаження миттєве, а
+# воркери gunicorn ділять сторінки графа через page cache ОС.
+#
+# Перебудова пише новий граф у тимчасовий каталог і підміняє старий; воркери,
+# що вже працюють, бачать новий граф після перезапуску.
+
+import heapq
+import json
+import math
+import os
+import shutil
+import time
+from array import array
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .importers import iter_json_array
+from .lazy import LazyModule
+from .poi import cells_around, iter_ndjson_features
+
+# numpy імпортується з першим зверненням до графа (див. lazy.py)
+np = LazyModule('numpy')
+
+FORMAT_VERSION = 1
+FILES = ('offsets', 'targets', 'durations', 'lengths', 'lat', 'lng', 'cell_keys', 'cell_starts', 'landmarks')
+
+# Час до/від орієнтира, якщо шляху немає (скінченний, щоб у різницях не з'являвся NaN)
+UNREACHABLE = 1e9
+
+# Швидкість за замовчуванням (км/год) для типів доріг, якими їздять автомобілі
+SPEEDS = {
+    'motorway': 110, 'motorway_link': 60,
+    'trunk': 90, 'trunk_link': 50,
+    'primary': 70, 'primary_link': 50,
+    'secondary': 60, 'secondary_link': 40,
+    'tertiary': 50, 'tertiary_link': 30,
+    'unclassified': 40, 'road': 30, 'residential': 30,
+    'living_street': 10, 'service': 15
+}
+ONEWAY_TRUE = ('yes', 'true', '1')
+NO_ACCESS = ('no', 'private')
+
+EARTH_RADIUS_M = 6371008.8
+
+
+class RoutingError(Exception):
+    """Маршрут побудувати неможливо (точка далеко від доріг, немає шляху)."""
+
+
+# ------------------------------------------------------
+# Геометрія
+# ------------------------------------------------------
+
+def _haversine_m(lat1, lng1, lat2, lng2):
+    """Відстані (м) між масивами точок, поелементно."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _cells(lats, lngs, cell_deg):
+    """Номери клітинок для масивів точок (та сама сітка, що й у poi.cell_of)."""
+    columns = int(math.ceil(360.0 / cell_deg))
+    rows = int(math.ceil(180.0 / cell_deg))
+    row = np.minimum(((lats + 90.0) / cell_deg).astype(np.int64), rows - 1)
+    column = ((lngs + 180.0) / cell_deg).astype(np.int64) % columns
+    return row * columns + column
+
+
+def encode_polyline(lats, lngs, precision=5):
+    """Encoded Polyline (формат Google/OSRM) для послідовності точок."""
+    factor = 10 ** precision
+    points = np.column_stack((np.round(np.asarray(lats) * factor), np.round(np.asarray(lngs) * factor)))
+    deltas = np.diff(points.astype(np.int64), axis=0, prepend=[[0, 0]])
+    chunks = []
+    for value in deltas.ravel().tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+# ------------------------------------------------------
+# Читання екстракту
+# ------------------------------------------------------
+
+def _speed(tags):
+    """Швидкість (км/год) для дороги з тегами OSM або None, якщо нею не їздять автомобілі."""
+    highway = tags.get('highway')
+    if highway not in SPEEDS or tags.get('area') == 'yes':
+        return None
+    if tags.get('access') in NO_ACCESS or tags.get('motor_vehicle') in NO_ACCESS \
+            or tags.get('motorcar') in NO_ACCESS:
+        return None
+    maxspeed = (tags.get('maxspeed') or '').strip()
+    number = maxspeed.split()[0] if maxspeed else ''
+    if number.isdigit() and int(number) > 0:
+        return int(number) * (1.609 if maxspeed.endswith('mph') else 1)
+    return SPEEDS[highway]
+
+
+def _direction(tags):
+    """1 - лише вздовж лінії, -1 - лише проти, 0 - в обидва боки."""
+    oneway = tags.get('oneway')
+    if oneway == '-1':
+        return -1
+    if oneway in ONEWAY_TRUE or tags.get('junction') in ('roundabout', 'circular'):
+        return 1
+    if oneway is None and tags.get('highway') == 'motorway':
+        return 1
+    return 0
+
+
+def iter_geojson_ways(features):
+    """(ключі вузлів, [(lat, lng)], теги) для ліній GeoJSON; вузли зшиваються за координатами."""
+    for feature in features:
+        if not isinstance(feature, dict):
+            continue
+        properties = feature.get('properties') or {}
+        tags = properties.get('tags') if isinstance(properties.get('tags'), dict) else properties
+        tags = {str(k): str(v) for k, v in tags.items() if v is not None}
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'LineString':
+            lines = [geometry.get('coordinates') or []]
+        elif geometry.get('type') == 'MultiLineString':
+            lines = geometry.get('coordinates') or []
+        else:
+            continue
+        for line in lines:
+            points = [(float(lat), float(lng)) for lng, lat, *_ in line]
+            keys = [(round(lat * 1e7), round(lng * 1e7)) for lat, lng in points]
+            yield keys, points, tags
+
+
+def iter_pbf_ways(path):
+    """Те саме для OSM PBF (потрібен пакет 'osmium' >= 3.7)."""
+    try:
+        import osmium
+    except ImportError:
+        raise click.ClickException("Reading .pbf extracts requires the 'osmium' package (pip install osmium)")
+
+    for obj in osmium.FileProcessor(path).with_locations():
+        if not obj.is_way() or 'highway' not in obj.tags:
+            continue
+        nodes = [nd for nd in obj.nodes if nd.location.valid()]
+        yield [nd.ref for nd in nodes], [(nd.lat, nd.lon) for nd in nodes], {t.k: t.v for t in obj.tags}
+
+
+# ------------------------------------------------------
+# Побудова графа
+# ------------------------------------------------------
+
+class GraphBuilder:
+    """Накопичує ребра з ліній доріг; build() перетворює їх на CSR-граф."""
+
+    def __init__(self):
+        self.index = {}
+        self.lat = array('d')
+        self.lng = array('d')
+        self.src = array('q')
+        self.dst = array('q')
+        self.speed = array('f')
+        self.ways = 0
+
+    def _node(self, key, point):
+        node = self.index.get(key)
+        if node is None:
+            node = self.index[key] = len(self.lat)
+            self.lat.append(point[0])
+            self.lng.append(point[1])
+        return node
+
+    def add_way(self, keys, points, tags):
+        speed = _speed(tags)
+        if speed is None or len(keys) < 2:
+            return
+        nodes = [self._node(key, point) for key, point in zip(keys, points)]
+        direction = _direction(tags)
+        for a, b in zip(nodes, nodes[1:]):
+            if a == b:
+                continue
+            if direction >= 0:
+                self.src.append(a)
+                self.dst.append(b)
+                self.speed.append(speed)
+            if direction <= 0:
+                self.src.append(b)
+                self.dst.append(a)
+                self.speed.append(speed)
+        self.ways += 1
+
+
+def _largest_component(count, src, dst):
+    """Маска вузлів найбільшої слабкої компоненти зв'язності (підвішування + стрибки вказівників)."""
+    parent = np.arange(count, dtype=np.int64)
+    while True:
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        a, b = parent[src], parent[dst]
+        differ = a != b
+        if not differ.any():
+            break
+        np.minimum.at(parent, np.maximum(a, b)[differ], np.minimum(a, b)[differ])
+    return parent == np.bincount(parent).argmax()
+
+
+def _csr(count, src, dst, *values):
+    order = np.argsort(src, kind='stable')
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=count), out=offsets[1:])
+    return (offsets, dst[order]) + tuple(v[order] for v in values)
+
+
+def _dijkstra(offsets, targets, weights, source):
+    """Час від 'source' до всіх вузлів (списки Python - для побудови орієнтирів)."""
+    dist = [math.inf] * (len(offsets) - 1)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            v, nd = targets[i], d + weights[i]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _landmarks(offsets, targets, durations, reverse, count, log):
+    """
+    Орієнтири вибираються жадібно: кожен наступний - найдальший від уже вибраних.
+    Повертає масив N x 2L: для кожного вузла час від L орієнтирів, потім до них
+    (рядок вузла - суцільний шматок файлу, тож евристика читає одну сторінку).
+    """
+    forward = (offsets.tolist(), targets.tolist(), durations.tolist())
+    backward = tuple(a.tolist() for a in reverse)
+    size = len(offsets) - 1
+    count = min(count, size)
+    from_rows, to_rows = [], []
+    closest = np.full(size, np.inf)
+    seed = np.array(_dijkstra(*forward, 0))
+    candidate = int(np.argmax(np.where(np.isfinite(seed), seed, -1)))
+    for number in range(count):
+        from_rows.append(np.array(_dijkstra(*forward, candidate)))
+        to_rows.append(np.array(_dijkstra(*backward, candidate)))
+        log(f'  landmark {number + 1}/{count}: node {candidate}')
+        closest = np.minimum(closest, from_rows[-1])
+        candidate = int(np.argmax(np.where(np.isfinite(closest), closest, -1)))
+    table = np.column_stack(from_rows + to_rows) if from_rows else np.zeros((size, 0))
+    return np.where(np.isfinite(table), table, UNREACHABLE).astype(np.float32)
+
+
+def build(ways, out_dir, landmarks, cell_deg, log=print):
+    """Будує граф з ліній доріг і записує його в 'out_dir'. Повертає метадані."""
+    started = time.perf_counter()
+    builder = GraphBuilder()
+    for keys, points, tags in ways:
+        builder.add_way(keys, points, tags)
+    lat, lng = np.frombuffer(builder.lat, dtype=np.float64), np.frombuffer(builder.lng, dtype=np.float64)
+    src, dst = np.frombuffer(builder.src, dtype=np.int64), np.frombuffer(builder.dst, dtype=np.int64)
+    speed = np.frombuffer(builder.speed, dtype=np.float32)
+    log(f'Read {builder.ways} roads: {len(lat)} nodes, {len(src)} edges')
+    if not len(src):
+        raise click.ClickException('The extract has no drivable roads')
+
+    # Лише найбільша компонента: інакше точку можна прив'язати до острівця без виїзду
+    keep = _largest_component(len(lat), src, dst)
+    # Нова нумерація вузлів - за клітинками сітки (локальність у файлах і пошук найближчого)
+    cells = _cells(lat[keep], lng[keep], cell_deg)
+    order = np.argsort(cells, kind='stable')
+    renumber = np.full(len(lat), -1, dtype=np.int64)
+    renumber[np.flatnonzero(keep)[order]] = np.arange(len(order))
+    lat, lng, cells = lat[keep][order], lng[keep][order], cells[order]
+    edges = keep[src]
+    src, dst, speed = renumber[src[edges]], renumber[dst[edges]], speed[edges]
+    size = len(lat)
+
+    lengths = _haversine_m(lat[src], lng[src], lat[dst], lng[dst])
+    durations = lengths / (speed.astype(np.float64) / 3.6)
+    offsets, targets, durations, lengths = _csr(size, src, dst, durations.astype(np.float32),
+                                                lengths.astype(np.float32))
+    # Обернений граф (ребро v -> u для кожного u -> v) - для часу "до орієнтира"
+    reverse = _csr(size, targets, np.repeat(np.arange(size), np.diff(offsets)), durations)
+    log(f'Largest component: {size} nodes, {len(targets)} edges')
+
+    landmark_table = _landmarks(offsets, targets, durations, reverse, landmarks, log)
+    cell_keys, cell_starts = np.unique(cells, return_index=True)
+    arrays = {
+        'offsets': offsets,
+        'targets': targets.astype(np.int32 if size < 2 ** 31 else np.int64),
+        'durations': durations,
+        'lengths': lengths,
+        'lat': lat,
+        'lng': lng,
+        'cell_keys': cell_keys,
+        'cell_starts': np.append(cell_starts, size).astype(np.int64),
+        'landmarks': landmark_table
+    }
+    meta = {
+        'version': FORMAT_VERSION,
+        'build_id': f'{int(time.time())}-{size}-{len(targets)}',
+        'nodes': size,
+        'edges': int(len(targets)),
+        'landmarks': landmark_table.shape[1] // 2,
+        'cell_deg': cell_deg
+    }
+
+    # Запис у тимчасовий каталог і підміна: читачі не бачать напівзаписаного графа
+    out_dir = os.path.abspath(out_dir)
+    tmp_dir, old_dir = out_dir + '.tmp', out_dir + '.old'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    meta['seconds'] = round(time.perf_counter() - started, 2)
+    return meta
+
+
+# ------------------------------------------------------
+# Запити
+# ------------------------------------------------------
+
+class RoutingGraph:
+    """Граф, відкритий через mmap; лише читання, тож безпечний для потоків."""
+
+    def __init__(self, path, meta, arrays):
+        self.path = path
+        self.meta = meta
+        self.build_id = meta['build_id']
+        self.cell_deg = meta['cell_deg']
+        for name, values in arrays.items():
+            setattr(self, name, values)
+
+    @classmethod
+    def load(cls, path):
+        """Відкриває граф з каталогу 'path' або повертає None, якщо його ще не побудовано."""
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        if meta.get('version') != FORMAT_VERSION:
+            raise RuntimeError(f'Routing graph in {path} has format {meta.get("version")}; '
+                               f'rebuild it with `flask routing build`')
+        # np.asarray - звичайний ndarray поверх тієї ж пам'яті: зрізи np.memmap помітно повільніші
+        arrays = {name: np.asarray(np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')) for name in FILES}
+        return cls(path, meta, arrays)
+
+    def nearest_node(self, lat, lng, max_distance_m):
+        """Найближчий вузол графа не далі за max_distance_m або None."""
+        radius = min(250.0, max_distance_m)
+        while True:
+            cells = np.asarray(cells_around(lat, lng, radius, self.cell_deg), dtype=np.int64)
+            positions = np.searchsorted(self.cell_keys, cells)
+            found = positions < len(self.cell_keys)
+            found[found] = self.cell_keys[positions[found]] == cells[found]
+            ranges = [range(self.cell_starts[p], self.cell_starts[p + 1]) for p in positions[found].tolist()]
+            if ranges:
+                nodes = np.concatenate([np.arange(r.start, r.stop) for r in ranges])
+                distances = _haversine_m(lat, lng, self.lat[nodes], self.lng[nodes])
+                best = int(np.argmin(distances))
+                if distances[best] <= radius:
+                    return int(nodes[best])
+            if radius >= max_distance_m:
+                return None
+            radius = min(radius * 4, max_distance_m)
+
+    def _heuristic(self, target):
+        """
+        Нижня межа часу до 'target' для масиву вузлів (нерівність трикутника):
+        max по орієнтирах l з d(l, t) - d(l, v) та d(v, l) - d(t, l).
+        """
+        count = self.meta['landmarks']
+        if not count:
+            return lambda nodes: np.zeros(len(nodes))
+        reference = self.landmarks[target].astype(np.float64)
+        sign = np.concatenate((-np.ones(count), np.ones(count)))
+
+        def heuristic(nodes):
+            return (sign * (self.landmarks[nodes] - reference)).max(axis=1)
+        return heuristic
+
+    def _edges(self, node):
+        start, end = self.offsets[node:node + 2].tolist()
+        return start, self.targets[start:end], self.durations[start:end]
+
+    def shortest_path(self, source, target):
+        """A* з ALT-евристикою: (вузли, ребра, тривалість у секундах) або None."""
+        if source == target:
+            return [source], [], 0.0
+        heuristic = self._heuristic(target)
+        best = {source: 0.0}
+        bounds = {}
+        previous = {}
+        settled = set()
+        # При рівних оцінках першим іде вузол, ближчий до цілі (-cost): інакше на
+        # сітці вулиць з багатьма рівноцінними шляхами A* розкриває їх усі
+        heap = [(0.0, 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            cost = -cost
+            if node == target:
+                break
+            if node in settled:
+                continue
+            settled.add(node)
+            start, targets, durations = self._edges(node)
+            improved = []
+            for i, (neighbour, duration) in enumerate(zip(targets.tolist(), durations.tolist())):
+                candidate = cost + duration
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    previous[neighbour] = (node, start + i)
+                    improved.append((neighbour, candidate))
+            if not improved:
+                continue
+            # Межа для вузла не залежить від шляху до нього - рахуємо її раз
+            missing = [neighbour for neighbour, _ in improved if neighbour not in bounds]
+            if missing:
+                bounds.update(zip(missing, heuristic(np.array(missing)).tolist()))
+            for neighbour, candidate in improved:
+                bound = bounds[neighbour]
+                # Межа порядку UNREACHABLE - з цього вузла ціль недосяжна
+                if bound < UNREACHABLE / 2:
+                    heapq.heappush(heap, (candidate + max(bound, 0.0), -candidate, neighbour))
+        else:
+            return None
+
+        nodes, edges = [target], []
+        while nodes[-1] != source:
+            node, edge = previous[nodes[-1]]
+            nodes.append(node)
+            edges.append(edge)
+        return nodes[::-1], edges[::-1], best[target]
+
+    def durations_from(self, source, targets):
+        """Дейкстра від 'source', доки не знайдено час до всіх 'targets': {вузол: секунди}."""
+        remaining = set(targets)
+        found = {}
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap and remaining:
+            cost, node = heapq.heappop(heap)
+            if cost > best[node]:
+                continue
+            if node in remaining:
+                remaining.discard(node)
+                found[node] = cost
+            _, neighbours, durations = self._edges(node)
+            for neighbour, duration in zip(neighbours.tolist(), durations.tolist()):
+                candidate = cost + duration
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    heapq.heappush(heap, (candidate, neighbour))
+        return found
+
+
+def _snap(graph, points):
+    max_distance = current_app.config['ROUTING_MAX_SNAP_DISTANCE']
+    nodes = []
+    for dest_id, lat, lng in points:
+        node = graph.nearest_node(lat, lng, max_distance)
+        if node is None:
+            raise RoutingError(f'Destination {dest_id} is more than {max_distance} m from the road network')
+        nodes.append(node)
+    return nodes
+
+
+def route(graph, points):
+    """
+    Маршрут через точки [(dest_id, lat, lng)] у заданому порядку:
+    загальні відстань і час, encoded polyline та відрізки між сусідніми точками.
+    """
+    nodes = _snap(graph, points)
+    path, legs = [nodes[0]], []
+    total_distance = total_duration = 0.0
+    for (from_id, _, _), (to_id, _, _), source, target in zip(points, points[1:], nodes, nodes[1:]):
+        found = graph.shortest_path(source, target)
+        if found is None:
+            raise RoutingError(f'No road route from destination {from_id} to {to_id}')
+        leg_nodes, leg_edges, duration = found
+        distance = float(np.asarray(graph.lengths[leg_edges], dtype=np.float64).sum()) if leg_edges else 0.0
+        path.extend(leg_nodes[1:])
+        legs.append({
+            'from_id': from_id,
+            'to_id': to_id,
+            'distance_m': round(distance, 1),
+            'duration_s': round(duration, 1)
+        })
+        total_distance += distance
+        total_duration += duration
+    path = np.asarray(path, dtype=np.int64)
+    return {
+        'distance_m': round(total_distance, 1),
+        'duration_s': round(total_duration, 1),
+        'polyline': encode_polyline(graph.lat[path], graph.lng[path]),
+        'legs': legs
+    }
+
+
+def matrix(graph, points):
+    """Матриця N x N часу проїзду (секунди) між точками; None - шляху немає."""
+    nodes = _snap(graph, points)
+    rows = []
+    for source in nodes:
+        found = graph.durations_from(source, nodes)
+        rows.append([round(found[target], 1) if target in found else None for target in nodes])
+    return rows
+
+
+def get_graph():
+    """Граф поточного додатку або None, якщо його не побудовано."""
+    return current_app.extensions['routing']
+
+
+def init_app(app):
+    """Відкриває граф з ROUTING_GRAPH_DIR (mmap; якщо його немає, роути маршрутів відповідають 503)."""
+    app.extensions['routing'] = RoutingGraph.load(app.config['ROUTING_GRAPH_DIR'])
+
+
+routing_cli = AppGroup('routing', help='Offline road-network routing graph.')
+
+
+@routing_cli.command('build')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--landmarks', default=None, type=int, help='Number of ALT landmarks (default: ROUTING_LANDMARKS).')
+@click.option('--out', default=None, help='Output directory (default: ROUTING_GRAPH_DIR).')
+def build_command(path, landmarks, out):
+    """Build the routing graph from an OSM extract (.geojson, .geojsonl/.ndjson or .pbf)."""
+    extension = path.rsplit('.', 1)[-1].lower()
+    out = out or current_app.config['ROUTING_GRAPH_DIR']
+    landmarks = current_app.config['ROUTING_LANDMARKS'] if landmarks is None else landmarks
+    cell_deg = current_app.config['ROUTING_CELL_DEG']
+    if extension == 'pbf':
+        meta = build(iter_pbf_ways(path), out, landmarks, cell_deg, log=click.echo)
+    else:
+        with open(path, 'rb') as stream:
+            if extension in ('geojsonl', 'ndjson', 'jsonl'):
+                features = iter_ndjson_features(stream)
+            else:
+                features = iter_json_array(stream, 'features')
+            meta = build(iter_geojson_ways(features), out, landmarks, cell_deg, log=click.echo)
+    click.echo(f"Built a graph with {meta['nodes']} nodes, {meta['edges']} edges and {meta['landmarks']} "
+               f"landmarks in {meta['seconds']}s -> {out}")
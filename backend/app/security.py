@@ -0,0 +1,128 @@
+# Хешування паролів в окремому пулі процесів
+#
+# Хешування та перевірка пароля - це десятки-сотні мілісекунд чистого CPU.
+# На потоці запиту вони тримають GIL і гальмують усі інші запити воркера,
+# тому виконуються в обмеженому ProcessPoolExecutor. Якщо черга переповнена,
+# запит одразу отримує 503 (HashingBusy) замість того, щоб чекати.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Пул хешування перевантажений - запит слід повторити пізніше."""
+
+
+class _HasherState:
+    """Стан пулу хешування для одного додатку."""
+
+    def __init__(self, config):
+        self.method = config['PASSWORD_HASH_METHOD']
+        self.workers = config['PASSWORD_HASH_WORKERS']
+        self.max_pending = config['PASSWORD_HASH_MAX_PENDING']
+        self.timeout = config['PASSWORD_HASH_TIMEOUT']
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.pool = None
+        self.pool_pid = None
+        self.method_prefix = None
+
+    def get_pool(self):
+        # Пул створюється ліниво і окремо в кожному процесі: після fork
+        # (воркери gunicorn) успадкований пул непридатний
+        with self.lock:
+            if self.pool is None or self.pool_pid != os.getpid():
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+                self.pool_pid = os.getpid()
+            return self.pool
+
+
+def _mp_context():
+    # forkserver запускає процеси з чистого інтерпретатора: fork багатопотокового
+    # сервера небезпечний, а spawn імпортував би весь додаток у кожен процес
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['werkzeug.security'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def init_app(app):
+    app.extensions['password_hasher'] = _HasherState(app.config)
+
+
+def _run(fn, *args):
+    state = current_app.extensions['password_hasher']
+    if not state.workers:
+        # Пул вимкнено (PASSWORD_HASH_WORKERS = 0) - рахуємо на потоці запиту
+        return fn(*args)
+
+    with state.lock:
+        if state.pending >= state.max_pending:
+            raise HashingBusy('Server is busy, try again later')
+        state.pending += 1
+    try:
+        try:
+            future = state.get_pool().submit(fn, *args)
+        except BaseException:
+            _release(state)
+            raise
+        # Місце в черзі звільняється, коли процес пулу справді закінчив: після
+        # тайм-ауту future.cancel() не зупиняє хеш, що вже виконується
+        future.add_done_callback(lambda _: _release(state))
+        return future.result(timeout=state.timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise HashingBusy('Password hashing timed out, try again later')
+    except BrokenProcessPool:
+        # Процес пулу аварійно завершився - наступний запит створить новий пул
+        with state.lock:
+            state.pool = None
+        raise HashingBusy('Password hashing is unavailable, try again later')
+
+
+def _release(state):
+    with state.lock:
+        state.pending -= 1
+
+
+def hash_password(password):
+    """Хеш пароля з параметрами PASSWORD_HASH_METHOD."""
+    return _run(generate_password_hash, password, current_app.extensions['password_hasher'].method)
+
+
+def verify_password(password_hash, password):
+    """Перевіряє пароль проти збереженого хешу."""
+    if not password_hash:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """
+    True, якщо хеш створено з іншими параметрами, ніж PASSWORD_HASH_METHOD
+    (інший алгоритм або інша кількість ітерацій). Може кинути HashingBusy.
+    """
+    state = current_app.extensions['password_hasher']
+    if state.method_prefix is None:
+        # Werkzeug дописує параметри за замовчуванням ("pbkdf2:sha256" ->
+        # "pbkdf2:sha256:600000"), тож беремо префікс із реального хешу. Це
+        # хеш повної вартості - один раз на процес і, як решта, у пулі
+        state.method_prefix = _run(generate_password_hash, '', state.method).split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != state.method_prefix
+
+
+def shutdown(app):
+    """Зупиняє пул процесів (для скриптів, які створюють додаток лише на час роботи)."""
+    state = app.extensions['password_hasher']
+    with state.lock:
+        pool, state.pool = state.pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,139 @@
+# Дельта-синхронізація подорожей і пунктів призначення (GET /api/sync)
+#
+# Кожна зміна подорожі чи пункту отримує монотонний номер - seq у журналі
+# change_log. Журнал ведуть тригери БД (див. міграцію c6d2f8a14b95), як і
+# індекс пошуку: окремі роути, /batch, імпорт і оптимізація (у т.ч. фонові
+# задачі), переміщення з перенумерацією та каскадне видалення подорожі
+# записуються в тій самій транзакції без окремого коду.
+#
+# На об'єкт припадає один запис - з номером його останньої зміни (тригер
+# замінює попередній), тож журнал не росте від повторних змін одного пункту.
+# Видалений об'єкт лишає надгробок (deleted=True). Клієнт зберігає курсор -
+# seq останнього отриманого запису - і наступного разу отримує лише записи
+# після нього: змінені об'єкти в поточному стані та id видалених.
+#
+# Надгробки старші за SYNC_TOMBSTONE_TTL видаляє ущільнення (compact):
+# диспетчер фонових задач раз на годину або `flask sync compact`. Курсор,
+# менший за найбільший видалений надгробок користувача (User.sync_horizon),
+# застарів: відповідь 410, клієнт починає повну синхронізацію без курсора.
+
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, select, update
+
+from . import db
+from .models import ChangeLog, Destination, Trip, User, rows_to_dicts
+
+# Скільки надгробків видаляти за одну транзакцію
+COMPACT_BATCH_SIZE = 1000
+
+# БД, для яких міграція створює тригери журналу
+SUPPORTED_DIALECTS = ('sqlite', 'postgresql')
+
+
+class SyncUnavailable(Exception):
+    pass
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def horizon(user_id):
+    """Найменший курсор, з якого ще можна продовжити синхронізацію."""
+    return db.session.scalar(select(User.sync_horizon).where(User.id == user_id))
+
+
+def changes(user_id, since, limit):
+    """
+    Зміни користувача після курсора 'since' (не більше 'limit' записів журналу)
+    у порядку seq. Повертає словник відповіді GET /api/sync.
+    """
+    dialect = db.engine.dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        raise SyncUnavailable(f'Delta sync is not supported on {dialect}')
+
+    entries = db.session.execute(
+        select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.deleted)
+        .where(ChangeLog.user_id == user_id, ChangeLog.seq > since)
+        .order_by(ChangeLog.seq).limit(limit + 1)
+    ).all()
+    # У PostgreSQL (READ COMMITTED) ущільнення могло зафіксуватись між перевіркою
+    # курсора і читанням журналу - тоді частини надгробків уже немає
+    if since and horizon(user_id) > since:
+        raise CursorExpired()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    changed = {'trip': [], 'destination': []}
+    deleted = {'trip': [], 'destination': []}
+    for _, entity, entity_id, is_deleted in entries:
+        (deleted if is_deleted else changed)[entity].append(entity_id)
+
+    trips = []
+    if changed['trip']:
+        trips = rows_to_dicts(db.session.execute(
+            Trip.select_dicts().add_columns(Trip.change_seq, Trip.updated_at)
+            .where(Trip.id.in_(changed['trip']), Trip.user_id == user_id)
+            .order_by(Trip.id)
+        ))
+    destinations = []
+    if changed['destination']:
+        destinations = rows_to_dicts(db.session.execute(
+            Destination.select_dicts().add_columns(Destination.change_seq, Destination.updated_at)
+            .join(Trip, Trip.id == Destination.trip_id)
+            .where(Destination.id.in_(changed['destination']), Trip.user_id == user_id)
+        ))
+    return {
+        'cursor': entries[-1].seq if entries else since,
+        'has_more': has_more,
+        'trips': trips,
+        'destinations': destinations,
+        'deleted': {'trips': deleted['trip'], 'destinations': deleted['destination']}
+    }
+
+
+def compact(older_than):
+    """
+    Видаляє надгробки, записані понад 'older_than' секунд тому, і зсуває
+    sync_horizon їхніх власників. Повертає кількість видалених записів.
+    """
+    cutoff = time.time() - older_than
+    removed = 0
+    while True:
+        rows = db.session.execute(
+            select(ChangeLog.seq, ChangeLog.user_id)
+            .where(ChangeLog.deleted, ChangeLog.changed_at < cutoff)
+            .limit(COMPACT_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return removed
+        horizons = {}
+        for seq, user_id in rows:
+            horizons[user_id] = max(horizons.get(user_id, 0), seq)
+        for user_id, seq in horizons.items():
+            db.session.execute(
+                update(User).where(User.id == user_id, User.sync_horizon < seq)
+                .values(sync_horizon=seq)
+                # sync_horizon не входить у знімок користувача (див. app/usercache.py)
+                .execution_options(synchronize_session=False, preserves_user_cache=True)
+            )
+        db.session.execute(delete(ChangeLog).where(ChangeLog.seq.in_([seq for seq, _ in rows])))
+        db.session.commit()
+        removed += len(rows)
+
+
+sync_cli = AppGroup('sync', help='Delta sync change log.')
+
+
+@sync_cli.command('compact')
+@click.option('--older-than', type=float, default=None,
+              help='Tombstone age in seconds (default: SYNC_TOMBSTONE_TTL).')
+def compact_command(older_than):
+    """Delete old tombstones; clients with older cursors must resync."""
+    if older_than is None:
+        older_than = current_app.config['SYNC_TOMBSTONE_TTL']
+    click.echo(f'Removed {compact(older_than)} tombstones.')
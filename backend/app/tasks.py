@@ -0,0 +1,345 @@
+# Важкі операції над подорожами та їхні фонові задачі (див. jobs.py)
+#
+# Оптимізація маршруту спільна для синхронного роуту і задачі 'optimize'.
+# Імпорт, експорт і заповнення адрес у фоні працюють пачками: після кожної
+# пачки - контрольна точка (прогрес, перевірка скасування, для імпорту й
+# адрес - фіксація транзакції разом з проміжним результатом). Повторна
+# спроба продовжує з останньої контрольної точки, а не з початку.
+
+import io
+import os
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+
+from . import db, exporters, geocoding
+from .importers import DATE_RE, PARSERS, ImportFormatError, validate_record
+from .itinerary import plan_days
+from .jobs import JobFailed, handler, output_path
+from .models import Destination, Trip, UsageCounter, ORDER_GAP
+from .optimizer import haversine_matrix, optimize_order
+
+# З RETURNING SQLAlchemy відправляє пачку одним INSERT з багатьма VALUES (insertmanyvalues),
+# а не executemany по рядку: тригер індексу пошуку (FTS5) скидає зміни в кінці
+# кожної інструкції, тож так це відбувається раз на пачку, а не на кожен рядок
+IMPORT_INSERT = insert(Destination).returning(Destination.id)
+
+# Скільки пунктів геокодувати між контрольними точками (Nominatim - ~1 запит на секунду)
+ADDRESS_BATCH_SIZE = 10
+
+
+def _own_trip(context):
+    """Подорож задачі; її могли видалити, поки задача чекала в черзі."""
+    trip = db.session.get(Trip, context.params['trip_id'])
+    if trip is None or trip.user_id != context.user_id:
+        raise JobFailed('Trip not found')
+    return trip
+
+
+# ------------------------------------------------------
+# Оптимізація маршруту
+# ------------------------------------------------------
+
+def optimize_options(dests, data):
+    """
+    Перевіряє параметри оптимізації (start_id, end_id, time_budget_ms) для
+    пунктів 'dests'. Повертає (start_id, end_id, budget_ms) або кидає ValueError.
+    """
+    if len(dests) < 3:
+        raise ValueError("You need at least 3 destinations to optimize a route.")
+
+    dest_ids = {dest.id for dest in dests}
+    start_id = data.get('start_id', dests[0].id)
+    end_id = data.get('end_id')
+    if (start_id is not None and start_id not in dest_ids) or \
+            (end_id is not None and end_id not in dest_ids):
+        raise ValueError("start_id/end_id must belong to this trip")
+
+    budget_ms = data.get('time_budget_ms', current_app.config['ROUTE_OPTIMIZE_TIME_BUDGET_MS'])
+    if not isinstance(budget_ms, (int, float)) or budget_ms <= 0:
+        raise ValueError("time_budget_ms must be a positive number")
+    return start_id, end_id, min(budget_ms, current_app.config['ROUTE_OPTIMIZE_MAX_TIME_BUDGET_MS'])
+
+
+def optimize_route(trip, dests, start_id, end_id, budget_ms):
+    """
+    Оптимізує порядок пунктів і зберігає його в сесії (commit - на боці виклику).
+    Повертає to_dict() подорожі в новому порядку з 'distance_km'.
+    """
+    index_by_id = {dest.id: i for i, dest in enumerate(dests)}
+    dist = haversine_matrix([d.lat for d in dests], [d.lng for d in dests])
+    order, distance_km = optimize_order(
+        dist,
+        start=index_by_id.get(start_id),
+        end=index_by_id.get(end_id),
+        time_budget=budget_ms / 1000.0
+    )
+
+    # Відповідь формуємо до commit(), щоб не перечитувати кожен об'єкт після нього
+    trip_data = trip.to_dict(destinations=[dests[i] for i in order])
+    trip_data['distance_km'] = round(distance_km, 3)
+    mappings = []
+    for index, dest_data in enumerate(trip_data['destinations']):
+        dest_data['order_index'] = (index + 1) * ORDER_GAP
+        mappings.append({'id': dest_data['id'], 'order_index': dest_data['order_index']})
+
+    # Зберігаємо новий порядок однією транзакцією (executemany)
+    db.session.execute(update(Destination), mappings)
+    Trip.bump_version(trip.id, trip.user_id)
+    return trip_data
+
+
+@handler('optimize')
+def optimize_job(context):
+    trip = _own_trip(context)
+    dests = trip.destinations.all()
+    try:
+        options = optimize_options(dests, context.params)
+    except ValueError as e:
+        # Пункти змінились, поки задача чекала в черзі
+        raise JobFailed(str(e))
+    trip_data = optimize_route(trip, dests, *options)
+    return {
+        'distance_km': trip_data['distance_km'],
+        'destination_ids': [dest['id'] for dest in trip_data['destinations']]
+    }
+
+
+# ------------------------------------------------------
+# Розподіл по днях
+# ------------------------------------------------------
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def plan_days_options(dests, data):
+    """
+    Перевіряє параметри розподілу пунктів 'dests' (словники select_dicts) по
+    днях: days або day_minutes, visit_minutes, speed_kmh, start_date,
+    time_budget_ms. Повертає словник опцій або кидає ValueError.
+    """
+    config = current_app.config
+    if not dests:
+        raise ValueError("The trip has no destinations to plan")
+
+    days, day_minutes = data.get('days'), data.get('day_minutes')
+    if (days is None) == (day_minutes is None):
+        raise ValueError("Specify either days or day_minutes")
+    max_days = config['PLAN_DAYS_MAX_DAYS']
+    if days is not None and (not isinstance(days, int) or isinstance(days, bool) or not 1 <= days <= max_days):
+        raise ValueError(f"days must be an integer between 1 and {max_days}")
+
+    visit_minutes = data.get('visit_minutes', config['PLAN_DAYS_VISIT_MINUTES'])
+    if not _is_number(visit_minutes) or visit_minutes < 0:
+        raise ValueError("visit_minutes must be a non-negative number")
+    if day_minutes is not None and (not _is_number(day_minutes) or day_minutes <= 0 or day_minutes < visit_minutes):
+        raise ValueError("day_minutes must be a positive number not less than visit_minutes")
+    speed_kmh = data.get('speed_kmh', config['PLAN_DAYS_SPEED_KMH'])
+    if not _is_number(speed_kmh) or speed_kmh <= 0:
+        raise ValueError("speed_kmh must be a positive number")
+
+    start_date = data.get('start_date')
+    if start_date is None:
+        # За замовчуванням - найраніша вже призначена дата, інакше сьогодні
+        dates = [dest['visit_date'] for dest in dests if dest['visit_date'] and DATE_RE.match(dest['visit_date'])]
+        start_date = min(dates) if dates else date.today().isoformat()
+    try:
+        start_date = date.fromisoformat(start_date) if DATE_RE.match(str(start_date)) else None
+    except ValueError:
+        start_date = None
+    if start_date is None:
+        raise ValueError("start_date must be YYYY-MM-DD")
+
+    budget_ms = data.get('time_budget_ms', config['ROUTE_OPTIMIZE_TIME_BUDGET_MS'])
+    if not _is_number(budget_ms) or budget_ms <= 0:
+        raise ValueError("time_budget_ms must be a positive number")
+    return {
+        'days': days,
+        'day_minutes': day_minutes,
+        'visit_minutes': visit_minutes,
+        'speed_kmh': speed_kmh,
+        'start_date': start_date,
+        'time_budget_ms': min(budget_ms, config['ROUTE_OPTIMIZE_MAX_TIME_BUDGET_MS'])
+    }
+
+
+def plan_trip_days(trip, dests, options, save=True):
+    """
+    Розподіляє пункти 'dests' (словники select_dicts у поточному порядку) по
+    днях. Перший день - той, де поточний перший пункт. Повертає словник
+    подорожі з пунктами в новому порядку (з visit_date), 'days' і
+    'distance_km'. З save=True дати й порядок записуються одним executemany
+    (commit - на боці виклику). Кидає ValueError, якщо дні не вміщуються.
+    """
+    plan = plan_days(
+        [dest['lat'] for dest in dests], [dest['lng'] for dest in dests],
+        days=options['days'],
+        day_minutes=options['day_minutes'],
+        visit_minutes=options['visit_minutes'],
+        speed_kmh=options['speed_kmh'],
+        max_days=current_app.config['PLAN_DAYS_MAX_DAYS'],
+        time_budget=options['time_budget_ms'] / 1000.0
+    )
+
+    destinations, days = [], []
+    for day, (indexes, distance_km) in enumerate(plan):
+        visit_date = (options['start_date'] + timedelta(days=day)).isoformat()
+        for index in indexes:
+            dest = dests[index]
+            dest['visit_date'] = visit_date
+            dest['order_index'] = (len(destinations) + 1) * ORDER_GAP
+            destinations.append(dest)
+        days.append({
+            'date': visit_date,
+            'destination_ids': [dests[index]['id'] for index in indexes],
+            'distance_km': round(distance_km, 3),
+            'minutes': round(len(indexes) * options['visit_minutes'] + distance_km / options['speed_kmh'] * 60)
+        })
+
+    trip_data = trip.to_dict(include_destinations=False)
+    trip_data['destinations'] = destinations
+    trip_data['days'] = days
+    trip_data['distance_km'] = round(sum(day['distance_km'] for day in days), 3)
+    if save:
+        db.session.execute(update(Destination), [
+            {'id': dest['id'], 'order_index': dest['order_index'], 'visit_date': dest['visit_date']}
+            for dest in destinations
+        ])
+        Trip.bump_version(trip.id, trip.user_id)
+    return trip_data
+
+
+# ------------------------------------------------------
+# Імпорт
+# ------------------------------------------------------
+
+@handler('import')
+def import_job(context):
+    """
+    Імпорт файлу з вхідних даних задачі. На відміну від синхронного роуту,
+    кожна пачка фіксується окремо: прогрес видно під час імпорту, а після
+    перезапуску імпорт продовжується з рядка останньої контрольної точки.
+    """
+    trip = _own_trip(context)
+    payload = context.payload
+    stream = io.BytesIO(payload)
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    max_errors = current_app.config['IMPORT_MAX_ERRORS']
+    state = context.result or {'row': 0, 'imported': 0, 'failed': 0, 'errors': []}
+    resume_row = state['row']
+    order_index = Destination.next_order_index(trip.id)
+    batch = []
+
+    def flush(row, position):
+        if batch:
+            db.session.execute(IMPORT_INSERT, batch)
+            Trip.bump_version(trip.id, trip.user_id)
+            UsageCounter.add('destinations', len(batch))
+            state['imported'] += len(batch)
+            batch.clear()
+        state['row'] = row
+        context.checkpoint(position, len(payload), state)
+
+    row = resume_row
+    try:
+        for row, record in PARSERS[context.params['format']](stream):
+            if row <= resume_row:
+                continue
+            try:
+                values = validate_record(record)
+            except ValueError as e:
+                state['failed'] += 1
+                if len(state['errors']) < max_errors:
+                    state['errors'].append({"row": row, "error": str(e)})
+                continue
+            values['trip_id'] = trip.id
+            values['order_index'] = order_index
+            order_index += ORDER_GAP
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush(row, stream.tell())
+    except ImportFormatError as e:
+        raise JobFailed(str(e))
+    # Наприкінці парсер уже закрив потік
+    flush(row, len(payload))
+    return {key: state[key] for key in ('imported', 'failed', 'errors')}
+
+
+# ------------------------------------------------------
+# Експорт
+# ------------------------------------------------------
+
+@handler('export')
+def export_job(context):
+    """Експорт у файл JOBS_OUTPUT_DIR (завантаження - GET /api/jobs/<id>/download)."""
+    fmt = context.params['format']
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    rows = exporters.export_rows(exporters.scope_filter(context.params['scope']), batch_size)
+    exported = 0
+
+    def counted():
+        nonlocal exported
+        for row in rows:
+            exported += 1
+            if exported % batch_size == 0:
+                context.report(exported)
+            yield row
+
+    path = output_path(context.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.part'
+    try:
+        with open(partial, 'w', encoding='utf-8') as output:
+            for chunk in exporters.generate(fmt, counted()):
+                output.write(chunk)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    _, extension = exporters.FORMATS[fmt]
+    return {
+        'format': fmt,
+        'rows': exported,
+        'bytes': os.path.getsize(path),
+        'filename': f"{context.params['filename']}.{extension}"
+    }
+
+
+# ------------------------------------------------------
+# Адреси пунктів (зворотне геокодування)
+# ------------------------------------------------------
+
+@handler('addresses')
+def addresses_job(context):
+    """
+    Заповнює порожні адреси пунктів подорожі через зворотне геокодування.
+    Недоступність геокодера - звичайна помилка задачі: вона повториться
+    пізніше і продовжить з пунктів, які ще не мають адреси. Якщо для точки
+    адреси немає, зберігається порожній рядок, щоб не питати про неї знову.
+    """
+    trip = _own_trip(context)
+    state = context.result or {'updated': 0, 'unresolved': 0}
+    missing = (Destination.trip_id == trip.id, Destination.address.is_(None))
+    remaining = db.session.scalar(select(func.count()).select_from(Destination).where(*missing))
+    total = state['updated'] + state['unresolved'] + remaining
+
+    while True:
+        rows = db.session.execute(
+            select(Destination.id, Destination.lat, Destination.lng)
+            .where(*missing).order_by(Destination.id).limit(ADDRESS_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        mappings = []
+        # Геокодер сам фіксує свій кеш у сесії, тож адреси записуємо вже після всіх звернень
+        for dest_id, lat, lng in rows:
+            address = (geocoding.reverse(lat, lng).get('display_name') or '')[:255]
+            state['updated' if address else 'unresolved'] += 1
+            mappings.append({'id': dest_id, 'address': address})
+        db.session.execute(update(Destination), mappings)
+        Trip.bump_version(trip.id, trip.user_id)
+        context.checkpoint(state['updated'] + state['unresolved'], total, state)
+    return state
@@ -0,0 +1,193 @@
+# Кеш користувачів для Flask-Login
+#
+# Кожен запит з @login_required завантажує поточного користувача. Замість
+# SELECT на кожен запит користувач береться з кешу у вигляді знімка
+# (UserSnapshot) з полями User.to_dict(). Запис видаляється з кешу, щойно
+# рядок користувача змінюється (ORM-оновлення, видалення або масовий UPDATE),
+# а TTL обмежує час життя запису в інших воркерах.
+#
+# За замовчуванням кеш живе в пам'яті процесу; якщо задано USER_CACHE_REDIS_URL,
+# використовується Redis, спільний для всіх воркерів.
+
+import json
+import logging
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from . import db, login_manager
+from .cache import TTLCache
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class UserSnapshot(UserMixin):
+    """Незмінна копія даних користувача (те, що повертає User.to_dict())."""
+
+    def __init__(self, data):
+        self._data = data
+        self.id = data['id']
+        self.username = data['username']
+        self.email = data['email']
+        self.is_admin = data['is_admin']
+
+    def to_dict(self):
+        return dict(self._data)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+
+class _LocalBackend:
+    """In-process LRU з TTL (окремий у кожному воркері)."""
+
+    def __init__(self, config):
+        self.cache = TTLCache(maxsize=config['USER_CACHE_SIZE'], ttl=config['USER_CACHE_TTL'])
+
+    def get(self, user_id):
+        return self.cache.get(user_id)
+
+    def set(self, user_id, data):
+        self.cache.set(user_id, data)
+
+    def delete(self, user_ids):
+        for user_id in user_ids:
+            self.cache.delete(user_id)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class _RedisBackend:
+    """Спільний для всіх воркерів кеш у Redis (потрібен пакет 'redis')."""
+
+    PREFIX = 'travel-planner:user:'
+
+    def __init__(self, config):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("USER_CACHE_REDIS_URL requires the 'redis' package (pip install redis)")
+        self.client = redis.Redis.from_url(config['USER_CACHE_REDIS_URL'], socket_timeout=0.5)
+        self.ttl = config['USER_CACHE_TTL']
+        self.errors = (redis.RedisError,)
+
+    def get(self, user_id):
+        try:
+            raw = self.client.get(f'{self.PREFIX}{user_id}')
+        except self.errors as e:
+            # Redis недоступний - завантажуємо користувача з БД
+            logger.warning('User cache read failed: %s', e)
+            return None
+        return json.loads(raw) if raw else None
+
+    def set(self, user_id, data):
+        try:
+            self.client.set(f'{self.PREFIX}{user_id}', json.dumps(data), ex=self.ttl)
+        except self.errors as e:
+            logger.warning('User cache write failed: %s', e)
+
+    def delete(self, user_ids):
+        try:
+            self.client.delete(*[f'{self.PREFIX}{user_id}' for user_id in user_ids])
+        except self.errors as e:
+            logger.warning('User cache invalidation failed: %s', e)
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(f'{self.PREFIX}*'))
+            if keys:
+                self.client.delete(*keys)
+        except self.errors as e:
+            logger.warning('User cache invalidation failed: %s', e)
+
+
+def init_app(app):
+    if app.config['USER_CACHE_REDIS_URL']:
+        app.extensions['user_cache'] = _RedisBackend(app.config)
+    else:
+        app.extensions['user_cache'] = _LocalBackend(app.config)
+
+
+def _backend():
+    return current_app.extensions['user_cache'] if has_app_context() else None
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    """
+    Flask-Login вимагає цю функцію, щоб знати, як завантажити
+    користувача з сесії за його ID. Зазвичай SELECT не виконується.
+    """
+    user_id = int(user_id)
+    backend = _backend()
+    data = backend.get(user_id)
+    if data is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        data = user.to_dict()
+        backend.set(user_id, data)
+    return UserSnapshot(data)
+
+
+# ------------------------------------------------------
+# Інвалідація
+# ------------------------------------------------------
+# Запис видаляється одразу після flush (щоб цей же запит не побачив старих
+# даних) і ще раз після commit: інакше паралельний запит міг би між flush
+# і commit прочитати з БД і закешувати ще старий рядок.
+
+def _pending(session):
+    return session.info.setdefault('user_cache_invalidate', set())
+
+
+def _invalidate_user(mapper, connection, target):
+    backend = _backend()
+    if backend is None:
+        return
+    _pending(object_session(target)).add(target.id)
+    backend.delete([target.id])
+
+
+event.listen(User, 'after_update', _invalidate_user)
+event.listen(User, 'after_delete', _invalidate_user)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _invalidate_bulk(orm_execute_state):
+    """Масові UPDATE/DELETE користувачів: невідомо, які рядки змінено - чистимо весь кеш."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not User:
+        return
+    # Запити, що не змінюють полів знімка (напр. User.bump_version), позначені явно
+    if orm_execute_state.execution_options.get('preserves_user_cache'):
+        return
+    backend = _backend()
+    if backend is not None:
+        orm_execute_state.session.info['user_cache_clear'] = True
+        backend.clear()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _after_commit(session):
+    user_ids = session.info.pop('user_cache_invalidate', None)
+    clear = session.info.pop('user_cache_clear', False)
+    backend = _backend()
+    if backend is None:
+        return
+    if clear:
+        backend.clear()
+    elif user_ids:
+        backend.delete(user_ids)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('user_cache_invalidate', None)
+    session.info.pop('user_cache_clear', None)
@@ -0,0 +1,129 @@
+# Погода для всіх пунктів подорожі одним запитом (проксі до OpenWeatherMap)
+#
+# Координати прив'язуються до клітинки сітки WEATHER_GRID_DEG, тож сусідні
+# пункти та різні користувачі ділять один запис кешу. Застарілий запис
+# віддається одразу (stale-while-revalidate), а оновлюється у фоні. Помилка
+# теж запам'ятовується для клітинки на WEATHER_ERROR_TTL: коли OpenWeatherMap
+# недоступний чи відхиляє ключ, запити не йдуть до нього знову по кожній точці.
+# Кількість одночасних звернень до OpenWeatherMap обмежена розміром пулу потоків.
+
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from flask import current_app
+
+from .cache import MISSING, SingleFlight, TTLCache
+
+
+class WeatherError(Exception):
+    """Сервіс погоди недоступний або не налаштований."""
+
+
+class _WeatherState:
+    """Стан сервісу погоди для одного додатку."""
+
+    def __init__(self, config):
+        self.base_url = config['OPENWEATHER_URL'].rstrip('/')
+        self.api_key = config['OPENWEATHER_API_KEY']
+        self.grid = config['WEATHER_GRID_DEG']
+        self.fresh_ttl = config['WEATHER_FRESH_TTL']
+        self.stale_ttl = config['WEATHER_STALE_TTL']
+        self.timeout = config['WEATHER_TIMEOUT']
+        # Запис живе в кеші fresh + stale секунд; після fresh він вважається застарілим
+        self.cache = TTLCache(maxsize=config['WEATHER_CACHE_SIZE'], ttl=self.fresh_ttl + self.stale_ttl)
+        # Клітинки, запит по які нещодавно завершився помилкою
+        self.failures = TTLCache(maxsize=config['WEATHER_CACHE_SIZE'], ttl=config['WEATHER_ERROR_TTL'])
+        self.flight = SingleFlight()
+        self.pool = ThreadPoolExecutor(max_workers=config['WEATHER_MAX_CONCURRENCY'],
+                                       thread_name_prefix='weather')
+
+
+def init_app(app):
+    app.extensions['weather'] = _WeatherState(app.config)
+
+
+def snap(lat, lng, grid):
+    """Центр клітинки сітки, до якої належить точка."""
+    return (round((math.floor(lat / grid) + 0.5) * grid, 4),
+            round((math.floor(lng / grid) + 0.5) * grid, 4))
+
+
+def _fetch(state, cell):
+    """Запит до OpenWeatherMap для центру клітинки; результат кладеться в кеш."""
+    lat, lng = cell
+    params = {'lat': lat, 'lon': lng, 'appid': state.api_key, 'units': 'metric', 'lang': 'en'}
+    try:
+        with urlopen(f'{state.base_url}/data/2.5/weather?{urlencode(params)}', timeout=state.timeout) as response:
+            data = json.loads(response.read().decode('utf-8'))
+        summary = {
+            'temp': data['main']['temp'],
+            'description': data['weather'][0]['description'],
+            'icon': data['weather'][0]['icon']
+        }
+    except (HTTPError, URLError, TimeoutError, ValueError, KeyError, IndexError) as e:
+        state.failures.set(cell, True)
+        raise WeatherError(f'Weather request failed: {e}')
+    state.failures.delete(cell)
+    state.cache.set(cell, (time.monotonic(), summary))
+    return summary
+
+
+def _load(state, cell):
+    return state.flight.do(cell, lambda: _fetch(state, cell))
+
+
+def _refresh_in_background(state, cell):
+    if state.failures.get(cell):
+        return
+
+    def refresh():
+        # Кілька запитів могли одночасно побачити застарілий запис - оновлюємо лише раз
+        value, _ = state.cache.get_entry(cell)
+        if value is not MISSING and time.monotonic() - value[0] <= state.fresh_ttl:
+            return
+        try:
+            _load(state, cell)
+        except WeatherError:
+            # Залишаємо застарілий запис; спроба повториться після WEATHER_ERROR_TTL
+            pass
+    state.pool.submit(refresh)
+
+
+def for_points(points):
+    """
+    Погода для списку (lat, lng). Повертає список тієї ж довжини;
+    для точок, для яких погоду отримати не вдалося, - None.
+    """
+    state = current_app.extensions['weather']
+    if not state.api_key:
+        raise WeatherError('OpenWeatherMap API key not configured')
+
+    cells = [snap(lat, lng, state.grid) for lat, lng in points]
+    found, futures = {}, {}
+    now = time.monotonic()
+    for cell in set(cells):
+        value, expires_at = state.cache.get_entry(cell)
+        if value is MISSING or expires_at < now:
+            if state.failures.get(cell):
+                found[cell] = None
+            else:
+                futures[cell] = state.pool.submit(_load, state, cell)
+            continue
+        fetched_at, summary = value
+        found[cell] = summary
+        if now - fetched_at > state.fresh_ttl:
+            _refresh_in_background(state, cell)
+
+    deadline = time.monotonic() + state.timeout
+    for cell, future in futures.items():
+        try:
+            found[cell] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except (WeatherError, FutureTimeoutError):
+            found[cell] = None
+    return [found[cell] for cell in cells]
@@ -0,0 +1,11 @@
+# Бенчмарки бекенду (працюють офлайн на SQLite)
+#
+#   python -m benchmarks generate --scale small    # синтетичні дані
+#   python -m benchmarks run --scale small         # мікробенчмарки + навантаження
+#   python -m benchmarks run --save-baseline       # записати нову базову лінію
+#   python -m benchmarks concurrency               # SQLite з профілем БД і без нього
+#   python -m benchmarks payload                   # JSON-провайдери та стиснення великої подорожі
+#
+# Команди запускаються з теки backend/. Результати пишуться в JSON і
+# порівнюються з benchmarks/baseline.json: якщо час або кількість SQL-запитів
+# погіршились понад допуск, `run` завершується з кодом 1.
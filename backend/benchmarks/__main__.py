@@ -0,0 +1,240 @@
+import argparse
+import os
+import sys
+
+from .common import (BASELINE_PATH, BENCH_DIR, BENCH_PASSWORD, SCALES, compare, copy_db, default_db_path,
+                     graph_dir_for, make_app, metadata, read_json, write_json)
+
+
+def _sizes(args):
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key, None) is not None:
+            sizes[key] = getattr(args, key)
+    return sizes
+
+
+def cmd_generate(args):
+    from .datagen import generate
+
+    db_path = args.db or default_db_path(args.scale)
+    sizes = _sizes(args)
+    print(f'Generating {args.scale} dataset in {db_path}: ' + ', '.join(f'{v} {k}' for k, v in sizes.items()))
+    timings = generate(db_path, seed=args.seed, **sizes)
+    print(f'Done in {sum(timings.values()):.1f}s')
+
+
+def cmd_run(args):
+    from app import security
+    from .load import run as run_load
+    from .micro import run as run_micro
+    from .services import FakeServices
+
+    db_path = args.db or default_db_path(args.scale)
+    if not os.path.exists(db_path):
+        args.db = db_path
+        cmd_generate(args)
+    elif not os.path.exists(graph_dir_for(db_path)):
+        # БД згенеровано до появи маршрутизації - добудовуємо лише граф
+        from .datagen import generate_road_graph
+        generate_road_graph(graph_dir_for(db_path), args.seed)
+    results = {'meta': metadata(args.scale, db_path)}
+
+    with FakeServices() as services_url:
+        app = make_app(db_path, NOMINATIM_URL=services_url, OPENWEATHER_URL=services_url,
+                       OPENWEATHER_API_KEY='benchmark')
+        try:
+            if args.only in (None, 'micro'):
+                print('Micro-benchmarks:')
+                results['micro'], results['operations'], missing = run_micro(
+                    app, BENCH_PASSWORD, args.iterations, only=args.benchmark)
+                for endpoint in missing:
+                    print(f'Route {endpoint} has no benchmark; add one to benchmarks/micro.py', file=sys.stderr)
+                if missing:
+                    return 1
+            if args.only in (None, 'load'):
+                print(f'Load test ({args.vus} virtual users, {args.duration}s):')
+                results['load'] = run_load(app, BENCH_PASSWORD, _sizes(args)['users'], args.vus, args.duration,
+                                           seed=args.seed)
+        finally:
+            security.shutdown(app)
+
+    write_json(args.out, results)
+    print(f'Results written to {args.out}')
+
+    if args.save_baseline:
+        # Частковий запуск (--only) оновлює лише свої розділи базової лінії
+        baseline = read_json(args.baseline) if args.only and os.path.exists(args.baseline) else {}
+        baseline.update(results)
+        write_json(args.baseline, baseline)
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare with (use --save-baseline)')
+        return 0
+    baseline = read_json(args.baseline)
+    if baseline['meta']['scale'] != args.scale:
+        print(f"Baseline was recorded at scale '{baseline['meta']['scale']}'; skipping comparison")
+        return 0
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    for line in regressions:
+        print(f'REGRESSION {line}', file=sys.stderr)
+    if regressions:
+        return 1
+    print('No regressions against the baseline.')
+    return 0
+
+
+def cmd_concurrency(args):
+    """Та сама навантажувальна суміш на двох копіях БД: без профілю БД і з ним."""
+    import tempfile
+
+    from app import security
+    from .load import WRITE_HEAVY_MIX, run as run_load
+
+    db_path = args.db or default_db_path(args.scale)
+    if not os.path.exists(db_path):
+        args.db = db_path
+        cmd_generate(args)
+
+    results = {'meta': metadata(args.scale, db_path)}
+    with tempfile.TemporaryDirectory(prefix='bench-concurrency-') as workdir:
+        for name, profile in (('default', False), ('profile', True)):
+            copy_path = os.path.join(workdir, f'{name}.db')
+            copy_db(db_path, copy_path)
+
+            print(f"Load test, {'with' if profile else 'without'} the database profile "
+                  f'({args.vus} virtual users, {args.duration}s):')
+            app = make_app(copy_path, DB_PROFILE_ENABLED=profile)
+            try:
+                results[name] = run_load(app, BENCH_PASSWORD, _sizes(args)['users'], args.vus, args.duration,
+                                         seed=args.seed, mix=WRITE_HEAVY_MIX)
+            finally:
+                security.shutdown(app)
+
+    write_json(args.out, results)
+    default, profile = results['default'], results['profile']
+    print(f"Throughput: {default['throughput_rps']} -> {profile['throughput_rps']} req/s; "
+          f"failed requests: {default['errors']} -> {profile['errors']}")
+    print(f'Results written to {args.out}')
+    return 0
+
+
+def cmd_payload(args):
+    """GET великої подорожі з кожним JSON-провайдером і кодуванням (див. payload.py)."""
+    import tempfile
+
+    from app import security
+    from .payload import create_trip, run as run_payload
+
+    db_path = args.db or default_db_path(args.scale)
+    if not os.path.exists(db_path):
+        args.db = db_path
+        cmd_generate(args)
+
+    results = {'meta': metadata(args.scale, db_path), 'trip_size': args.trip_size}
+    with tempfile.TemporaryDirectory(prefix='bench-payload-') as workdir:
+        copy_path = os.path.join(workdir, 'payload.db')
+        copy_db(db_path, copy_path)
+        trip_id = None
+        for provider in ('stdlib', 'orjson'):
+            app = make_app(copy_path, JSON_PROVIDER=provider)
+            try:
+                if trip_id is None:
+                    trip_id = create_trip(app, BENCH_PASSWORD, args.trip_size)
+                print(f'Trip with {args.trip_size} destinations, JSON provider {provider}:')
+                results[provider] = run_payload(app, BENCH_PASSWORD, trip_id, args.iterations)
+            finally:
+                security.shutdown(app)
+
+    write_json(args.out, results)
+    print(f'Results written to {args.out}')
+    return 0
+
+
+def cmd_server(args):
+    """Старт процесу і пам'ять воркерів gunicorn з профілем gunicorn.conf.py (див. server.py)."""
+    import tempfile
+
+    from .server import memory, startup
+
+    db_path = args.db or default_db_path(args.scale)
+    if not os.path.exists(db_path):
+        args.db = db_path
+        cmd_generate(args)
+
+    results = {'meta': metadata(args.scale, db_path)}
+    with tempfile.TemporaryDirectory(prefix='bench-server-') as workdir:
+        copy_path = os.path.join(workdir, 'server.db')
+        copy_db(db_path, copy_path)
+        # Граф маршрутизації читається з каталогу поруч із БД
+        os.symlink(graph_dir_for(db_path), graph_dir_for(copy_path))
+        print(f'Process startup (median of {args.runs} runs):')
+        results['startup'] = startup(copy_path, args.runs)
+        print(f'gunicorn memory ({args.workers} workers):')
+        results['memory'] = memory(copy_path, args.workers, args.requests)
+
+    write_json(args.out, results)
+    print(f'Results written to {args.out}')
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Offline benchmarks on SQLite.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_dataset_options(command):
+        command.add_argument('--scale', choices=sorted(SCALES), default='small')
+        command.add_argument('--db', help='SQLite file (default: benchmarks/data/<scale>.db)')
+        command.add_argument('--seed', type=int, default=1)
+        for key in ('users', 'trips', 'destinations', 'pois'):
+            command.add_argument(f'--{key}', type=int, help=f'Override the number of {key} for the scale')
+
+    generate = commands.add_parser('generate', help='Create a synthetic dataset.')
+    add_dataset_options(generate)
+    generate.set_defaults(handler=cmd_generate)
+
+    run = commands.add_parser('run', help='Run benchmarks and compare with the baseline.')
+    add_dataset_options(run)
+    run.add_argument('--only', choices=('micro', 'load'))
+    run.add_argument('--benchmark', action='append', help='Run only this micro-benchmark (repeatable)')
+    run.add_argument('--iterations', type=int, default=50)
+    run.add_argument('--vus', type=int, default=16, help='Concurrent virtual users in the load test')
+    run.add_argument('--duration', type=float, default=20, help='Load test duration in seconds')
+    run.add_argument('--out', default=os.path.join(BENCH_DIR, 'results.json'))
+    run.add_argument('--baseline', default=BASELINE_PATH)
+    run.add_argument('--save-baseline', action='store_true')
+    run.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown as a fraction')
+    run.add_argument('--min-delta-ms', type=float, default=1.0, help='Ignore slowdowns smaller than this')
+    run.set_defaults(handler=cmd_run)
+
+    concurrency = commands.add_parser('concurrency', help='Compare SQLite throughput with and without the '
+                                                          'database profile (WAL, busy_timeout).')
+    add_dataset_options(concurrency)
+    concurrency.add_argument('--vus', type=int, default=32)
+    concurrency.add_argument('--duration', type=float, default=20)
+    concurrency.add_argument('--out', default=os.path.join(BENCH_DIR, 'concurrency.json'))
+    concurrency.set_defaults(handler=cmd_concurrency)
+
+    payload = commands.add_parser('payload', help='Measure JSON serialization and compression of a large trip.')
+    add_dataset_options(payload)
+    payload.add_argument('--trip-size', type=int, default=500, help='Destinations in the measured trip')
+    payload.add_argument('--iterations', type=int, default=50)
+    payload.add_argument('--out', default=os.path.join(BENCH_DIR, 'payload.json'))
+    payload.set_defaults(handler=cmd_payload)
+
+    server = commands.add_parser('server', help='Measure process startup and gunicorn memory per worker.')
+    add_dataset_options(server)
+    server.add_argument('--runs', type=int, default=5, help='Startup measurements per mode')
+    server.add_argument('--workers', type=int, default=4)
+    server.add_argument('--requests', type=int, default=20, help='Warm-up requests per worker')
+    server.add_argument('--out', default=os.path.join(BENCH_DIR, 'server.json'))
+    server.set_defaults(handler=cmd_server)
+
+    args = parser.parse_args(argv)
+    return args.handler(args) or 0
+
+
+# Процеси пулу хешування паролів (forkserver) повторно імпортують цей модуль
+if __name__ == '__main__':
+    sys.exit(main())
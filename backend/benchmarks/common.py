@@ -0,0 +1,155 @@
+# Спільне для бенчмарків: тестовий додаток, статистика, файли результатів
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+from config import Config
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Пароль усіх згенерованих користувачів
+BENCH_PASSWORD = 'benchmark-password'
+
+# Масштаби: користувачів, подорожей, пунктів призначення, POI
+SCALES = {
+    'tiny': {'users': 20, 'trips': 200, 'destinations': 4000, 'pois': 2000},
+    'small': {'users': 200, 'trips': 4000, 'destinations': 100000, 'pois': 20000},
+    'medium': {'users': 1000, 'trips': 20000, 'destinations': 500000, 'pois': 100000},
+    'large': {'users': 10000, 'trips': 200000, 'destinations': 5000000, 'pois': 500000}
+}
+
+
+def default_db_path(scale):
+    return os.path.join(DATA_DIR, f'{scale}.db')
+
+
+def graph_dir_for(db_path):
+    """Каталог дорожнього графа, згенерованого разом із БД (див. datagen.py)."""
+    return os.path.splitext(os.path.abspath(db_path))[0] + '-routing'
+
+
+def make_app(db_path, **overrides):
+    """Додаток на SQLite-файлі бенчмарку; зовнішні сервіси - лише локальні."""
+    from app import create_app
+
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.abspath(db_path),
+        'ROUTING_GRAPH_DIR': graph_dir_for(db_path),
+        'TESTING': True,
+        'NOMINATIM_URL': 'http://127.0.0.1:9',
+        'GEOCODE_MIN_INTERVAL': 0,
+        'GEOCODE_TIMEOUT': 1,
+        'OPENWEATHER_API_KEY': None,
+        'WEATHER_TIMEOUT': 1,
+        # Фонові задачі бенчмарки виконують самі (jobs.run_pending), без потоку-диспетчера
+        'JOBS_WORKERS': 0,
+        'JOBS_OUTPUT_DIR': os.path.join(DATA_DIR, 'job-output')
+    }
+    settings.update(overrides)
+    return create_app(type('BenchmarkConfig', (Config,), settings))
+
+
+def copy_db(source_path, target_path):
+    """Копія БД бенчмарку для сценаріїв, що її змінюють (з урахуванням вмісту WAL)."""
+    import sqlite3
+
+    source, target = sqlite3.connect(source_path), sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+        # WAL зберігається у файлі БД - для порівняння повертаємо звичайний журнал
+        target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+        source.close()
+
+
+def summarize(durations):
+    """Статистика списку тривалостей (секунди) у мілісекундах."""
+    ordered = sorted(durations)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(pct(50), 3),
+        'p95_ms': round(pct(95), 3),
+        'p99_ms': round(pct(99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+
+def metadata(scale, db_path):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'scale': scale,
+        'database': os.path.basename(db_path),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ------------------------------------------------------
+# Порівняння з базовою лінією
+# ------------------------------------------------------
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Повертає список регресій (рядки). Час порівнюється з допуском 'tolerance'
+    (частка) та мінімальною абсолютною різницею 'min_delta_ms', щоб шум на
+    швидких роутах не давав хибних спрацювань; кількість SQL - точно.
+    """
+    regressions = []
+
+    def slower(name, metric, current, base):
+        if current > base * (1 + tolerance) and current - base > min_delta_ms:
+            regressions.append(f'{name}: {metric} {current:.2f} ms vs baseline {base:.2f} ms')
+
+    for name, base in baseline.get('micro', {}).items():
+        current = results.get('micro', {}).get(name)
+        if current is None:
+            continue
+        slower(name, 'p50', current['p50_ms'], base['p50_ms'])
+        if current.get('sql_statements', 0) > base.get('sql_statements', 0):
+            regressions.append(f"{name}: {current['sql_statements']} SQL statements per request "
+                               f"vs baseline {base['sql_statements']}")
+
+    base_load, current_load = baseline.get('load'), results.get('load')
+    if base_load and current_load:
+        for name, base in base_load['operations'].items():
+            current = current_load['operations'].get(name)
+            if current is not None:
+                slower(f'load.{name}', 'p95', current['p95_ms'], base['p95_ms'])
+        if current_load['throughput_rps'] < base_load['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"load: throughput {current_load['throughput_rps']:.1f} req/s "
+                               f"vs baseline {base_load['throughput_rps']:.1f} req/s")
+    if current_load and current_load['errors']:
+        regressions.append(f"load: {current_load['errors']} failed requests")
+    return regressions
@@ -0,0 +1,228 @@
+# Генератор синтетичних даних для бенчмарків
+#
+# Заповнює схему (через міграції, тож індекси - як у робочій БД) детермінованими
+# даними: користувачі, подорожі навколо випадкових міст, пункти з order_index
+# через ORDER_GAP і назвами з невеликого словника (для пошуку), POI, а також
+# лічильники usage_counter і user.trip_count.
+# Перший користувач - адміністратор. Усі мають пароль BENCH_PASSWORD.
+# Поруч із БД будується дорожній граф (сітка вулиць навколо кожного міста та
+# траси між містами) для роутів /api/route і /api/matrix.
+
+import os
+import random
+import time
+
+from werkzeug.security import generate_password_hash
+
+from .common import BACKEND_DIR, BENCH_PASSWORD, graph_dir_for
+
+BATCH_SIZE = 10000
+
+# Центри міст, навколо яких розкидані пункти подорожей і POI
+CITIES = [
+    (50.4501, 30.5234), (49.8397, 24.0297), (46.4825, 30.7233), (48.6208, 22.2879),
+    (52.2297, 21.0122), (50.0755, 14.4378), (48.2082, 16.3738), (47.4979, 19.0402),
+    (41.9028, 12.4964), (48.8566, 2.3522), (52.5200, 13.4050), (40.4168, -3.7038)
+]
+POI_KINDS = ['cafe', 'restaurant', 'museum', 'hotel', 'viewpoint', 'attraction']
+
+# Назви міст (у порядку CITIES) і слова для назв та нотаток пунктів (для бенчмарку пошуку)
+CITY_NAMES = ['Kyiv', 'Lviv', 'Odesa', 'Uzhhorod', 'Warsaw', 'Prague', 'Vienna', 'Budapest', 'Rome', 'Paris',
+              'Berlin', 'Madrid']
+PLACE_WORDS = ['Museum', 'Cathedral', 'Market', 'Park', 'Castle', 'Gallery', 'Cafe', 'Bridge', 'Square',
+               'Theatre', 'Monastery', 'Tower', 'Hotel', 'Station', 'Viewpoint', 'Lake', 'Palace', 'Library',
+               'Opera', 'Garden']
+NOTE_WORDS = ['tickets', 'booked', 'breakfast', 'sunset', 'closed', 'monday', 'guide', 'photos', 'lunch',
+              'cash', 'parking', 'queue', 'early', 'dinner', 'souvenirs', 'walk', 'museum', 'market', 'tram',
+              'metro']
+
+# Сітка вулиць навколо міста: крок і півширина (градуси), кожна N-та вулиця - головна
+STREET_STEP = 0.005
+STREET_HALF_LAT = 0.25
+STREET_HALF_LNG = 0.35
+MAIN_STREET_EVERY = 5
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _split(total, parts, rng):
+    """Розбиває 'total' на 'parts' невід'ємних частин із розкидом навколо середнього."""
+    if parts == 0:
+        return []
+    weights = [rng.uniform(0.2, 1.8) for _ in range(parts)]
+    scale = total / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    for i in range(total - sum(counts)):
+        counts[i % parts] += 1
+    return counts
+
+
+def _line(points, highway, **tags):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'LineString', 'coordinates': [[round(lng, 6), round(lat, 6)] for lat, lng in points]},
+        'properties': {'highway': highway, **tags}
+    }
+
+
+def road_features(rng):
+    """Синтетична дорожня мережа у форматі GeoJSON-екстракту (див. app/routing.py)."""
+    rows = int(round(2 * STREET_HALF_LAT / STREET_STEP)) + 1
+    columns = int(round(2 * STREET_HALF_LNG / STREET_STEP)) + 1
+    jitter = STREET_STEP / 4
+    for lat0, lng0 in CITIES:
+        # Перехрестя зсунуті випадково: на ідеальній сітці забагато рівноцінних шляхів
+        grid = [[(lat0 - STREET_HALF_LAT + i * STREET_STEP + rng.uniform(-jitter, jitter),
+                  lng0 - STREET_HALF_LNG + j * STREET_STEP + rng.uniform(-jitter, jitter))
+                 for j in range(columns)] for i in range(rows)]
+        # Центр міста - точно в центрі (там починаються траси)
+        grid[rows // 2][columns // 2] = (lat0, lng0)
+        for i in range(rows):
+            main = i % MAIN_STREET_EVERY == 0
+            tags = {} if main or rng.random() > 0.1 else {'oneway': rng.choice(['yes', '-1'])}
+            yield _line(grid[i], 'secondary' if main else 'residential', **tags)
+        for j in range(columns):
+            main = j % MAIN_STREET_EVERY == 0
+            yield _line([row[j] for row in grid], 'secondary' if main else 'residential')
+    # Траси між сусідніми містами (від центру до центру, перетини - без з'єднань)
+    for (lat1, lng1), (lat2, lng2) in zip(CITIES, CITIES[1:]):
+        steps = max(2, int(max(abs(lat2 - lat1), abs(lng2 - lng1)) / 0.05))
+        yield _line([(lat1 + (lat2 - lat1) * k / steps, lng1 + (lng2 - lng1) * k / steps) for k in range(steps + 1)],
+                    'trunk')
+
+
+def generate_road_graph(graph_dir, seed=1, log=print):
+    """Будує дорожній граф бенчмарку в 'graph_dir'. Повертає тривалість (секунди)."""
+    from app import routing
+    from config import Config
+
+    started = time.perf_counter()
+    meta = routing.build(routing.iter_geojson_ways(road_features(random.Random(seed))), graph_dir,
+                         Config.ROUTING_LANDMARKS, Config.ROUTING_CELL_DEG, log=lambda message: None)
+    elapsed = time.perf_counter() - started
+    log(f"  road graph: {meta['nodes']} nodes, {meta['edges']} edges in {elapsed:.1f}s")
+    return elapsed
+
+
+def generate(db_path, users, trips, destinations, pois, seed=1, log=print):
+    """Створює БД 'db_path' з нуля. Повертає тривалості етапів (секунди)."""
+    from flask_migrate import upgrade
+    from sqlalchemy import insert
+
+    from app import db, init_migrations, poi
+    from app.models import ORDER_GAP, Destination, Trip, UsageCounter, User
+    from .common import make_app
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    rng = random.Random(seed)
+    timings = {}
+
+    app = make_app(db_path, PASSWORD_HASH_WORKERS=0)
+    init_migrations(app)
+    with app.app_context():
+        started = time.perf_counter()
+        upgrade(directory=os.path.join(BACKEND_DIR, 'migrations'))
+        timings['migrate'] = time.perf_counter() - started
+
+        connection = db.session.connection()
+        # Лише на час генерації: дані можна перегенерувати, тож надійність не потрібна
+        connection.exec_driver_sql('PRAGMA synchronous = OFF')
+        connection.exec_driver_sql('PRAGMA journal_mode = MEMORY')
+
+        # Користувачі: один хеш на всіх (хешування 10k паролів зайняло б хвилини)
+        started = time.perf_counter()
+        password_hash = generate_password_hash(BENCH_PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+        owners = [rng.randint(1, users) for _ in range(trips)]
+        trip_counts = [0] * (users + 1)
+        for owner in owners:
+            trip_counts[owner] += 1
+        for batch in _batches({
+            'id': n,
+            'username': f'user{n}',
+            'email': f'user{n}@example.com',
+            'password_hash': password_hash,
+            'is_admin': n == 1,
+            'data_version': 0,
+            'trip_count': trip_counts[n]
+        } for n in range(1, users + 1)):
+            connection.execute(insert(User.__table__), batch)
+        timings['users'] = time.perf_counter() - started
+        log(f'  {users} users in {timings["users"]:.1f}s')
+
+        started = time.perf_counter()
+        for batch in _batches({'id': n, 'name': f'Trip {n}', 'user_id': owners[n - 1], 'version': 0}
+                              for n in range(1, trips + 1)):
+            connection.execute(insert(Trip.__table__), batch)
+        timings['trips'] = time.perf_counter() - started
+        log(f'  {trips} trips in {timings["trips"]:.1f}s')
+
+        started = time.perf_counter()
+
+        def destination_rows():
+            for trip_id, count in enumerate(_split(destinations, trips, rng), start=1):
+                city = rng.randrange(len(CITIES))
+                lat0, lng0 = CITIES[city]
+                for position in range(count):
+                    yield {
+                        'name': f'{rng.choice(PLACE_WORDS)} {CITY_NAMES[city]} {position + 1}',
+                        'address': None,
+                        'lat': round(lat0 + rng.uniform(-0.2, 0.2), 6),
+                        'lng': round(lng0 + rng.uniform(-0.3, 0.3), 6),
+                        'visit_date': f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+                        if rng.random() < 0.3 else None,
+                        'notes': ' '.join(rng.sample(NOTE_WORDS, 4)) if rng.random() < 0.2 else None,
+                        'order_index': (position + 1) * ORDER_GAP,
+                        'trip_id': trip_id
+                    }
+
+        # RETURNING - щоб пачка йшла багаторядковими INSERT, а не executemany (див. import_destinations)
+        destination_insert = insert(Destination.__table__).returning(Destination.__table__.c.id)
+        for batch in _batches(destination_rows()):
+            connection.execute(destination_insert, batch)
+        timings['destinations'] = time.perf_counter() - started
+        log(f'  {destinations} destinations in {timings["destinations"]:.1f}s '
+            f'({destinations / max(timings["destinations"], 1e-9):.0f} rows/s)')
+
+        # Міграція вже створила лічильники (з нулями)
+        for name, value in (('users', users), ('trips', trips), ('destinations', destinations)):
+            UsageCounter.add(name, value)
+
+        # POI - через той самий шлях, що й `flask poi ingest`
+        started = time.perf_counter()
+
+        def poi_records():
+            for n in range(1, pois + 1):
+                lat0, lng0 = rng.choice(CITIES)
+                kind = rng.choice(POI_KINDS)
+                yield {
+                    'osm_type': 'node',
+                    'osm_id': n,
+                    'kind': kind,
+                    'name': f'{kind.title()} {n}',
+                    'lat': round(lat0 + rng.uniform(-0.1, 0.1), 6),
+                    'lng': round(lng0 + rng.uniform(-0.15, 0.15), 6),
+                    'tags': None
+                }
+
+        poi.ingest(poi_records(), app.config['POI_INGEST_BATCH_SIZE'], app.config['POI_CELL_DEG'])
+        timings['pois'] = time.perf_counter() - started
+        log(f'  {pois} POIs in {timings["pois"]:.1f}s ({pois / max(timings["pois"], 1e-9):.0f} rows/s)')
+
+        db.session.commit()
+        started = time.perf_counter()
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql('ANALYZE')
+        timings['analyze'] = time.perf_counter() - started
+    timings['road_graph'] = generate_road_graph(graph_dir_for(db_path), seed, log)
+    return timings
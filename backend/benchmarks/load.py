@@ -0,0 +1,157 @@
+# Навантажувальний сценарій: паралельні користувачі через справжній HTTP-сервер
+#
+# Додаток запускається на багатопотоковому сервері werkzeug на 127.0.0.1.
+# Кожен віртуальний користувач входить під власним обліковим записом і
+# виконує суміш операцій: вхід, список подорожей, подорож, PATCH пункту,
+# зміна порядку. Вхід навмисно входить у суміш: хешування паролів не повинно
+# гальмувати інші запити (p99 списку подорожей під час входів).
+
+import json
+import random
+import threading
+import time
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+# Частки операцій у суміші
+MIX = {
+    'login': 0.05,
+    'list_trips': 0.40,
+    'get_trip': 0.25,
+    'patch_destination': 0.20,
+    'reorder': 0.10
+}
+
+# Суміш для порівняння профілів БД (python -m benchmarks concurrency): більше записів
+WRITE_HEAVY_MIX = {
+    'list_trips': 0.30,
+    'get_trip': 0.20,
+    'patch_destination': 0.35,
+    'reorder': 0.15
+}
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class _VirtualUser:
+    def __init__(self, base_url, username, password, seed):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.rng = random.Random(seed)
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+        self.trips = {}  # trip_id -> [destination_id, ...] у поточному порядку
+
+    def call(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = Request(self.base_url + path, data=data, method=method,
+                          headers={'Content-Type': 'application/json'} if data else {})
+        with self.opener.open(request, timeout=30) as response:
+            return json.loads(response.read() or b'null')
+
+    def login(self):
+        for _ in range(10):
+            try:
+                self.call('POST', '/api/auth/login', {'username': self.username, 'password': self.password})
+                return
+            except HTTPError as e:
+                # Пул хешування перевантажений (одночасний вхід усіх користувачів на старті)
+                if e.code != 503:
+                    raise
+                time.sleep(float(e.headers.get('Retry-After', 1)))
+        raise HTTPError(self.base_url, 503, 'Login kept failing with 503', None, None)
+
+    def list_trips(self):
+        trips = self.call('GET', '/api/trips')
+        self.trips = {t['id']: [d['id'] for d in t['destinations']] for t in trips if t['destinations']}
+
+    def get_trip(self):
+        trip_id = self.rng.choice(list(self.trips))
+        trip = self.call('GET', f'/api/trips/{trip_id}')
+        self.trips[trip_id] = [d['id'] for d in trip['destinations']]
+
+    def patch_destination(self):
+        dest_id = self.rng.choice(self.trips[self.rng.choice(list(self.trips))])
+        self.call('PATCH', f'/api/destinations/{dest_id}', {'notes': f'Load note {self.rng.random():.6f}'})
+
+    def reorder(self):
+        trip_id = self.rng.choice(list(self.trips))
+        ids = self.trips[trip_id]
+        self.rng.shuffle(ids)
+        self.call('POST', f'/api/trips/{trip_id}/destinations/reorder', {'destination_ids': ids})
+
+
+def run(app, password, users, vus, duration, seed=1, mix=MIX, log=print):
+    """Запускає 'vus' віртуальних користувачів на 'duration' секунд; повертає статистику."""
+    from .common import summarize
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_QuietHandler)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    names, weights = zip(*mix.items())
+    samples = {name: [] for name in names}
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(vus + 1)
+
+    def worker(number):
+        vu = _VirtualUser(base_url, f'user{number % users + 1}', password, seed + number)
+        try:
+            vu.login()
+            vu.list_trips()
+        except (HTTPError, URLError) as e:
+            with lock:
+                errors.append(f'setup: {e}')
+        start_barrier.wait()
+        deadline = time.monotonic() + duration
+        if not vu.trips:
+            return
+        while time.monotonic() < deadline:
+            name = vu.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                getattr(vu, name)()
+            except (HTTPError, URLError, TimeoutError) as e:
+                with lock:
+                    errors.append(f'{name}: {e}')
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples[name].append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(vus)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.monotonic()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    server.shutdown()
+    server.server_close()
+
+    operations = {name: summarize(values) for name, values in samples.items() if values}
+    total = sum(len(values) for values in samples.values())
+    for name, stats in operations.items():
+        log(f"  {name:<20} n={stats['count']:<6} p50 {stats['p50_ms']:>8.2f} ms  "
+            f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms")
+    for error in errors[:10]:
+        log(f'  error: {error}')
+    result = {
+        'virtual_users': vus,
+        'duration_s': round(elapsed, 2),
+        'requests': total,
+        'errors': len(errors),
+        'throughput_rps': round(total / elapsed, 1),
+        'operations': operations
+    }
+    log(f"  {total} requests, {result['throughput_rps']} req/s, {len(errors)} errors")
+    return result
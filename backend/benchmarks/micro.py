@@ -0,0 +1,480 @@
+# Мікробенчмарки всіх роутів API через Flask test client
+#
+# Кожен бенчмарк - одна ітерація: підготовка та прибирання виконуються
+# звичайними запитами, а вимірюється лише виклик b.timed(...). Для нього
+# записуються тривалість і кількість SQL-запитів. Роути, для яких немає
+# жодного бенчмарку, вважаються помилкою (як у `flask check-query-plans`).
+
+import time
+import uuid
+
+from sqlalchemy import event, func
+
+BENCHMARKS = []
+
+
+def benchmark(endpoint, iterations=None):
+    """Реєструє бенчмарк роуту 'endpoint'; 'iterations' - для важких роутів."""
+    def decorator(fn):
+        BENCHMARKS.append((fn.__name__, endpoint, fn, iterations))
+        return fn
+    return decorator
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class _Bench:
+    """Стан бенчмарків: клієнт адміністратора, тестова подорож, лічильник SQL."""
+
+    def __init__(self, app, password):
+        self.app = app
+        self.password = password
+        self.client = app.test_client()
+        self.counting = False
+        self.statements = 0
+        self.samples = []
+        self.iteration = 0
+
+    def on_execute(self, *args):
+        if self.counting:
+            self.statements += 1
+
+    def request(self, method, url, expected, client=None, **kwargs):
+        response = (client or self.client).open(url, method=method, **kwargs)
+        # Потокові відповіді виконують запити лише під час читання тіла
+        body = response.get_data()
+        if response.status_code != expected:
+            raise BenchmarkError(f'{method} {url} returned {response.status_code}, '
+                                 f'expected {expected}: {body[:200]!r}')
+        return response
+
+    def timed(self, method, url, expected, client=None, **kwargs):
+        self.statements = 0
+        self.counting = True
+        started = time.perf_counter()
+        try:
+            response = self.request(method, url, expected, client=client, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.counting = False
+        self.samples.append((elapsed, self.statements))
+        return response
+
+    def login(self, client, username):
+        self.request('POST', '/api/auth/login', 200, client=client,
+                     json={'username': username, 'password': self.password})
+
+    def new_trip(self):
+        return self.request('POST', '/api/trips', 201, json={'name': 'Scratch'}).get_json()['id']
+
+
+# ------------------------------------------------------
+# Автентифікація
+# ------------------------------------------------------
+
+@benchmark('main.register')
+def register(b):
+    from app import db
+    from app.models import UsageCounter, User
+
+    name = f'bench-{uuid.uuid4().hex[:12]}'
+    b.timed('POST', '/api/auth/register', 201, client=b.app.test_client(), json={
+        'username': name, 'email': f'{name}@example.com',
+        'password': b.password, 'confirmPassword': b.password
+    })
+    with b.app.app_context():
+        User.query.filter_by(username=name).delete()
+        UsageCounter.add('users', -1)
+        db.session.commit()
+
+
+@benchmark('main.login')
+def login(b):
+    b.timed('POST', '/api/auth/login', 200, client=b.app.test_client(),
+            json={'username': 'user2', 'password': b.password})
+
+
+@benchmark('main.logout')
+def logout(b):
+    client = b.app.test_client()
+    b.login(client, 'user2')
+    b.timed('POST', '/api/auth/logout', 200, client=client)
+
+
+@benchmark('main.status')
+def status(b):
+    b.timed('GET', '/api/auth/status', 200)
+
+
+# ------------------------------------------------------
+# Подорожі
+# ------------------------------------------------------
+
+@benchmark('main.get_trips')
+def get_trips(b):
+    b.timed('GET', '/api/trips', 200)
+
+
+@benchmark('main.get_trips')
+def get_trips_page(b):
+    b.timed('GET', '/api/trips?limit=20', 200)
+
+
+@benchmark('main.get_trips')
+def get_trips_summary(b):
+    b.timed('GET', '/api/trips?summary=1', 200)
+
+
+@benchmark('main.get_trips')
+def get_trips_not_modified(b):
+    etag = b.request('GET', '/api/trips', 200).headers['ETag']
+    b.timed('GET', '/api/trips', 304, headers={'If-None-Match': etag})
+
+
+@benchmark('main.get_trip')
+def get_trip(b):
+    b.timed('GET', f'/api/trips/{b.trip_id}', 200)
+
+
+@benchmark('main.create_trip')
+def create_trip(b):
+    trip_id = b.timed('POST', '/api/trips', 201, json={'name': 'Benchmark trip'}).get_json()['id']
+    b.request('DELETE', f'/api/trips/{trip_id}', 204)
+
+
+@benchmark('main.delete_trip')
+def delete_trip(b):
+    trip_id = b.new_trip()
+    b.timed('DELETE', f'/api/trips/{trip_id}', 204)
+
+
+@benchmark('main.export_trips', iterations=10)
+def export_trips(b):
+    b.timed('GET', '/api/trips/export?format=geojson', 200)
+
+
+@benchmark('main.export_trip')
+def export_trip(b):
+    b.timed('GET', f'/api/trips/{b.trip_id}/export?format=gpx', 200)
+
+
+# ------------------------------------------------------
+# Пункти призначення
+# ------------------------------------------------------
+
+@benchmark('main.add_destination')
+def add_destination(b):
+    dest_id = b.timed('POST', f'/api/trips/{b.trip_id}/destinations', 201,
+                      json={'name': 'Benchmark stop', 'lat': 50.45, 'lon': 30.52}).get_json()['id']
+    b.request('DELETE', f'/api/destinations/{dest_id}', 204)
+
+
+@benchmark('main.import_destinations', iterations=10)
+def import_destinations(b):
+    trip_id = b.new_trip()
+    rows = ''.join(f'Imported {n},{50 + n / 1000:.4f},{30 + n / 1000:.4f}\n' for n in range(1000))
+    b.timed('POST', f'/api/trips/{trip_id}/destinations/import?format=csv', 201,
+            data=('name,lat,lng\n' + rows).encode('utf-8'))
+    b.request('DELETE', f'/api/trips/{trip_id}', 204)
+
+
+@benchmark('main.delete_destination')
+def delete_destination(b):
+    dest_id = b.request('POST', f'/api/trips/{b.trip_id}/destinations', 201,
+                        json={'name': 'Benchmark stop', 'lat': 50.45, 'lon': 30.52}).get_json()['id']
+    b.timed('DELETE', f'/api/destinations/{dest_id}', 204)
+
+
+@benchmark('main.update_destination')
+def update_destination(b):
+    b.timed('PATCH', f'/api/destinations/{b.dest_ids[0]}', 200,
+            json={'notes': f'Benchmark note {b.iteration}'})
+
+
+@benchmark('main.reorder_destinations')
+def reorder_destinations(b):
+    b.dest_ids.reverse()
+    b.timed('POST', f'/api/trips/{b.trip_id}/destinations/reorder', 200,
+            json={'destination_ids': b.dest_ids})
+
+
+@benchmark('main.move_destination')
+def move_destination(b):
+    b.timed('POST', f'/api/destinations/{b.dest_ids[0]}/move', 200, json={'after_id': b.dest_ids[-1]})
+    b.dest_ids.append(b.dest_ids.pop(0))
+
+
+@benchmark('main.optimize_trip', iterations=10)
+def optimize_trip(b):
+    b.timed('POST', f'/api/trips/{b.trip_id}/optimize', 200, json={'time_budget_ms': 50})
+
+
+@benchmark('main.plan_trip_days', iterations=10)
+def plan_trip_days(b):
+    b.timed('POST', f'/api/trips/{b.trip_id}/plan-days', 200, json={'days': 3, 'time_budget_ms': 50})
+
+
+@benchmark('main.plan_trip_days', iterations=10)
+def plan_trip_days_preview(b):
+    b.timed('POST', f'/api/trips/{b.trip_id}/plan-days?preview=1', 200,
+            json={'day_minutes': 480, 'time_budget_ms': 50})
+
+
+@benchmark('main.run_batch')
+def run_batch(b):
+    response = b.timed('POST', '/api/batch', 200, json={'operations': [
+        {'op': 'create_trip', 'name': 'Batch trip'},
+        {'op': 'create_destination', 'trip_id': '$0', 'name': 'Batch 1', 'lat': 48.62, 'lon': 22.29},
+        {'op': 'create_destination', 'trip_id': '$0', 'name': 'Batch 2', 'lat': 48.63, 'lon': 22.30},
+        {'op': 'move_destination', 'id': '$2', 'before_id': '$1'},
+        {'op': 'update_destination', 'id': b.dest_ids[1], 'notes': f'Batched note {b.iteration}'}
+    ]})
+    trip_id = response.get_json()['results'][0]['data']['id']
+    b.request('DELETE', f'/api/trips/{trip_id}', 204)
+
+
+# ------------------------------------------------------
+# Геокодування, погода, POI (зовнішні сервіси - локальні, див. services.py)
+# ------------------------------------------------------
+
+@benchmark('main.geocode')
+def geocode(b):
+    b.timed('GET', '/api/geocode?q=Kyiv', 200)
+
+
+@benchmark('main.reverse_geocode')
+def reverse_geocode(b):
+    b.timed('GET', '/api/reverse-geocode?lat=50.4501&lng=30.5234', 200)
+
+
+@benchmark('main.trip_weather')
+def trip_weather(b):
+    b.timed('GET', f'/api/trips/{b.trip_id}/weather', 200)
+
+
+@benchmark('main.find_poi')
+def find_poi(b):
+    b.timed('GET', '/api/poi?lat=50.4501&lng=30.5234&radius=1000&type=cafe', 200)
+
+
+# ------------------------------------------------------
+# Пошук
+# ------------------------------------------------------
+
+@benchmark('main.search')
+def search(b):
+    # Поширене слово: збігається з кожним ~20-м пунктом користувача
+    b.timed('GET', '/api/search?q=museum', 200)
+
+
+@benchmark('main.search')
+def search_prefix(b):
+    b.timed('GET', '/api/search?q=cast%20ky', 200)
+
+
+@benchmark('main.search')
+def search_not_modified(b):
+    etag = b.request('GET', '/api/search?q=museum', 200).headers['ETag']
+    b.timed('GET', '/api/search?q=museum', 304, headers={'If-None-Match': etag})
+
+
+# ------------------------------------------------------
+# Дельта-синхронізація
+# ------------------------------------------------------
+
+@benchmark('main.sync_changes')
+def sync_full(b):
+    # Перша сторінка повної синхронізації (SYNC_PAGE_SIZE записів журналу)
+    b.timed('GET', '/api/sync', 200)
+
+
+@benchmark('main.sync_changes')
+def sync_delta(b):
+    # Типовий випадок: з попередньої синхронізації змінився один пункт
+    from app import db
+    from app.models import Destination
+
+    b.request('PATCH', f'/api/destinations/{b.dest_ids[0]}', 200, json={'notes': f'Synced note {b.iteration}'})
+    with b.app.app_context():
+        cursor = db.session.get(Destination, b.dest_ids[0]).change_seq - 1
+    b.timed('GET', f'/api/sync?since={cursor}', 200)
+
+
+@benchmark('main.sync_changes')
+def sync_not_modified(b):
+    etag = b.request('GET', '/api/sync?since=1', 200).headers['ETag']
+    b.timed('GET', '/api/sync?since=1', 304, headers={'If-None-Match': etag})
+
+
+# ------------------------------------------------------
+# Маршрути (дорожній граф бенчмарку, див. datagen.road_features)
+# ------------------------------------------------------
+
+@benchmark('main.trip_route', iterations=10)
+def trip_route(b):
+    b.timed('GET', f'/api/route?trip_id={b.trip_id}', 200)
+
+
+@benchmark('main.trip_route')
+def trip_route_not_modified(b):
+    etag = b.request('GET', f'/api/route?trip_id={b.trip_id}', 200).headers['ETag']
+    b.timed('GET', f'/api/route?trip_id={b.trip_id}', 304, headers={'If-None-Match': etag})
+
+
+@benchmark('main.trip_matrix', iterations=3)
+def trip_matrix(b):
+    b.timed('GET', f'/api/matrix?trip_id={b.trip_id}', 200)
+
+
+# ------------------------------------------------------
+# Фонові задачі (диспетчера немає: задачу виконує jobs.run_pending)
+# ------------------------------------------------------
+
+def _export_job(b):
+    """Виконана задача експорту тестової подорожі (одна на весь прогін)."""
+    if getattr(b, 'export_job_id', None) is None:
+        from app import jobs
+
+        b.export_job_id = b.request('POST', f'/api/trips/{b.trip_id}/export?format=ndjson', 202).get_json()['id']
+        jobs.run_pending(b.app)
+    return b.export_job_id
+
+
+@benchmark('main.optimize_trip')
+def optimize_trip_async(b):
+    job = b.timed('POST', f'/api/trips/{b.trip_id}/optimize?async=1', 202, json={'time_budget_ms': 50}).get_json()
+    b.request('POST', f"/api/jobs/{job['id']}/cancel", 200)
+
+
+@benchmark('main.import_destinations', iterations=10)
+def import_destinations_async(b):
+    rows = ''.join(f'Imported {n},{50 + n / 1000:.4f},{30 + n / 1000:.4f}\n' for n in range(1000))
+    job = b.timed('POST', f'/api/trips/{b.trip_id}/destinations/import?format=csv&async=1', 202,
+                  data=('name,lat,lng\n' + rows).encode('utf-8')).get_json()
+    b.request('POST', f"/api/jobs/{job['id']}/cancel", 200)
+
+
+@benchmark('main.fill_trip_addresses')
+def fill_trip_addresses(b):
+    job = b.timed('POST', f'/api/trips/{b.trip_id}/addresses', 202).get_json()
+    b.request('POST', f"/api/jobs/{job['id']}/cancel", 200)
+
+
+@benchmark('main.get_job')
+def get_job(b):
+    b.timed('GET', f'/api/jobs/{_export_job(b)}', 200)
+
+
+@benchmark('main.cancel_job')
+def cancel_job(b):
+    job = b.request('POST', f'/api/trips/{b.trip_id}/addresses', 202).get_json()
+    b.timed('POST', f"/api/jobs/{job['id']}/cancel", 200)
+
+
+@benchmark('main.download_job_output')
+def download_job_output(b):
+    b.timed('GET', f'/api/jobs/{_export_job(b)}/download', 200)
+
+
+# ------------------------------------------------------
+# Адміністрування
+# ------------------------------------------------------
+
+@benchmark('main.get_all_users')
+def get_all_users(b):
+    b.timed('GET', '/api/admin/users', 200)
+
+
+@benchmark('main.get_all_users')
+def get_all_users_search(b):
+    b.timed('GET', '/api/admin/users?q=user12', 200)
+
+
+@benchmark('main.admin_stats')
+def admin_stats(b):
+    b.timed('GET', '/api/admin/stats', 200)
+
+
+@benchmark('main.admin_export', iterations=3)
+def admin_export(b):
+    b.timed('GET', '/api/admin/export', 200)
+
+
+# ------------------------------------------------------
+# Запуск
+# ------------------------------------------------------
+
+def _poi_ingest(app, rows):
+    """Завантаження POI (шлях `flask poi ingest`), у транзакції, що відкочується."""
+    from app import db, poi
+
+    records = ({'osm_type': 'node', 'osm_id': n, 'kind': 'cafe', 'name': f'Cafe {n}',
+                'lat': 50 + n % 1000 / 1000, 'lng': 30 + n // 1000 / 1000, 'tags': None}
+               for n in range(rows))
+    with app.app_context():
+        started = time.perf_counter()
+        poi.ingest(records, app.config['POI_INGEST_BATCH_SIZE'], app.config['POI_CELL_DEG'])
+        db.session.flush()
+        elapsed = time.perf_counter() - started
+        db.session.rollback()
+    return {'rows': rows, 'seconds': round(elapsed, 3), 'rows_per_s': round(rows / elapsed)}
+
+
+def run(app, password, iterations, only=None, log=print):
+    """Повертає ({назва: статистика}, {операція: статистика}, непокриті роути)."""
+    from app import db
+    from app.models import Destination, Trip
+    from .common import summarize
+
+    bench = _Bench(app, password)
+    bench.login(bench.client, 'user1')
+    with app.app_context():
+        # Тестова подорож - подорож адміністратора з найбільшою кількістю пунктів
+        bench.trip_id = (
+            db.session.query(Destination.trip_id)
+            .join(Trip, Trip.id == Destination.trip_id)
+            .filter(Trip.user_id == 1)
+            .group_by(Destination.trip_id)
+            .order_by(func.count().desc())
+            .limit(1)
+            .scalar()
+        )
+        if bench.trip_id is None:
+            raise BenchmarkError('The benchmark database has no destinations for user1')
+        bench.dest_ids = [d.id for d in Destination.query.filter_by(trip_id=bench.trip_id)
+                          .order_by(Destination.order_index)]
+        engine = db.engine
+
+    results = {}
+    event.listen(engine, 'before_cursor_execute', bench.on_execute)
+    try:
+        for name, endpoint, fn, fixed_iterations in BENCHMARKS:
+            if only and name not in only:
+                continue
+            count = min(fixed_iterations or iterations, iterations)
+            bench.samples = []
+            # Перша ітерація прогріває кеші й не враховується
+            for bench.iteration in range(count + 1):
+                fn(bench)
+            samples = bench.samples[1:]
+            stats = summarize([elapsed for elapsed, _ in samples])
+            stats['endpoint'] = endpoint
+            # Медіана: окремі ітерації можуть промахнутись повз кеш (TTL)
+            stats['sql_statements'] = sorted(statements for _, statements in samples)[len(samples) // 2]
+            results[name] = stats
+            log(f"  {name:<28} p50 {stats['p50_ms']:>9.2f} ms  p95 {stats['p95_ms']:>9.2f} ms  "
+                f"{stats['sql_statements']:>3} SQL")
+    finally:
+        event.remove(engine, 'before_cursor_execute', bench.on_execute)
+
+    operations = {}
+    if not only:
+        operations['poi_ingest'] = _poi_ingest(app, 50000)
+        log(f"  {'poi_ingest':<28} {operations['poi_ingest']['rows_per_s']} rows/s")
+
+    covered = {endpoint for _, endpoint, _, _ in BENCHMARKS}
+    missing = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                     if rule.endpoint.startswith('main.') and rule.endpoint not in covered)
+    return results, operations, missing
@@ -0,0 +1,84 @@
+# Серіалізація та стиснення великої відповіді: GET /api/trips/<id> на 500 пунктів
+#
+# Для кожного JSON-провайдера (stdlib, orjson) і кодування (без стиснення,
+# gzip, brotli) вимірюються повний запит через test client і байти у
+# відповіді. Окремо - складові: побудова словників (ORM to_dict проти
+# рядків select_dicts), серіалізація та стиснення вже готового тіла.
+
+import time
+
+from .common import summarize
+
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+def _timed(fn, iterations):
+    durations = []
+    for _ in range(iterations + 1):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    # Перша ітерація прогріває кеші й не враховується
+    return summarize(durations[1:])
+
+
+def create_trip(app, password, destinations):
+    """Подорож користувача user1 з 'destinations' пунктами (через імпорт CSV)."""
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'user1', 'password': password})
+    trip_id = client.post('/api/trips', json={'name': 'Payload benchmark'}).get_json()['id']
+    rows = ''.join(f'Stop {n},{50 + n / 1000:.6f},{30 + n / 1000:.6f},2026-05-{n % 28 + 1:02d},'
+                   f'Note {n} for the payload benchmark\n' for n in range(destinations))
+    response = client.post(f'/api/trips/{trip_id}/destinations/import?format=csv',
+                           data=('name,lat,lng,visit_date,notes\n' + rows).encode('utf-8'))
+    if response.status_code != 201 or response.get_json()['imported'] != destinations:
+        raise RuntimeError(f'Could not create the benchmark trip: {response.get_data()[:200]!r}')
+    return trip_id
+
+
+def run(app, password, trip_id, iterations, log=print):
+    """Вимірювання для одного додатку (провайдер задано в його конфігурації)."""
+    from app import compression, db
+    from app.models import Destination, Trip, rows_to_dicts
+
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'user1', 'password': password})
+    url = f'/api/trips/{trip_id}'
+    results = {'provider': type(app.json).__name__, 'requests': {}}
+
+    for encoding in ENCODINGS:
+        if encoding == 'br' and compression.brotli is None:
+            continue
+        headers = {'Accept-Encoding': encoding}
+        response = client.get(url, headers=headers)
+        stats = _timed(lambda: client.get(url, headers=headers).get_data(), iterations)
+        stats['bytes'] = len(response.get_data())
+        stats['content_encoding'] = response.headers.get('Content-Encoding', 'identity')
+        results['requests'][encoding] = stats
+        log(f"  {results['provider']:<20} {encoding:<9} p50 {stats['p50_ms']:>8.2f} ms  {stats['bytes']:>8} bytes")
+
+    with app.test_request_context():
+        def orm_dicts():
+            db.session.expunge_all()
+            return Trip.query.get(trip_id).to_dict()
+
+        def row_dicts():
+            return rows_to_dicts(db.session.execute(Destination.select_dicts().where(Destination.trip_id == trip_id)))
+
+        payload = orm_dicts()
+        body = app.json.response(payload).get_data()
+        steps = {
+            'dicts_orm': _timed(orm_dicts, iterations),
+            'dicts_rows': _timed(row_dicts, iterations),
+            'serialize': _timed(lambda: app.json.response(payload).get_data(), iterations)
+        }
+        for encoding in ENCODINGS[1:]:
+            if encoding == 'br' and compression.brotli is None:
+                continue
+            steps[f'compress_{encoding}'] = _timed(lambda: compression.compress(body, encoding, app.config),
+                                                   iterations)
+        db.session.rollback()
+    for name, stats in steps.items():
+        log(f"  {results['provider']:<20} {name:<18} p50 {stats['p50_ms']:>8.2f} ms")
+    results['steps'] = steps
+    return results
@@ -0,0 +1,187 @@
+# Старт процесу і пам'ять воркерів продакшн-профілю (gunicorn.conf.py)
+#
+# startup: новий процес інтерпретатора імпортує run (create_app) і виконує
+#   перший запит; вимірюються час до готовності, перший запит, увесь процес
+#   і пікова RSS. Режим 'eager' додатково імпортує все відкладене
+#   (app/lazy.py, Flask-Migrate), тобто показує старт без відкладених імпортів.
+# memory: gunicorn з профілем на копії БД бенчмарку - з preload_app і без.
+#   Після прогріву (вхід, подорожі, маршрут по графу - numpy) для кожного
+#   воркера читається /proc/<pid>/smaps_rollup: RSS, PSS (спільні сторінки
+#   поділені між процесами, що їх використовують) і USS (лише власні
+#   сторінки). Лише Linux і з установленим gunicorn.
+
+import http.cookiejar
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from .common import BACKEND_DIR, BENCH_PASSWORD, graph_dir_for
+
+STARTUP_SCRIPT = '''
+import json, resource, sys, time
+started = time.perf_counter()
+from run import app
+if sys.argv[1] == 'eager':
+    from app import init_migrations, lazy
+    init_migrations(app)
+    lazy.load_all()
+ready = time.perf_counter()
+app.test_client().get('/api/auth/status')
+print(json.dumps({
+    'ready_ms': (ready - started) * 1000,
+    'first_request_ms': (time.perf_counter() - ready) * 1000,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+'''
+
+# Поля smaps_rollup (кБ)
+SMAPS_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+
+def _env(db_path, **extra):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': 'sqlite:///' + os.path.abspath(db_path),
+        'ROUTING_GRAPH_DIR': graph_dir_for(db_path),
+        'JOBS_WORKERS': '0',
+        'PASSWORD_HASH_WORKERS': '0',
+        'NOMINATIM_URL': 'http://127.0.0.1:9'
+    })
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    env.update(extra)
+    return env
+
+
+def startup(db_path, runs, log=print):
+    """Медіани кількох запусків для режимів 'lazy' і 'eager'."""
+    results = {}
+    for mode in ('lazy', 'eager'):
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, mode], cwd=BACKEND_DIR,
+                                    env=_env(db_path), capture_output=True, text=True, check=True).stdout
+            sample = json.loads(output.strip().splitlines()[-1])
+            sample['process_ms'] = (time.perf_counter() - started) * 1000
+            samples.append(sample)
+        results[mode] = {key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]}
+        log(f"  {mode:6} ready {results[mode]['ready_ms']:7.1f} ms  first request "
+            f"{results[mode]['first_request_ms']:6.1f} ms  process {results[mode]['process_ms']:7.1f} ms  "
+            f"max RSS {results[mode]['max_rss_mb']:6.1f} MB")
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _smaps(pid):
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            name, _, rest = line.partition(':')
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0])
+    return {
+        'rss_mb': values['Rss'] / 1024,
+        'pss_mb': values['Pss'] / 1024,
+        'uss_mb': (values['Private_Clean'] + values['Private_Dirty']) / 1024
+    }
+
+
+def _children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as children:
+        return [int(child) for child in children.read().split()]
+
+
+def _wait_ready(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {process.returncode}')
+        try:
+            urllib.request.urlopen(base_url + '/api/auth/status', timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start in time')
+
+
+def _warm_up(base_url, requests):
+    """Запити через нові з'єднання (urllib не тримає keep-alive), тож їх отримують усі воркери."""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(path, data=None):
+        request = urllib.request.Request(base_url + path, data=data, headers={'Content-Type': 'application/json'})
+        try:
+            with opener.open(request, timeout=30) as response:
+                return json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            # 503 - для подорожі немає дорожнього графа; пам'ять однаково прогріта
+            if e.code != 503:
+                raise
+            return None
+
+    call('/api/auth/login', json.dumps({'username': 'user1', 'password': BENCH_PASSWORD}).encode('utf-8'))
+    trip_id = max(call('/api/trips'), key=lambda trip: len(trip['destinations']))['id']
+    for _ in range(requests):
+        call('/api/trips')
+        call(f'/api/trips/{trip_id}')
+        call(f'/api/route?trip_id={trip_id}')
+
+
+def memory(db_path, workers, requests, log=print):
+    """Пам'ять master і воркерів gunicorn з preload_app і без."""
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        log('  gunicorn is not installed; skipping')
+        return None
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        log('  /proc/<pid>/smaps_rollup is not available (Linux only); skipping')
+        return None
+
+    results = {}
+    for preload in (False, True):
+        port = _free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        env = _env(db_path, GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY=str(workers),
+                   GUNICORN_PRELOAD='true' if preload else 'false', GUNICORN_MAX_REQUESTS='0')
+        with tempfile.TemporaryFile() as output:
+            process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'run:app'],
+                                       cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+            try:
+                _wait_ready(base_url, process)
+                _warm_up(base_url, requests * workers)
+                master = _smaps(process.pid)
+                per_worker = [_smaps(pid) for pid in _children(process.pid)]
+            except Exception:
+                output.seek(0)
+                sys.stderr.write(output.read().decode('utf-8', 'replace')[-2000:])
+                raise
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+
+        name = 'preload' if preload else 'no_preload'
+        results[name] = {
+            'workers': len(per_worker),
+            'master': {key: round(value, 1) for key, value in master.items()},
+            'worker_mean': {key: round(statistics.fmean(w[key] for w in per_worker), 1) for key in master},
+            'total_pss_mb': round(master['pss_mb'] + sum(w['pss_mb'] for w in per_worker), 1)
+        }
+        mean = results[name]['worker_mean']
+        log(f"  {name:10} per worker: RSS {mean['rss_mb']:6.1f} MB  PSS {mean['pss_mb']:6.1f} MB  "
+            f"USS {mean['uss_mb']:6.1f} MB; all processes PSS {results[name]['total_pss_mb']:6.1f} MB")
+    return results
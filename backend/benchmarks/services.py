@@ -0,0 +1,50 @@
+# Локальна заміна Nominatim та OpenWeatherMap
+#
+# Бенчмарки працюють офлайн, але роути геокодування та погоди мають пройти
+# повний шлях (кеш, SingleFlight, запис у geocode_cache), тож зовнішні
+# сервіси підміняються HTTP-сервером на 127.0.0.1 з фіксованими відповідями.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == '/search':
+            body = [{'place_id': 1, 'lat': '50.4501', 'lon': '30.5234',
+                     'display_name': f"{params.get('q', '')}, Ukraine"}]
+        elif url.path == '/reverse':
+            body = {'place_id': 2, 'lat': params.get('lat'), 'lon': params.get('lon'),
+                    'display_name': 'Khreshchatyk St, Kyiv, Ukraine'}
+        elif url.path == '/data/2.5/weather':
+            body = {'main': {'temp': 18.5}, 'weather': [{'description': 'clear sky', 'icon': '01d'}]}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeServices:
+    """Контекстний менеджер: запускає сервер і повертає його базову URL-адресу."""
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
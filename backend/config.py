@@ -22,8 +22,134 @@ class Config:
                               'sqlite:///' + os.path.join(basedir, 'site.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Профіль підключення до БД (див. app/database.py)
+    DB_PROFILE_ENABLED = True
+    DB_SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # читання не блокуються записом
+        'busy_timeout': 5000,  # мс очікування блокування замість "database is locked"
+        'synchronous': 'NORMAL',  # у режимі WAL - без fsync на кожен commit, але без ризику пошкодження БД
+        'cache_size': -64000,  # КіБ сторінкового кешу на з'єднання
+        'temp_store': 'MEMORY'
+    }
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))  # для PostgreSQL/MySQL
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = 10  # секунд очікування вільного з'єднання
+    DB_POOL_RECYCLE = 1800  # секунд; раніше за таймаут простою на боці сервера БД
+    # Репліка для читання в GET-запитах (необов'язково)
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    DB_REPLICA_STICKY_SECONDS = 5  # скільки після запису читати з основної БД
+
     # Налаштування для сесій (cookies)
     SESSION_COOKIE_SAMESITE = 'Lax'
     # У режимі 'production' (на HTTPS) cookies мають бути 'Secure'
     SESSION_COOKIE_SECURE = IS_PRODUCTION
-    SESSION_COOKIE_HTTPONLY = True
\ No newline at end of file
+    SESSION_COOKIE_HTTPONLY = True
+
+    # Оптимізація маршруту (бюджет часу на локальний пошук, мілісекунди)
+    ROUTE_OPTIMIZE_TIME_BUDGET_MS = int(os.environ.get('ROUTE_OPTIMIZE_TIME_BUDGET_MS', 300))
+    ROUTE_OPTIMIZE_MAX_TIME_BUDGET_MS = 2000
+
+    # Розподіл пунктів по днях (див. app/itinerary.py): типовий час на пункт і
+    # швидкість переїздів по прямій для бюджету дня, межа кількості днів
+    PLAN_DAYS_VISIT_MINUTES = 60
+    PLAN_DAYS_SPEED_KMH = 30
+    PLAN_DAYS_MAX_DAYS = 365
+
+    # Масовий імпорт пунктів призначення
+    IMPORT_BATCH_SIZE = 500  # рядків в одній пачці INSERT
+    IMPORT_MAX_ERRORS = 100  # скільки помилок рядків повертати у відповіді
+
+    # Пакетний /api/batch: максимум операцій в одному запиті
+    BATCH_MAX_OPERATIONS = 100
+
+    # Повнотекстовий пошук (див. app/fulltext.py)
+    SEARCH_DEFAULT_LIMIT = 20  # результатів кожного типу
+    SEARCH_MAX_TERMS = 8  # слів у запиті, решта ігнорується
+
+    # Потоковий експорт: скільки рядків читати з БД за раз
+    EXPORT_BATCH_SIZE = 1000
+
+    # Геокодування (проксі до Nominatim з кешем)
+    NOMINATIM_URL = os.environ.get('NOMINATIM_URL') or 'https://nominatim.openstreetmap.org'
+    NOMINATIM_USER_AGENT = os.environ.get('NOMINATIM_USER_AGENT') or 'TravelPlanner/1.0'
+    GEOCODE_TIMEOUT = 10  # секунд на запит до Nominatim
+    GEOCODE_CACHE_TTL = 30 * 24 * 3600  # секунд
+    GEOCODE_MEMORY_CACHE_SIZE = 4096  # записів у in-process LRU
+    GEOCODE_REVERSE_PRECISION = 4  # знаків після коми (~11 м)
+    GEOCODE_MAX_CONCURRENCY = 2  # одночасних запитів до Nominatim
+    GEOCODE_QUEUE_TIMEOUT = 5  # секунд очікування вільного слота, далі 503
+    GEOCODE_MIN_INTERVAL = float(os.environ.get('GEOCODE_MIN_INTERVAL', 1.0))  # секунд між запитами
+
+    # Локальний індекс POI
+    POI_CELL_DEG = 0.01  # розмір клітинки сітки в градусах (після зміни потрібне повторне завантаження)
+    POI_MAX_RADIUS = 5000  # метрів
+    POI_INGEST_BATCH_SIZE = 5000
+
+    # Погода (проксі до OpenWeatherMap; ключ зберігається лише на сервері)
+    OPENWEATHER_URL = os.environ.get('OPENWEATHER_URL') or 'https://api.openweathermap.org'
+    OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY')
+    WEATHER_GRID_DEG = 0.1  # розмір клітинки кешу в градусах (~11 км)
+    WEATHER_FRESH_TTL = 15 * 60  # секунд, поки запис вважається свіжим
+    WEATHER_STALE_TTL = 60 * 60  # скільки ще секунд віддавати застарілий запис, оновлюючи його у фоні
+    WEATHER_ERROR_TTL = 60  # секунд не звертатися до OpenWeatherMap по клітинку після помилки
+    WEATHER_CACHE_SIZE = 10000
+    WEATHER_MAX_CONCURRENCY = 4  # одночасних запитів до OpenWeatherMap
+    WEATHER_TIMEOUT = 5  # секунд
+
+    # Хешування паролів (див. app/security.py)
+    # Метод у форматі werkzeug: 'pbkdf2:sha256:<ітерації>' або 'scrypt:<n>:<r>:<p>'.
+    # Після зміни старі хеші автоматично перераховуються при вході користувача.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # процесів; 0 - хешувати на потоці запиту
+    PASSWORD_HASH_MAX_PENDING = 16  # задач у черзі пулу, далі 503
+    PASSWORD_HASH_TIMEOUT = 10  # секунд очікування результату
+    PASSWORD_HASH_RETRY_AFTER = 1  # значення заголовка Retry-After для 503
+
+    # Кеш користувачів для автентифікованих запитів (див. app/usercache.py)
+    USER_CACHE_TTL = 60  # секунд; верхня межа затримки змін в інших воркерах без Redis
+    USER_CACHE_SIZE = 10000
+    USER_CACHE_REDIS_URL = os.environ.get('USER_CACHE_REDIS_URL')  # напр. redis://localhost:6379/0
+
+    # Локальна маршрутизація (див. app/routing.py; граф будує `flask routing build <екстракт>`)
+    ROUTING_GRAPH_DIR = os.environ.get('ROUTING_GRAPH_DIR') or os.path.join(basedir, 'routing-graph')
+    ROUTING_LANDMARKS = 16  # більше орієнтирів - швидші запити, але +8 байт на вузол за кожен
+    ROUTING_CELL_DEG = 0.01  # клітинка сітки для пошуку найближчого вузла
+    ROUTING_MAX_SNAP_DISTANCE = 1000  # метрів від пункту до найближчої дороги
+    ROUTING_MATRIX_MAX_POINTS = 50
+
+    # Фонові задачі (див. app/jobs.py): черга в таблиці job, без зовнішнього брокера
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))  # одночасних задач у процесі; 0 - не виконувати задачі тут
+    JOBS_EXECUTOR = os.environ.get('JOBS_EXECUTOR') or 'thread'  # thread або process (CPU-важкі задачі не тримають GIL воркера)
+    JOBS_AUTOSTART = True  # запускати диспетчер з першим запитом; інакше - лише `flask jobs work`
+    JOBS_POLL_INTERVAL = 1.0  # секунд між перевірками черги
+    JOBS_LEASE_SECONDS = 60  # оренда задачі; після зупинки воркера задачу перехоплять через цей час
+    JOBS_MAX_ATTEMPTS = 5
+    JOBS_RETRY_BACKOFF = 5  # секунд перед другою спробою, далі вдвічі більше
+    JOBS_RETRY_MAX_BACKOFF = 600
+    JOBS_PROGRESS_INTERVAL = 1.0  # секунд між записами прогресу задач, що лише читають дані
+    JOBS_RETENTION = 7 * 24 * 3600  # секунд зберігати завершені задачі та їхні файли
+    JOBS_MAX_PAYLOAD = 50 * 1024 * 1024  # байт файлу для фонового імпорту
+    JOBS_OUTPUT_DIR = os.environ.get('JOBS_OUTPUT_DIR') or os.path.join(basedir, 'job-output')
+
+    # Дельта-синхронізація (див. app/sync.py)
+    SYNC_PAGE_SIZE = 500  # записів журналу в одній відповіді за замовчуванням
+    SYNC_MAX_PAGE_SIZE = 2000
+    SYNC_TOMBSTONE_TTL = 30 * 24 * 3600  # секунд зберігати надгробки; старіші курсори отримують 410
+
+    # Серіалізація та стиснення відповідей (див. app/jsonprovider.py, app/compression.py)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER') or 'auto'  # auto, orjson або stdlib
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024  # байт; менші відповіді стиснення не окупають
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4  # 0-11; вищі рівні - для статики, а не для кожного запиту
+
+    # Зібраний фронтенд (див. app/assets.py); за замовчуванням frontend/dist
+    ASSETS_DIST_DIR = os.environ.get('ASSETS_DIST_DIR')
+
+    # Метрики продуктивності та /api/metrics (див. app/metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # якщо задано, /api/metrics вимагає 'Authorization: Bearer <token>'
+    METRICS_SLOW_REQUEST_MS = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 500))
+    METRICS_SLOW_QUERY_MS = int(os.environ.get('METRICS_SLOW_QUERY_MS', 100))
+    METRICS_N_PLUS_ONE_THRESHOLD = 10  # однакових SQL за запит, після яких пишемо попередження
+    METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # секунд
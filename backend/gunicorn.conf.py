@@ -0,0 +1,94 @@
+# Профіль продакшн-сервера (gunicorn)
+#
+# Запуск з теки backend/:  gunicorn run:app  (gunicorn сам читає ./gunicorn.conf.py)
+#
+# preload_app: master один раз імпортує додаток разом з відкладеними модулями
+# (app/lazy.py), а воркери отримують його через fork і ділять ці сторінки
+# пам'яті (copy-on-write) - замість окремої копії в кожному воркері. Після
+# fork воркер скидає успадковані пули з'єднань з БД (post_fork). Диспетчер
+# фонових задач і пул хешування паролів master не запускає: вони стартують
+# у кожному воркері з першим запитом, а при виході воркера зупиняються
+# (worker_exit).
+#
+# Пресети (GUNICORN_PROFILE):
+#   threaded (за замовчуванням) - gthread: процес на ядро і кілька потоків у
+#     кожному. Запити здебільшого чекають на БД і зовнішні сервіси, а на час
+#     очікування GIL звільняється.
+#   gevent - один процес на ядро з багатьма greenlet-з'єднаннями (потрібен
+#     пакет gevent). CPU-важкі фонові задачі блокували б цикл подій, тож тут
+#     вони за замовчуванням вимкнені (JOBS_WORKERS=0) - їх виконує окремий
+#     `flask jobs work`.
+# Розмір змінюється через WEB_CONCURRENCY (процеси), GUNICORN_THREADS і
+# GUNICORN_WORKER_CONNECTIONS.
+#
+# Перезапуск:
+#   kill -HUP <master> - нові воркери з новою конфігурацією; з preload_app
+#     вони успадковують код, завантажений master, тож новий код так не підхопиться;
+#   новий код без простою - kill -USR2 <master> (новий master поруч зі старим),
+#     потім kill -WINCH і kill -QUIT старому master.
+# Воркер, що завершується, дочікується поточних запитів і фонових задач
+# GUNICORN_GRACEFUL_TIMEOUT секунд; незавершену задачу після закінчення
+# оренди перехопить інший воркер (див. app/jobs.py).
+
+import multiprocessing
+import os
+
+PROFILE = os.environ.get('GUNICORN_PROFILE') or 'threaded'
+CPUS = multiprocessing.cpu_count()
+
+PRESETS = {
+    'threaded': {'worker_class': 'gthread', 'workers': max(2, CPUS), 'threads': 4},
+    # Одночасних з'єднань на процес; запитам до БД вистачає DB_POOL_SIZE + DB_MAX_OVERFLOW з'єднань пулу
+    'gevent': {'worker_class': 'gevent', 'workers': max(2, CPUS), 'worker_connections': 100}
+}
+if PROFILE not in PRESETS:
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE '{PROFILE}' (use {' or '.join(PRESETS)})")
+preset = PRESETS[PROFILE]
+
+if PROFILE == 'gevent':
+    # Патчі мають передувати імпорту додатку в master (preload_app)
+    from gevent import monkey
+    monkey.patch_all()
+    os.environ.setdefault('JOBS_WORKERS', '0')
+
+bind = os.environ.get('GUNICORN_BIND') or f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = preset['worker_class']
+workers = int(os.environ.get('WEB_CONCURRENCY', preset['workers']))
+threads = int(os.environ.get('GUNICORN_THREADS', preset.get('threads', 1)))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', preset.get('worker_connections', 1000)))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+timeout = 30
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+# Перезапуск воркера після N запитів обмежує ріст пам'яті; з preload_app це лише fork
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+# Файл heartbeat воркерів - у пам'яті, а не на диску контейнера
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from app import lazy
+        # Воркери ще не створені: відкладені модулі, імпортовані тут, будуть спільними
+        lazy.load_all()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import database, db
+        database.dispose_pools(server.app.wsgi(), db)
+
+
+def worker_exit(server, worker):
+    app = getattr(worker, 'wsgi', None)
+    if app is None:
+        return
+    from app import jobs, security
+    jobs.shutdown(app)
+    security.shutdown(app)
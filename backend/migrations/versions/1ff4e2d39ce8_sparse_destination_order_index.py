@@ -0,0 +1,28 @@
+"""Sparse (gap-based) order_index for destinations
+
+Revision ID: 1ff4e2d39ce8
+Revises: d5b520d1eb11
+Create Date: 2026-10-17 10:12:41.318402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1ff4e2d39ce8'
+down_revision = 'd5b520d1eb11'
+branch_labels = None
+depends_on = None
+
+# Має збігатися з app.models.ORDER_GAP
+ORDER_GAP = 1024
+
+
+def upgrade():
+    # Розріджуємо існуючі індекси: порядок зберігається, між сусідами з'являється проміжок
+    op.execute(f'UPDATE destination SET order_index = order_index * {ORDER_GAP}')
+
+
+def downgrade():
+    op.execute(f'UPDATE destination SET order_index = order_index / {ORDER_GAP}')
@@ -0,0 +1,178 @@
+"""Add full-text search index for trips and destinations
+
+Revision ID: 7c3a9e51b2d4
+Revises: 2d8f5b7e4c13
+Create Date: 2026-10-17 18:05:44.209315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3a9e51b2d4'
+down_revision = '2d8f5b7e4c13'
+branch_labels = None
+depends_on = None
+
+# Скільки рядків заповнювати одним запитом (діапазон id)
+BATCH_SIZE = 10000
+
+# ------------------------------------------------------
+# SQLite: таблиці FTS5 і тригери
+# ------------------------------------------------------
+
+# Слова індексу мають префікс власника: search_tokens(user_id, текст) -> 'u42xмузей ...'.
+# Функцію реєструє додаток на кожному з'єднанні (app/fulltext.py).
+# Без видалення діакритики: 'ї' та 'й' - окремі літери, як у PostgreSQL ('simple')
+FTS5_OPTIONS = "tokenize = 'unicode61 remove_diacritics 0'"
+
+SQLITE_UPGRADE = [
+    f'CREATE VIRTUAL TABLE trip_search USING fts5(name, {FTS5_OPTIONS})',
+    f'CREATE VIRTUAL TABLE destination_search USING fts5(name, address, notes, {FTS5_OPTIONS})',
+    # Ваги колонок для ORDER BY rank
+    "INSERT INTO destination_search (destination_search, rank) VALUES ('rank', 'bm25(10.0, 4.0, 1.0)')",
+
+    '''CREATE TRIGGER trip_search_insert AFTER INSERT ON trip BEGIN
+        INSERT INTO trip_search (rowid, name) VALUES (new.id, search_tokens(new.user_id, new.name));
+    END''',
+    '''CREATE TRIGGER trip_search_update AFTER UPDATE OF name ON trip BEGIN
+        UPDATE trip_search SET name = search_tokens(new.user_id, new.name) WHERE rowid = new.id;
+    END''',
+    '''CREATE TRIGGER trip_search_delete AFTER DELETE ON trip BEGIN
+        DELETE FROM trip_search WHERE rowid = old.id;
+    END''',
+
+    '''CREATE TRIGGER destination_search_insert AFTER INSERT ON destination BEGIN
+        INSERT INTO destination_search (rowid, name, address, notes)
+        SELECT new.id, search_tokens(trip.user_id, new.name), search_tokens(trip.user_id, new.address),
+               search_tokens(trip.user_id, new.notes)
+        FROM trip WHERE trip.id = new.trip_id;
+    END''',
+    # Зміна координат чи порядку (order_index) індекс не чіпає
+    '''CREATE TRIGGER destination_search_update AFTER UPDATE OF name, address, notes ON destination BEGIN
+        UPDATE destination_search
+        SET name = search_tokens(trip.user_id, new.name), address = search_tokens(trip.user_id, new.address),
+            notes = search_tokens(trip.user_id, new.notes)
+        FROM trip WHERE trip.id = new.trip_id AND destination_search.rowid = new.id;
+    END''',
+    '''CREATE TRIGGER destination_search_delete AFTER DELETE ON destination BEGIN
+        DELETE FROM destination_search WHERE rowid = old.id;
+    END'''
+]
+
+SQLITE_BACKFILL = {
+    'trip': 'INSERT INTO trip_search (rowid, name) SELECT id, search_tokens(user_id, name) FROM trip '
+            'WHERE id > :start AND id <= :end',
+    'destination': 'INSERT INTO destination_search (rowid, name, address, notes) '
+                   'SELECT destination.id, search_tokens(trip.user_id, destination.name), '
+                   'search_tokens(trip.user_id, destination.address), search_tokens(trip.user_id, destination.notes) '
+                   'FROM destination JOIN trip ON trip.id = destination.trip_id '
+                   'WHERE destination.id > :start AND destination.id <= :end'
+}
+
+SQLITE_DOWNGRADE = [
+    *(f'DROP TRIGGER {table}_search_{event}'
+      for table in ('trip', 'destination') for event in ('insert', 'update', 'delete')),
+    'DROP TABLE destination_search',
+    'DROP TABLE trip_search'
+]
+
+# ------------------------------------------------------
+# PostgreSQL: колонки tsvector, тригери та GIN-індекси
+# ------------------------------------------------------
+
+# Слово з префіксом власника, як у search_tokens: 'u' || user_id || 'x' || слово
+OWNER_WORDS = "regexp_replace(coalesce({row}.{column}, ''), '([[:alnum:]]+)', 'u' || {owner} || 'x\\1', 'g')"
+
+
+def _vector(row, owner, weights):
+    return ' || '.join(
+        f"setweight(to_tsvector('simple', {OWNER_WORDS.format(row=row, column=column, owner=owner)}), '{weight}')"
+        for column, weight in weights
+    )
+
+
+# Ваги: A - назва, B - адреса, C - нотатки. {row} - NEW у тригері або таблиця при заповненні
+TRIP_WEIGHTS = (('name', 'A'),)
+DESTINATION_WEIGHTS = (('name', 'A'), ('address', 'B'), ('notes', 'C'))
+DESTINATION_OWNER = '(SELECT user_id FROM trip WHERE trip.id = NEW.trip_id)'
+
+POSTGRES_UPGRADE = [
+    'ALTER TABLE trip ADD COLUMN search_vector tsvector',
+    'ALTER TABLE destination ADD COLUMN search_vector tsvector',
+    f'''CREATE FUNCTION trip_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {_vector('NEW', 'NEW.user_id', TRIP_WEIGHTS)};
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql''',
+    f'''CREATE FUNCTION destination_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {_vector('NEW', DESTINATION_OWNER, DESTINATION_WEIGHTS)};
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql''',
+    'CREATE TRIGGER trip_search_vector BEFORE INSERT OR UPDATE OF name ON trip '
+    'FOR EACH ROW EXECUTE FUNCTION trip_search_vector()',
+    'CREATE TRIGGER destination_search_vector BEFORE INSERT OR UPDATE OF name, address, notes ON destination '
+    'FOR EACH ROW EXECUTE FUNCTION destination_search_vector()'
+]
+
+POSTGRES_BACKFILL = {
+    'trip': f"UPDATE trip SET search_vector = {_vector('trip', 'trip.user_id', TRIP_WEIGHTS)} "
+            'WHERE id > :start AND id <= :end',
+    'destination': 'UPDATE destination '
+                   f"SET search_vector = {_vector('destination', 'trip.user_id', DESTINATION_WEIGHTS)} "
+                   'FROM trip WHERE trip.id = destination.trip_id '
+                   'AND destination.id > :start AND destination.id <= :end'
+}
+
+# Індекси - після заповнення: так швидше, ніж оновлювати GIN на кожен рядок
+POSTGRES_INDEXES = [
+    'CREATE INDEX ix_trip_search_vector ON trip USING gin (search_vector)',
+    'CREATE INDEX ix_destination_search_vector ON destination USING gin (search_vector)'
+]
+
+POSTGRES_DOWNGRADE = [
+    'DROP TRIGGER destination_search_vector ON destination',
+    'DROP TRIGGER trip_search_vector ON trip',
+    'DROP FUNCTION destination_search_vector()',
+    'DROP FUNCTION trip_search_vector()',
+    'ALTER TABLE destination DROP COLUMN search_vector',
+    'ALTER TABLE trip DROP COLUMN search_vector'
+]
+
+
+def _backfill(bind, statements):
+    """Заповнює індекс для наявних рядків пачками за діапазонами id."""
+    for table, statement in statements.items():
+        max_id = bind.execute(sa.text(f'SELECT MAX(id) FROM {table}')).scalar() or 0
+        for start in range(0, max_id, BATCH_SIZE):
+            bind.execute(sa.text(statement), {'start': start, 'end': start + BATCH_SIZE})
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Тригери створюються до заповнення, тож рядки, додані під час міграції, теж потраплять в індекс
+    if bind.dialect.name == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+        _backfill(bind, SQLITE_BACKFILL)
+    elif bind.dialect.name == 'postgresql':
+        for statement in POSTGRES_UPGRADE:
+            op.execute(statement)
+        _backfill(bind, POSTGRES_BACKFILL)
+        for statement in POSTGRES_INDEXES:
+            op.execute(statement)
+    # Інші БД: пошук недоступний (GET /api/search відповідає 501)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        statements = SQLITE_DOWNGRADE
+    elif bind.dialect.name == 'postgresql':
+        statements = POSTGRES_DOWNGRADE
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
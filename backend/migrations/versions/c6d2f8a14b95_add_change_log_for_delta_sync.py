@@ -0,0 +1,245 @@
+"""Add change log and change sequence columns for delta sync
+
+Revision ID: c6d2f8a14b95
+Revises: a4c81f6d3e27
+Create Date: 2026-10-17 21:03:18.552047
+
+"""
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d2f8a14b95'
+down_revision = 'a4c81f6d3e27'
+branch_labels = None
+depends_on = None
+
+# Скільки рядків заповнювати одним запитом (діапазон id)
+BATCH_SIZE = 10000
+
+# Колонки, зміна яких - зміна об'єкта для клієнта. Trip.version, change_seq
+# та updated_at сюди не входять: інакше кожна зміна пункту записувала б і подорож
+TRACKED_COLUMNS = {
+    'trip': 'name, user_id',
+    'destination': 'name, address, lat, lng, visit_date, notes, order_index, trip_id'
+}
+# Колонка з id подорожі, до якої належить об'єкт
+TRIP_COLUMN = {'trip': 'id', 'destination': 'trip_id'}
+
+LOG_COLUMNS = 'user_id, entity, entity_id, trip_id, deleted, changed_at'
+
+# ------------------------------------------------------
+# SQLite: тригери AFTER
+# ------------------------------------------------------
+
+SQLITE_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+
+# (власник у SELECT, джерело) для рядка {row} (new/old). Надгробок пункту,
+# подорож якого вже видалено, не потрібен: його покриває надгробок подорожі
+SQLITE_OWNER = {
+    'trip': ('{row}.user_id', ''),
+    'destination': ('trip.user_id', ' FROM trip WHERE trip.id = {row}.trip_id')
+}
+
+
+def _sqlite_log(table, row, deleted):
+    owner, source = (part.format(row=row) for part in SQLITE_OWNER[table])
+    return (
+        f"DELETE FROM change_log WHERE entity = '{table}' AND entity_id = {row}.id "
+        f'AND user_id = (SELECT {owner}{source});\n'
+        f'        INSERT INTO change_log ({LOG_COLUMNS}) '
+        f"SELECT {owner}, '{table}', {row}.id, {row}.{TRIP_COLUMN[table]}, {deleted}, {SQLITE_NOW}{source};"
+    )
+
+
+def _sqlite_triggers(table):
+    # UPDATE самого рядка не спрацьовує тригер ... UPDATE OF: change_seq немає серед колонок
+    stamp = f'UPDATE {table} SET change_seq = last_insert_rowid(), updated_at = {SQLITE_NOW} WHERE id = new.id;'
+    return [
+        f'''CREATE TRIGGER {table}_change_insert AFTER INSERT ON {table} BEGIN
+        {_sqlite_log(table, 'new', 0)}
+        {stamp}
+    END''',
+        f'''CREATE TRIGGER {table}_change_update AFTER UPDATE OF {TRACKED_COLUMNS[table]} ON {table} BEGIN
+        {_sqlite_log(table, 'new', 0)}
+        {stamp}
+    END''',
+        f'''CREATE TRIGGER {table}_change_delete AFTER DELETE ON {table} BEGIN
+        {_sqlite_log(table, 'old', 1)}
+    END'''
+    ]
+
+
+SQLITE_UPGRADE = _sqlite_triggers('trip') + _sqlite_triggers('destination')
+
+SQLITE_DOWNGRADE = [
+    f'DROP TRIGGER {table}_change_{event}'
+    for table in ('trip', 'destination') for event in ('insert', 'update', 'delete')
+]
+
+# ------------------------------------------------------
+# PostgreSQL: тригери BEFORE
+# ------------------------------------------------------
+
+POSTGRES_NOW = 'extract(epoch from clock_timestamp())'
+
+# Клас advisory-блокування (перший аргумент pg_advisory_xact_lock)
+SYNC_LOCK_CLASS = 7301
+
+POSTGRES_OWNER = {
+    'trip': '{row}.user_id',
+    'destination': '(SELECT user_id FROM trip WHERE trip.id = {row}.trip_id)'
+}
+
+
+def _postgres_function(table):
+    # Зміни одного користувача серіалізуються блокуванням до кінця транзакції:
+    # інакше транзакція з меншим seq могла б зафіксуватись після більшого,
+    # і клієнт, що вже отримав більший курсор, пропустив би її зміни
+    log = (
+        "DELETE FROM change_log WHERE user_id = owner_id AND entity = '{table}' AND entity_id = {row}.id;\n"
+        f'            INSERT INTO change_log ({LOG_COLUMNS}) '
+        "VALUES (owner_id, '{table}', {row}.id, {row}.{trip}, {deleted}, " + POSTGRES_NOW + ')'
+    )
+    old = log.format(table=table, row='OLD', trip=TRIP_COLUMN[table], deleted='true')
+    new = log.format(table=table, row='NEW', trip=TRIP_COLUMN[table], deleted='false')
+    return f'''CREATE FUNCTION {table}_change_log() RETURNS trigger AS $$
+    DECLARE
+        owner_id integer;
+        change_id bigint;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            owner_id := {POSTGRES_OWNER[table].format(row='OLD')};
+            IF owner_id IS NOT NULL THEN
+                PERFORM pg_advisory_xact_lock({SYNC_LOCK_CLASS}, owner_id);
+                {old};
+            END IF;
+            RETURN OLD;
+        END IF;
+        owner_id := {POSTGRES_OWNER[table].format(row='NEW')};
+        PERFORM pg_advisory_xact_lock({SYNC_LOCK_CLASS}, owner_id);
+        {new}
+            RETURNING seq INTO change_id;
+        NEW.change_seq := change_id;
+        NEW.updated_at := {POSTGRES_NOW};
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql'''
+
+
+POSTGRES_UPGRADE = [
+    _postgres_function('trip'),
+    _postgres_function('destination'),
+    *(f'CREATE TRIGGER {table}_change_log BEFORE INSERT OR UPDATE OF {TRACKED_COLUMNS[table]} OR DELETE '
+      f'ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_change_log()'
+      for table in ('trip', 'destination'))
+]
+
+POSTGRES_DOWNGRADE = [
+    *(f'DROP TRIGGER {table}_change_log ON {table}' for table in ('destination', 'trip')),
+    *(f'DROP FUNCTION {table}_change_log()' for table in ('destination', 'trip'))
+]
+
+# ------------------------------------------------------
+# Заповнення для наявних рядків
+# ------------------------------------------------------
+
+# Рядки, які вже змінили тригери під час міграції, мають change_seq і пропускаються
+BACKFILL = {
+    'trip': [
+        f'INSERT INTO change_log ({LOG_COLUMNS}) '
+        "SELECT user_id, 'trip', id, id, false, :now FROM trip "
+        'WHERE id > :start AND id <= :end AND change_seq IS NULL ORDER BY id',
+        "UPDATE trip SET change_seq = (SELECT seq FROM change_log WHERE entity = 'trip' "
+        'AND entity_id = trip.id AND user_id = trip.user_id), updated_at = :now '
+        'WHERE id > :start AND id <= :end AND change_seq IS NULL'
+    ],
+    'destination': [
+        f'INSERT INTO change_log ({LOG_COLUMNS}) '
+        "SELECT trip.user_id, 'destination', destination.id, destination.trip_id, false, :now "
+        'FROM destination JOIN trip ON trip.id = destination.trip_id '
+        'WHERE destination.id > :start AND destination.id <= :end AND destination.change_seq IS NULL '
+        'ORDER BY destination.id',
+        "UPDATE destination SET change_seq = (SELECT seq FROM change_log WHERE entity = 'destination' "
+        'AND entity_id = destination.id '
+        'AND user_id = (SELECT user_id FROM trip WHERE trip.id = destination.trip_id)), updated_at = :now '
+        'WHERE id > :start AND id <= :end AND change_seq IS NULL'
+    ]
+}
+
+
+def _backfill(bind):
+    """Записи журналу для наявних рядків, пачками за діапазонами id."""
+    now = time.time()
+    for table, statements in BACKFILL.items():
+        max_id = bind.execute(sa.text(f'SELECT MAX(id) FROM {table}')).scalar() or 0
+        for start in range(0, max_id, BATCH_SIZE):
+            for statement in statements:
+                bind.execute(sa.text(statement), {'start': start, 'end': start + BATCH_SIZE, 'now': now})
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('change_log',
+    sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=16), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('trip_id', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), nullable=False),
+    sa.Column('changed_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('seq'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index('ix_change_log_deleted_changed_at', ['deleted', 'changed_at'], unique=False)
+        batch_op.create_index('ix_change_log_user_id_entity_entity_id', ['user_id', 'entity', 'entity_id'], unique=False)
+        batch_op.create_index('ix_change_log_user_id_seq', ['user_id', 'seq'], unique=False)
+
+    # Лише ALTER TABLE ADD COLUMN: перестворення таблиці в SQLite видалило б тригери пошуку
+    op.add_column('destination', sa.Column('change_seq', sa.BigInteger(), nullable=True))
+    op.add_column('destination', sa.Column('updated_at', sa.Float(), nullable=True))
+    op.add_column('trip', sa.Column('change_seq', sa.BigInteger(), nullable=True))
+    op.add_column('trip', sa.Column('updated_at', sa.Float(), nullable=True))
+    op.add_column('user', sa.Column('sync_horizon', sa.BigInteger(), server_default='0', nullable=False))
+    # ### end Alembic commands ###
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        statements = SQLITE_UPGRADE
+    elif bind.dialect.name == 'postgresql':
+        statements = POSTGRES_UPGRADE
+    else:
+        statements = []
+    # Інші БД: журнал не ведеться, GET /api/sync відповідає 501
+    for statement in statements:
+        op.execute(statement)
+    if statements:
+        _backfill(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        statements = SQLITE_DOWNGRADE
+    elif bind.dialect.name == 'postgresql':
+        statements = POSTGRES_DOWNGRADE
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+    # ALTER TABLE DROP COLUMN без перестворення таблиць (SQLite >= 3.35)
+    op.execute('ALTER TABLE "user" DROP COLUMN sync_horizon')
+    for table in ('trip', 'destination'):
+        op.execute(f'ALTER TABLE {table} DROP COLUMN updated_at')
+        op.execute(f'ALTER TABLE {table} DROP COLUMN change_seq')
+
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_log_user_id_seq')
+        batch_op.drop_index('ix_change_log_user_id_entity_entity_id')
+        batch_op.drop_index('ix_change_log_deleted_changed_at')
+
+    op.drop_table('change_log')
@@ -0,0 +1,28 @@
+# Запуск без gunicorn (Windows або платформи без fork): waitress
+#
+#   python serve.py
+#
+# Один процес з пулом потоків (WAITRESS_THREADS); фонові задачі й пул
+# хешування паролів працюють у ньому ж, як у кожному воркері gunicorn.
+# Важкі модулі (app/lazy.py) імпортуються з першим запитом, що їх потребує.
+
+import os
+
+from waitress import serve
+
+from app import jobs, security
+from run import app
+
+if __name__ == '__main__':
+    try:
+        serve(
+            app,
+            host=os.environ.get('WAITRESS_HOST', '0.0.0.0'),
+            port=int(os.environ.get('PORT', 8000)),
+            threads=int(os.environ.get('WAITRESS_THREADS', 8)),
+            # З'єднань понад це waitress не приймає, доки не звільняться наявні
+            connection_limit=int(os.environ.get('WAITRESS_CONNECTION_LIMIT', 100))
+        )
+    finally:
+        jobs.shutdown(app)
+        security.shutdown(app)
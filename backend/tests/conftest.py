@@ -0,0 +1,145 @@
+# Спільні фікстури тестів
+#
+# Кожен тест отримує власний додаток на тимчасовій SQLite-БД. Схема
+# створюється міграціями (разом із тригерами пошуку та журналу змін, яких
+# немає в моделях) один раз за сесію, а тести працюють з копією цієї БД.
+# Зовнішні HTTP-сервіси підміняє локальний сервер (фікстура upstream).
+
+import json
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import event
+
+from app import create_app, db, init_migrations, jobs, security
+from config import Config, basedir
+
+PASSWORD = 'password123'
+
+
+def _config(db_path, **overrides):
+    settings = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(db_path),
+        # Хешування на потоці тесту і дешевший метод - інакше кожна реєстрація коштує ~0.5 с
+        'PASSWORD_HASH_WORKERS': 0,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'JOBS_WORKERS': 0,
+        'NOMINATIM_URL': 'http://127.0.0.1:9',
+        'OPENWEATHER_URL': 'http://127.0.0.1:9',
+        'ROUTING_GRAPH_DIR': str(db_path) + '-routing'
+    }
+    settings.update(overrides)
+    return type('TestConfig', (Config,), settings)
+
+
+@pytest.fixture(scope='session')
+def migrated_db(tmp_path_factory):
+    path = tmp_path_factory.mktemp('schema') / 'schema.db'
+    app = create_app(_config(path))
+    init_migrations(app)
+    with app.app_context():
+        upgrade(directory=os.path.join(basedir, 'migrations'))
+        db.engine.dispose()
+    return path
+
+
+@pytest.fixture
+def app_config():
+    """Перевизначення конфігурації для окремого тесту (через parametrize або власну фікстуру)."""
+    return {}
+
+
+@pytest.fixture
+def app(migrated_db, tmp_path, app_config):
+    path = tmp_path / 'test.db'
+    shutil.copy(migrated_db, path)
+    app = create_app(_config(path, **app_config))
+    yield app
+    jobs.shutdown(app)
+    security.shutdown(app)
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(app):
+    """Реєструє користувача і повертає залогінений тестовий клієнт."""
+    def register(username='alice'):
+        client = app.test_client()
+        response = client.post('/api/auth/register', json={
+            'username': username, 'email': f'{username}@example.com',
+            'password': PASSWORD, 'confirmPassword': PASSWORD
+        })
+        assert response.status_code == 201, response.get_json()
+        return client
+    return register
+
+
+@pytest.fixture
+def sql_counter(app):
+    """Список SQL-інструкцій, виконаних після створення фікстури."""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'after_cursor_execute', on_execute)
+    yield statements
+    event.remove(engine, 'after_cursor_execute', on_execute)
+
+
+class Upstream:
+    """
+    Локальна заміна зовнішнього JSON API. 'respond(path, params)' повертає
+    (статус, тіло); 'requests' - отримані запити (шлях, параметри).
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.respond = lambda path, params: (200, [])
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = dict(parse_qsl(url.query))
+                upstream.requests.append((url.path, params))
+                status, body = upstream.respond(url.path, params)
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    server = Upstream()
+    yield server
+    server.close()
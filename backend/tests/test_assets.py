@@ -0,0 +1,53 @@
+import gzip
+import json
+
+import brotli
+import pytest
+
+BUNDLE = 'app.0123ABCD.js'
+SOURCE = b'(function(){console.log("travel planner")})();\n' * 50
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    # Збірка в тому ж вигляді, що й у frontend/build.mjs
+    dist = tmp_path / 'dist'
+    (dist / 'assets').mkdir(parents=True)
+    (dist / 'assets' / BUNDLE).write_bytes(SOURCE)
+    (dist / 'assets' / (BUNDLE + '.gz')).write_bytes(gzip.compress(SOURCE))
+    (dist / 'assets' / (BUNDLE + '.br')).write_bytes(brotli.compress(SOURCE))
+    (dist / 'manifest.json').write_text(json.dumps({'app.js': BUNDLE}))
+    return {'ASSETS_DIST_DIR': str(dist)}
+
+
+def test_index_links_hashed_bundle_and_revalidates(client):
+    response = client.get('/')
+    assert response.status_code == 200
+    assert f'src="/assets/{BUNDLE}"'.encode() in response.data
+    assert b'babel' not in response.data
+    assert response.cache_control.no_cache
+    assert response.headers['ETag']
+
+    revalidated = client.get('/', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.parametrize('accept, encoding, decode', [
+    ('br, gzip', 'br', brotli.decompress),
+    ('gzip', 'gzip', gzip.decompress),
+    ('identity', None, lambda data: data),
+])
+def test_bundle_is_precompressed_and_immutable(client, accept, encoding, decode):
+    response = client.get(f'/assets/{BUNDLE}', headers={'Accept-Encoding': accept})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/javascript'
+    assert response.headers.get('Content-Encoding') == encoding
+    assert decode(response.get_data()) == SOURCE
+    assert response.cache_control.max_age == 365 * 24 * 3600
+    assert response.cache_control.immutable
+    assert 'Accept-Encoding' in response.vary
+
+
+@pytest.mark.parametrize('filename', [BUNDLE + '.br', '../manifest.json', 'app.js'])
+def test_only_manifest_files_are_served(client, filename):
+    assert client.get(f'/assets/{filename}').status_code == 404
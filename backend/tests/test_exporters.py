@@ -0,0 +1,79 @@
+import io
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from app.importers import PARSERS
+
+GPX_NS = '{http://www.topografix.com/GPX/1/1}'
+
+
+@pytest.fixture
+def trips(register):
+    client = register()
+    full = client.post('/api/trips', json={'name': 'Carpathians'}).get_json()['id']
+    for n in range(3):
+        dest_id = client.post(f'/api/trips/{full}/destinations',
+                              json={'name': f'Stop {n}', 'lat': 48.1 + n / 10, 'lon': 24.5}).get_json()['id']
+        client.patch(f'/api/destinations/{dest_id}', json={'notes': f'Note {n}'})
+    empty = client.post('/api/trips', json={'name': 'Someday'}).get_json()['id']
+    return client, full, empty
+
+
+def _features(fmt, text):
+    if fmt == 'geojson':
+        return json.loads(text)['features']
+    return [json.loads(line) for line in text.splitlines()]
+
+
+@pytest.mark.parametrize('url', ['/api/trips/export', '/api/admin/export'])
+@pytest.mark.parametrize('fmt', ['geojson', 'ndjson'])
+def test_export_includes_trips_without_destinations(trips, url, fmt):
+    client, full, empty = trips
+    response = client.get(f'{url}?format={fmt}')
+    assert response.status_code == 200
+    features = _features(fmt, response.get_data(as_text=True))
+
+    by_trip = {}
+    for feature in features:
+        by_trip.setdefault(feature['properties']['trip_name'], []).append(feature)
+    assert set(by_trip) == {'Carpathians', 'Someday'}
+    assert [f['properties']['name'] for f in by_trip['Carpathians']] == ['Stop 0', 'Stop 1', 'Stop 2']
+    assert by_trip['Someday'] == [{
+        'type': 'Feature', 'geometry': None,
+        'properties': {'trip_id': empty, 'trip_name': 'Someday', 'user_id': by_trip['Carpathians'][0]['properties']['user_id']}
+    }]
+
+    # Повторний імпорт: пункти відновлюються, запис порожньої подорожі не вважається помилкою
+    target = client.post('/api/trips', json={'name': 'Restored'}).get_json()['id']
+    result = client.post(f'/api/trips/{target}/destinations/import?format={fmt}', data=response.get_data())
+    assert result.status_code == 201, result.get_json()
+    assert (result.get_json()['imported'], result.get_json()['failed']) == (3, 0)
+    restored = client.get(f'/api/trips/{target}').get_json()['destinations']
+    assert [(d['name'], d['lat'], d['notes']) for d in restored] == [
+        (f'Stop {n}', 48.1 + n / 10, f'Note {n}') for n in range(3)
+    ]
+
+
+def test_gpx_export_round_trip(trips):
+    client, full, empty = trips
+    response = client.get('/api/trips/export?format=gpx')
+    assert response.status_code == 200
+    data = response.get_data()
+
+    routes = ET.fromstring(data).findall(f'{GPX_NS}rte')
+    assert [route.findtext(f'{GPX_NS}name') for route in routes] == ['Carpathians', 'Someday']
+    assert [len(route.findall(f'{GPX_NS}rtept')) for route in routes] == [3, 0]
+
+    records = [record for _, record in PARSERS['gpx'](io.BytesIO(data))]
+    assert [(r['name'], float(r['lat']), r['notes']) for r in records] == [
+        (f'Stop {n}', 48.1 + n / 10, f'Note {n}') for n in range(3)
+    ]
+
+
+def test_single_empty_trip_export(trips):
+    client, full, empty = trips
+    response = client.get(f'/api/trips/{empty}/export?format=ndjson')
+    assert response.status_code == 200
+    assert [feature['properties']['trip_name'] for feature in _features('ndjson', response.get_data(as_text=True))] == ['Someday']
@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app import db, geocoding
+from app.models import GeocodeCache
+
+KYIV = [{'display_name': 'Kyiv, Ukraine', 'lat': '50.45', 'lon': '30.52'}]
+SEARCH_PARAMS = {'format': 'json', 'q': 'kyiv', 'limit': 5, 'accept-language': 'en'}
+
+
+@pytest.fixture
+def app_config(upstream):
+    return {'NOMINATIM_URL': upstream.url, 'GEOCODE_MIN_INTERVAL': 0}
+
+
+@pytest.fixture
+def nominatim(upstream):
+    upstream.respond = lambda path, params: (200, KYIV)
+    return upstream
+
+
+def _search(app):
+    with app.app_context():
+        return geocoding.search('  Kyiv ')
+
+
+def _forget_memory(app):
+    app.extensions['geocoder'].memory.clear()
+
+
+def _cached_row(app):
+    with app.app_context():
+        return db.session.get(GeocodeCache, geocoding._cache_key('search', SEARCH_PARAMS))
+
+
+def test_memory_and_table_layers(app, register, nominatim):
+    client = register()
+    response = client.get('/api/geocode?q=Kyiv')
+    assert response.status_code == 200
+    assert response.get_json() == KYIV
+    assert nominatim.requests == [('/search', {key: str(value) for key, value in SEARCH_PARAMS.items()})]
+
+    # Повтор - з пам'яті, після її очищення - з таблиці
+    assert client.get('/api/geocode?q=kyiv').get_json() == KYIV
+    _forget_memory(app)
+    assert _search(app) == KYIV
+    assert len(nominatim.requests) == 1
+    assert _cached_row(app).expires_at > time.time()
+
+
+def test_expired_row_is_refreshed_in_place(app, nominatim):
+    assert _search(app) == KYIV
+    with app.app_context():
+        GeocodeCache.query.update({'expires_at': 0})
+        db.session.commit()
+    _forget_memory(app)
+
+    assert _search(app) == KYIV
+    assert len(nominatim.requests) == 2
+    assert _cached_row(app).expires_at > time.time()
+
+
+def test_row_written_concurrently_by_another_worker(app, nominatim):
+    # Інший воркер записує той самий ключ між нашим читанням і записом
+    # (або читання з репліки, що відстає, не бачить уже наявний рядок)
+    key = geocoding._cache_key('search', SEARCH_PARAMS)
+    path = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO geocode_cache'):
+            other = sqlite3.connect(path)
+            with other:
+                other.execute('INSERT INTO geocode_cache (key, payload, expires_at) VALUES (?, ?, ?)',
+                              (key, '[]', time.time() + 60))
+            other.close()
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        assert _search(app) == KYIV
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+    assert _cached_row(app).payload != '[]'
+
+
+def test_concurrent_misses_share_one_upstream_request(app, upstream):
+    release = threading.Event()
+
+    def respond(path, params):
+        release.wait(5)
+        return 200, KYIV
+    upstream.respond = respond
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(_search(app))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while not upstream.requests and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [KYIV] * 8
+    assert len(upstream.requests) == 1
+
+
+def test_upstream_error(register, upstream):
+    upstream.respond = lambda path, params: (500, {'error': 'down'})
+    response = register().get('/api/geocode?q=Kyiv')
+    assert response.status_code == 502
@@ -0,0 +1,81 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from app.importers import PARSERS, ImportFormatError, iter_gpx
+
+
+def _gpx(points):
+    track = ''.join(
+        f'<trkpt lat="{50 + i / 1e5:.5f}" lon="{30 + i / 1e5:.5f}"><ele>120</ele>'
+        f'<time>2026-05-01T10:00:00Z</time><name>P{i}</name></trkpt>'
+        for i in range(points)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+        '<metadata><name>Test</name></metadata>'
+        '<wpt lat="48.1" lon="24.1"><name>Camp</name><desc>Base</desc></wpt>'
+        f'<trk><name>Day 1</name><trkseg>{track}</trkseg></trk>'
+        '<rte><rtept lat="48.2" lon="24.2"/></rte>'
+        '</gpx>'
+    ).encode('utf-8')
+
+
+def test_gpx_nested_track_memory_is_bounded():
+    data = _gpx(20000)
+    stream = io.BytesIO(data)
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in iter_gpx(stream))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == 20002
+    # Точки <trkseg> не накопичуються: пік - частка розміру файлу (~2.2 МБ)
+    assert peak < len(data) / 4
+
+
+def test_gpx_records(register):
+    records = list(iter_gpx(io.BytesIO(_gpx(2))))
+    assert [number for number, _ in records] == [1, 2, 3, 4]
+    assert records[0][1] == {'name': 'Camp', 'lat': '48.1', 'lng': '24.1', 'notes': 'Base',
+                             'address': None, 'visit_date': None}
+    assert records[1][1]['name'] == 'P0' and records[1][1]['visit_date'] == '2026-05-01'
+    assert records[3][1]['name'] == 'Point 4'
+
+    client = register()
+    trip_id = client.post('/api/trips', json={'name': 'GPX'}).get_json()['id']
+    response = client.post(f'/api/trips/{trip_id}/destinations/import?format=gpx', data=_gpx(1200))
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['imported'] == 1202
+    assert len(client.get(f'/api/trips/{trip_id}').get_json()['destinations']) == 1202
+
+
+def _feature(name):
+    return json.dumps({'type': 'Feature', 'properties': {'name': name},
+                       'geometry': {'type': 'Point', 'coordinates': [24.0, 48.0]}}).encode()
+
+
+# Невалідний UTF-8 (обірвана послідовність) після коректного запису
+INVALID_UTF8 = {
+    'geojson': (b'{"type": "FeatureCollection", "features": [' + _feature('Ok') + b', '
+                + _feature('Bad').replace(b'Bad', b'Ba\xc3\x28') + b']}', 'Invalid JSON'),
+    'ndjson': (_feature('Ok') + b'\n' + _feature('Bad').replace(b'Bad', b'Ba\xff') + b'\n', 'Invalid NDJSON'),
+}
+
+
+@pytest.mark.parametrize('fmt', sorted(INVALID_UTF8))
+def test_invalid_utf8_is_a_format_error(register, fmt):
+    data, message = INVALID_UTF8[fmt]
+    with pytest.raises(ImportFormatError, match=message):
+        list(PARSERS[fmt](io.BytesIO(data)))
+
+    client = register()
+    trip_id = client.post('/api/trips', json={'name': 'Broken'}).get_json()['id']
+    response = client.post(f'/api/trips/{trip_id}/destinations/import?format={fmt}', data=data)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(message)
+    assert client.get(f'/api/trips/{trip_id}').get_json()['destinations'] == []
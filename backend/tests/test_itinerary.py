@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+from app.itinerary import DAY_SIZE_SLACK, plan_days
+
+KYIV = (50.45, 30.52)
+LVIV = (49.84, 24.03)
+
+
+def _plan(points, days):
+    lats, lngs = zip(*points)
+    return [stops for stops, _ in plan_days(lats, lngs, days=days)]
+
+
+@pytest.mark.parametrize('points, days', [
+    ([KYIV] * 4, 4),
+    ([KYIV] * 10, 4),
+    ([KYIV] * 3 + [LVIV] * 3, 4),
+    ([KYIV] * 7 + [LVIV], 5),
+])
+def test_identical_coordinates_fill_every_day(points, days):
+    plan = _plan(points, days)
+    assert len(plan) == days
+    assert all(plan)
+    assert sorted(index for stops in plan for index in stops) == list(range(len(points)))
+    assert max(map(len, plan)) <= math.ceil(len(points) / days * DAY_SIZE_SLACK)
+
+
+def test_days_are_capped_by_destination_count():
+    assert len(_plan([KYIV] * 3, 5)) == 3
+
+
+def test_plan_days_endpoint_with_identical_coordinates(register):
+    client = register()
+    trip_id = client.post('/api/trips', json={'name': 'Kyiv'}).get_json()['id']
+    for n in range(10):
+        client.post(f'/api/trips/{trip_id}/destinations', json={'name': f'Stop {n}', 'lat': KYIV[0], 'lon': KYIV[1]})
+
+    response = client.post(f'/api/trips/{trip_id}/plan-days', json={'days': 4, 'start_date': '2026-05-01'})
+    assert response.status_code == 200, response.get_json()
+    dates = [dest['visit_date'] for dest in response.get_json()['destinations']]
+    assert sorted(set(dates)) == ['2026-05-01', '2026-05-02', '2026-05-03', '2026-05-04']
@@ -0,0 +1,60 @@
+import json
+import math
+
+import pytest
+
+from app import db, poi
+from app.poi import EARTH_RADIUS_M, MAX_LISTED_CELLS, cell_of, cells_around, haversine_m
+
+CELL_DEG = 0.01
+CAFES = {
+    'Across the pole': (89.99, 179.0),
+    'Next door': (89.9, 0.001),
+    'South': (-89.99, 10.0),
+    'Far away': (80.0, 0.0)
+}
+
+
+def _destination(lat, lng, bearing, distance_m):
+    """Точка на відстані distance_m від (lat, lng) за азимутом bearing (радіани)."""
+    d = distance_m / EARTH_RADIUS_M
+    p1, l1 = math.radians(lat), math.radians(lng)
+    p2 = math.asin(math.sin(p1) * math.cos(d) + math.cos(p1) * math.sin(d) * math.cos(bearing))
+    l2 = l1 + math.atan2(math.sin(bearing) * math.sin(d) * math.cos(p1), math.cos(d) - math.sin(p1) * math.sin(p2))
+    return math.degrees(p2), (math.degrees(l2) + 540) % 360 - 180
+
+
+@pytest.mark.parametrize('lat, lng, radius', [
+    (50.45, 30.52, 1000),
+    (0.0, 179.999, 5000),
+    (85.0, 10.0, 5000),
+    (89.9, 0.0, 5000),
+    (-89.96, 45.0, 5000),
+])
+def test_cells_cover_the_whole_circle(lat, lng, radius):
+    cells = set(cells_around(lat, lng, radius, CELL_DEG))
+    for step in range(720):
+        point = _destination(lat, lng, step / 720 * 2 * math.pi, radius * 0.999)
+        assert cell_of(*point, CELL_DEG) in cells
+
+
+@pytest.mark.parametrize('lat', [89.97, 89.9, -89.99])
+def test_polar_search_uses_a_cell_range(app, register, sql_counter, lat):
+    client = register()
+    with app.app_context():
+        poi.ingest([{'osm_type': 'node', 'osm_id': n, 'kind': 'cafe', 'name': name, 'lat': point[0],
+                     'lng': point[1], 'tags': json.dumps({'name': name})}
+                    for n, (name, point) in enumerate(CAFES.items())], 100, CELL_DEG)
+        db.session.commit()
+    del sql_counter[:]
+
+    response = client.get(f'/api/poi?lat={lat}&lng=0&radius=5000&type=cafe')
+    assert response.status_code == 200
+    found = {item['tags']['name'] for item in response.get_json()}
+    assert found == {name for name, point in CAFES.items() if haversine_m(lat, 0, *point) <= 5000}
+    assert found
+    # Замість десятків тисяч клітинок у IN (...) - один діапазон
+    assert len(cells_around(lat, 0, 5000, CELL_DEG)) > MAX_LISTED_CELLS
+    poi_queries = [statement for statement in sql_counter if 'FROM poi' in statement]
+    assert poi_queries and all('BETWEEN' in statement for statement in poi_queries)
+
@@ -0,0 +1,21 @@
+import pytest
+
+from app.queryplan import inspect_plans
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    # Як у `flask check-query-plans`: зовнішні сервіси недоступні, задачі виконує сценарій
+    return {
+        'GEOCODE_MIN_INTERVAL': 0,
+        'GEOCODE_TIMEOUT': 1,
+        'OPENWEATHER_API_KEY': None,
+        'JOBS_OUTPUT_DIR': str(tmp_path / 'job-output')
+    }
+
+
+def test_api_queries_use_indexes(app):
+    report, failures, missing = inspect_plans(app)
+    assert report
+    assert [(endpoint, table, ' '.join(statement.split())) for endpoint, table, statement, _ in failures] == []
+    assert missing == []
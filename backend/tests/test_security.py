@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db, security
+from app.models import User
+from conftest import PASSWORD
+
+
+def test_login_rehashes_outdated_hash_through_pool_helper(app, register, monkeypatch):
+    register('alice')
+    with app.app_context():
+        user = User.query.filter_by(username='alice').one()
+        user.password_hash = generate_password_hash(PASSWORD, 'pbkdf2:sha256:500')
+        db.session.commit()
+
+    # Кожне хешування має йти через _run (пул процесів), а не прямо на потоці запиту
+    in_pool = threading.local()
+    outside_pool = []
+    real_run, real_generate = security._run, security.generate_password_hash
+
+    def run(fn, *args):
+        in_pool.active = True
+        try:
+            return real_run(fn, *args)
+        finally:
+            in_pool.active = False
+
+    def generate(*args):
+        if not getattr(in_pool, 'active', False):
+            outside_pool.append(args)
+        return real_generate(*args)
+
+    monkeypatch.setattr(security, '_run', run)
+    monkeypatch.setattr(security, 'generate_password_hash', generate)
+
+    response = app.test_client().post('/api/auth/login', json={'username': 'alice', 'password': PASSWORD})
+    assert response.status_code == 200
+    assert outside_pool == []
+    with app.app_context():
+        password_hash = db.session.scalar(db.select(User.password_hash).filter_by(username='alice'))
+    assert password_hash.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+
+
+def test_login_succeeds_when_rehash_pool_is_busy(app, register, monkeypatch):
+    register('alice')
+    with app.app_context():
+        user = User.query.filter_by(username='alice').one()
+        old_hash = user.password_hash = generate_password_hash(PASSWORD, 'pbkdf2:sha256:500')
+        db.session.commit()
+
+    def busy(password_hash):
+        raise security.HashingBusy('busy')
+
+    monkeypatch.setattr(security, 'needs_rehash', busy)
+    response = app.test_client().post('/api/auth/login', json={'username': 'alice', 'password': PASSWORD})
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.scalar(db.select(User.password_hash).filter_by(username='alice')) == old_hash
+
+
+@pytest.mark.parametrize('app_config', [{
+    'PASSWORD_HASH_WORKERS': 1, 'PASSWORD_HASH_MAX_PENDING': 1, 'PASSWORD_HASH_TIMEOUT': 0.2
+}])
+def test_timed_out_hash_keeps_its_queue_slot(app):
+    state = app.extensions['password_hasher']
+    with app.app_context():
+        with pytest.raises(security.HashingBusy, match='timed out'):
+            security._run(time.sleep, 2)
+        # Процес пулу ще рахує - нове хешування не стає в чергу понад ліміт
+        assert state.pending == 1
+        with pytest.raises(security.HashingBusy, match='busy'):
+            security._run(time.sleep, 0)
+
+        deadline = time.monotonic() + 30
+        while state.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert state.pending == 0
+        state.timeout = 30
+        assert security._run(time.sleep, 0) is None
@@ -0,0 +1,135 @@
+import pytest
+
+from app import sync
+
+
+def _add_destination(client, trip_id, name, lat=48.0, lon=24.0):
+    response = client.post(f'/api/trips/{trip_id}/destinations', json={'name': name, 'lat': lat, 'lon': lon})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def _sync(client, since=0, limit=None, status=200):
+    url = f'/api/sync?since={since}' + (f'&limit={limit}' if limit else '')
+    response = client.get(url)
+    assert response.status_code == status, response.get_json()
+    return response.get_json()
+
+
+def _entries(page):
+    """Змінені об'єкти сторінки у порядку журналу (seq)."""
+    entries = [(item['change_seq'], 'trip', item['id']) for item in page['trips']]
+    entries += [(item['change_seq'], 'destination', item['id']) for item in page['destinations']]
+    return [(entity, entity_id) for _, entity, entity_id in sorted(entries)]
+
+
+@pytest.fixture
+def trips(register):
+    client = register()
+    first = client.post('/api/trips', json={'name': 'Carpathians'}).get_json()['id']
+    second = client.post('/api/trips', json={'name': 'Crimea'}).get_json()['id']
+    stops = [
+        _add_destination(client, first, 'Yaremche'),
+        _add_destination(client, second, 'Yalta'),
+        _add_destination(client, first, 'Vorokhta')
+    ]
+    return client, first, second, stops
+
+
+def test_pages_follow_change_order_across_trips_and_destinations(trips):
+    client, first, second, stops = trips
+    # Повторна зміна переносить об'єкт у кінець журналу, а не дублює його
+    assert client.patch(f'/api/destinations/{stops[0]}', json={'notes': 'Waterfall'}).status_code == 200
+    expected = [('trip', first), ('trip', second), ('destination', stops[1]),
+                ('destination', stops[2]), ('destination', stops[0])]
+
+    full = _sync(client)
+    assert _entries(full) == expected
+    assert not full['has_more']
+
+    paged, cursors, since = [], [], 0
+    while True:
+        page = _sync(client, since, limit=2)
+        paged += _entries(page)
+        cursors.append(page['cursor'])
+        since = page['cursor']
+        if not page['has_more']:
+            break
+    assert paged == expected
+    assert len(cursors) == 3
+    assert cursors == sorted(cursors) and cursors[-1] == full['cursor']
+
+
+def test_deletes_leave_tombstones(trips):
+    client, first, second, stops = trips
+    cursor = _sync(client)['cursor']
+
+    assert client.delete(f'/api/destinations/{stops[1]}').status_code == 204
+    # Видалення подорожі каскадом видаляє її пункти - кожен лишає надгробок
+    assert client.delete(f'/api/trips/{first}').status_code == 204
+
+    page = _sync(client, cursor)
+    assert page['trips'] == [] and page['destinations'] == []
+    assert page['deleted']['trips'] == [first]
+    assert sorted(page['deleted']['destinations']) == sorted(stops)
+
+    full = _sync(client)
+    assert [trip['id'] for trip in full['trips']] == [second]
+    assert full['destinations'] == []
+    assert full['deleted']['trips'] == [first]
+    assert sorted(full['deleted']['destinations']) == sorted(stops)
+
+
+def test_compacted_tombstones_expire_older_cursors(app, trips):
+    client, first, second, stops = trips
+    stale = _sync(client)['cursor']
+    assert client.delete(f'/api/destinations/{stops[1]}').status_code == 204
+    current = _sync(client, stale)['cursor']
+
+    with app.app_context():
+        assert sync.compact(-1) == 1
+
+    assert _sync(client, stale, status=410)['error']
+    # Курсор після видаленого надгробка і повна синхронізація працюють далі
+    assert _sync(client, current) == {'cursor': current, 'has_more': False, 'trips': [], 'destinations': [],
+                                      'deleted': {'trips': [], 'destinations': []}}
+    full = _sync(client)
+    assert full['deleted'] == {'trips': [], 'destinations': []}
+    assert sorted(dest['id'] for dest in full['destinations']) == sorted([stops[0], stops[2]])
+
+
+def test_cursor_round_trip(trips):
+    client, first, second, stops = trips
+    full = client.get('/api/sync')
+    cursor = full.get_json()['cursor']
+
+    response = client.get(f'/api/sync?since={cursor}')
+    assert response.get_json() == {'cursor': cursor, 'has_more': False, 'trips': [], 'destinations': [],
+                                   'deleted': {'trips': [], 'destinations': []}}
+    etag = response.headers['ETag']
+    assert client.get(f'/api/sync?since={cursor}', headers={'If-None-Match': etag}).status_code == 304
+
+    assert client.patch(f'/api/destinations/{stops[2]}', json={'notes': 'Hoverla trail'}).status_code == 200
+    response = client.get(f'/api/sync?since={cursor}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    page = response.get_json()
+    assert [(dest['id'], dest['notes']) for dest in page['destinations']] == [(stops[2], 'Hoverla trail')]
+    assert page['cursor'] > cursor
+    assert _sync(client, page['cursor'])['destinations'] == []
+
+
+def test_other_users_changes_are_not_synced(trips, register):
+    client, first, second, stops = trips
+    cursor = _sync(client)['cursor']
+    other = register('bob')
+    trip_id = other.post('/api/trips', json={'name': 'Lviv'}).get_json()['id']
+    dest_id = _add_destination(other, trip_id, 'Rynok Square')
+
+    assert _sync(client, cursor)['cursor'] == cursor
+    assert _entries(_sync(other)) == [('trip', trip_id), ('destination', dest_id)]
+
+
+@pytest.mark.parametrize('since', ['-1', 'abc'])
+def test_invalid_cursor(register, since):
+    client = register()
+    assert client.get(f'/api/sync?since={since}').status_code == 400
@@ -0,0 +1,37 @@
+import pytest
+
+
+def _add_trips(client, count, destinations=2):
+    for n in range(count):
+        trip_id = client.post('/api/trips', json={'name': f'Trip {n}'}).get_json()['id']
+        for k in range(destinations):
+            response = client.post(f'/api/trips/{trip_id}/destinations',
+                                   json={'name': f'Stop {k}', 'lat': 50 + k / 100, 'lon': 30 + n / 100})
+            assert response.status_code == 201
+
+
+def _listing_queries(client, sql_counter, url):
+    # Перший запит прогріває кеш користувача; рахуємо другий
+    client.get(url)
+    sql_counter.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return len(sql_counter), response.get_json()
+
+
+@pytest.mark.parametrize('url', ['/api/trips', '/api/trips?summary=1', '/api/trips?limit=100'])
+def test_trip_listing_query_count_is_flat(register, sql_counter, url):
+    client = register()
+    _add_trips(client, 1)
+    single, trips = _listing_queries(client, sql_counter, url)
+    assert len(trips) == 1
+
+    _add_trips(client, 49)
+    many, trips = _listing_queries(client, sql_counter, url)
+    assert len(trips) == 50
+    if 'summary' in url:
+        assert {trip['destination_count'] for trip in trips} == {2}
+    else:
+        assert {len(trip['destinations']) for trip in trips} == {2}
+
+    assert many == single
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models import User
+
+
+@pytest.fixture
+def admin(app, register):
+    """Перший зареєстрований користувач - адміністратор; знімок уже в кеші."""
+    client = register('admin')
+    assert client.get('/api/admin/stats').status_code == 200
+    with app.app_context():
+        user_id = db.session.scalar(db.select(User.id).filter_by(username='admin'))
+    assert _cached(app, user_id)['is_admin'] is True
+    return client, user_id
+
+
+def _cached(app, user_id):
+    with app.app_context():
+        return app.extensions['user_cache'].get(user_id)
+
+
+def test_revoking_admin_applies_to_next_request(app, admin):
+    client, user_id = admin
+    with app.app_context():
+        db.session.get(User, user_id).is_admin = False
+        db.session.commit()
+    assert client.get('/api/admin/stats').status_code == 403
+    assert client.get('/api/auth/status').get_json()['user']['is_admin'] is False
+
+
+def test_bulk_admin_revoke_applies_to_next_request(app, admin):
+    client, user_id = admin
+    with app.app_context():
+        db.session.execute(update(User).where(User.id == user_id).values(is_admin=False))
+        db.session.commit()
+    assert client.get('/api/admin/stats').status_code == 403
+
+
+def test_password_change_invalidates_snapshot(app, admin):
+    client, user_id = admin
+    with app.app_context():
+        db.session.get(User, user_id).set_password('another-password')
+        db.session.commit()
+    assert _cached(app, user_id) is None
+    response = app.test_client().post('/api/auth/login', json={'username': 'admin', 'password': 'another-password'})
+    assert response.status_code == 200
+
+
+def test_preserves_user_cache_keeps_snapshot_for_counters(app, admin):
+    client, user_id = admin
+    # Нова подорож змінює лише лічильники (User.bump_version) - знімок лишається
+    assert client.post('/api/trips', json={'name': 'Trip'}).status_code == 201
+    assert _cached(app, user_id) is not None
+
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_preserves_user_cache_does_not_mask_admin_change(app, admin, bulk):
+    client, user_id = admin
+    with app.app_context():
+        # В одній транзакції: оновлення лічильників, позначене preserves_user_cache, і зміна is_admin
+        User.bump_version(user_id, trip_delta=1)
+        if bulk:
+            db.session.execute(update(User).where(User.id == user_id).values(is_admin=False))
+        else:
+            db.session.get(User, user_id).is_admin = False
+        User.bump_version(user_id)
+        db.session.commit()
+    assert _cached(app, user_id) is None
+    assert client.get('/api/admin/stats').status_code == 403
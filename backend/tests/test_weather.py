@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app import weather
+
+SUNNY = {'main': {'temp': 21.5}, 'weather': [{'description': 'clear sky', 'icon': '01d'}]}
+FORECAST = {'temp': 21.5, 'description': 'clear sky', 'icon': '01d'}
+
+
+@pytest.fixture
+def app_config(upstream):
+    return {'OPENWEATHER_URL': upstream.url, 'OPENWEATHER_API_KEY': 'test-key', 'WEATHER_ERROR_TTL': 0.5}
+
+
+@pytest.fixture
+def trip(register):
+    client = register()
+    trip_id = client.post('/api/trips', json={'name': 'Carpathians'}).get_json()['id']
+    # Три пункти в двох клітинках сітки погоди
+    for name, lat, lon in (('Yaremche', 48.45, 24.55), ('Dora', 48.46, 24.56), ('Vorokhta', 48.28, 24.57)):
+        client.post(f'/api/trips/{trip_id}/destinations', json={'name': name, 'lat': lat, 'lon': lon})
+    return client, trip_id
+
+
+def _weather(client, trip_id):
+    response = client.get(f'/api/trips/{trip_id}/weather')
+    assert response.status_code == 200
+    return list(response.get_json().values())
+
+
+def test_forecasts_are_cached_per_cell(trip, upstream):
+    client, trip_id = trip
+    upstream.respond = lambda path, params: (200, SUNNY)
+    assert _weather(client, trip_id) == [FORECAST] * 3
+    assert [path for path, _ in upstream.requests] == ['/data/2.5/weather'] * 2
+    assert _weather(client, trip_id) == [FORECAST] * 3
+    assert len(upstream.requests) == 2
+
+
+def test_upstream_failures_are_cached_briefly(trip, upstream):
+    client, trip_id = trip
+    upstream.respond = lambda path, params: (401, {'message': 'Invalid API key'})
+    assert _weather(client, trip_id) == [None] * 3
+    assert len(upstream.requests) == 2
+
+    # Поки помилка в кеші, OpenWeatherMap не викликається знову
+    upstream.respond = lambda path, params: (200, SUNNY)
+    assert _weather(client, trip_id) == [None] * 3
+    assert len(upstream.requests) == 2
+
+    time.sleep(0.6)
+    assert _weather(client, trip_id) == [FORECAST] * 3
+    assert len(upstream.requests) == 4
+
+
+def _wait_for_requests(upstream, count):
+    deadline = time.monotonic() + 5
+    while len(upstream.requests) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_stale_forecast_is_served_while_refresh_fails(app, trip, upstream):
+    client, trip_id = trip
+    upstream.respond = lambda path, params: (200, SUNNY)
+    _weather(client, trip_id)
+    state = app.extensions['weather']
+    for lat, lng in ((48.45, 24.55), (48.28, 24.57)):
+        cell = weather.snap(lat, lng, state.grid)
+        state.cache.set(cell, (time.monotonic() - state.fresh_ttl - 1, FORECAST))
+
+    upstream.respond = lambda path, params: (503, {'message': 'down'})
+    assert _weather(client, trip_id) == [FORECAST] * 3
+    _wait_for_requests(upstream, 4)
+    # Невдале фонове оновлення не повторюється з кожним запитом
+    assert _weather(client, trip_id) == [FORECAST] * 3
+    time.sleep(0.1)
+    assert len(upstream.requests) == 4
+
+
+def test_missing_api_key(app):
+    app.extensions['weather'].api_key = None
+    with app.app_context(), pytest.raises(weather.WeatherError):
+        weather.for_points([(48.45, 24.55)])
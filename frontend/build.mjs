@@ -0,0 +1,117 @@
+// Збірка фронтенду: `npm run build` (або `node build.mjs`) у каталозі frontend/.
+//
+// Збірка не має залежностей з npm і не ходить у мережу: усе потрібне лежить
+// у vendor/ - production-збірки React і ReactDOM 18.2.0 (UMD) та Babel
+// standalone 6.26.0 для JSX. Їхні SHA-256 записані у vendor/SHA256SUMS і
+// перевіряються перед збіркою, тож та сама ревізія репозиторію дає той самий
+// бандл на будь-якій машині з Node.js 18+. package-lock.json фіксує, що
+// пакетів немає (`npm ci` нічого не завантажує).
+//
+// src/app.jsx компілюється Babel (лише JSX і object spread, решта ES2018
+// лишається як є, без пробілів і коментарів) і разом із React складається в
+// один бандл dist/assets/app.<хеш>.js. Поруч кладуться стиснуті версії .gz і
+// .br, а dist/manifest.json зіставляє логічні імена з хешованими - за ним
+// Flask (backend/app/assets.py) вставляє посилання в index.html. Хеш
+// змінюється разом із вмістом, тож файли можна кешувати назавжди.
+//
+// Оновлення vendor/: файли umd/*.production.min.js з пакетів react і
+// react-dom та babel.min.js з babel-standalone, після чого
+// `sha256sum *.js > SHA256SUMS` у vendor/.
+
+import { createHash } from 'node:crypto';
+import { mkdir, readFile, rm, writeFile } from 'node:fs/promises';
+import { createRequire } from 'node:module';
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+import { promisify } from 'node:util';
+import zlib from 'node:zlib';
+
+const root = path.dirname(fileURLToPath(import.meta.url));
+const vendorDir = path.join(root, 'vendor');
+const distDir = path.join(root, 'dist');
+const assetsDir = path.join(distDir, 'assets');
+
+const gzip = promisify(zlib.gzip);
+const brotli = promisify(zlib.brotliCompress);
+
+// Логічне ім'я (як у шаблоні) -> файли бандла по порядку; .jsx компілюється
+const bundles = {
+    'app.js': [
+        path.join(vendorDir, 'react.production.min.js'),
+        path.join(vendorDir, 'react-dom.production.min.js'),
+        path.join(root, 'src', 'app.jsx')
+    ]
+};
+
+const BABEL_OPTIONS = {
+    presets: ['react'],
+    plugins: ['transform-object-rest-spread'],
+    compact: true,
+    minified: true,
+    comments: false
+};
+
+function sha256(data) {
+    return createHash('sha256').update(data).digest('hex');
+}
+
+async function verifyVendor() {
+    const sums = await readFile(path.join(vendorDir, 'SHA256SUMS'), 'utf8');
+    for (const line of sums.split('\n').filter(Boolean)) {
+        const [expected, name] = line.split(/\s+\*?/);
+        if (sha256(await readFile(path.join(vendorDir, name))) !== expected) {
+            throw new Error(`vendor/${name} does not match vendor/SHA256SUMS`);
+        }
+    }
+}
+
+async function compile(file, babel) {
+    const source = await readFile(file, 'utf8');
+    if (path.extname(file) !== '.jsx') {
+        return source;
+    }
+    // Власні змінні app.jsx не виходять у глобальну область
+    const { code } = babel.transform(source, { ...BABEL_OPTIONS, filename: file });
+    return `(function(){${code}})();`;
+}
+
+async function compress(file, data) {
+    await writeFile(`${file}.gz`, await gzip(data, { level: zlib.constants.Z_BEST_COMPRESSION }));
+    await writeFile(`${file}.br`, await brotli(data, {
+        params: {
+            [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+            [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length
+        }
+    }));
+}
+
+async function build() {
+    await verifyVendor();
+    const babel = createRequire(import.meta.url)(path.join(vendorDir, 'babel.min.js'));
+
+    await rm(distDir, { recursive: true, force: true });
+    await mkdir(assetsDir, { recursive: true });
+
+    const manifest = {};
+    for (const [name, files] of Object.entries(bundles)) {
+        const parts = [];
+        for (const file of files) {
+            parts.push(await compile(file, babel));
+        }
+        const data = Buffer.from(parts.join('\n'), 'utf8');
+        const ext = path.extname(name);
+        const hashed = `${path.basename(name, ext)}.${sha256(data).slice(0, 8).toUpperCase()}${ext}`;
+        const file = path.join(assetsDir, hashed);
+        await writeFile(file, data);
+        await compress(file, data);
+        manifest[name] = hashed;
+        console.log(`dist/assets/${hashed}: ${(data.length / 1024).toFixed(1)} KiB`);
+    }
+    await writeFile(path.join(distDir, 'manifest.json'), JSON.stringify(manifest, null, 2) + '\n');
+    console.log('Manifest:', manifest);
+}
+
+build().catch(error => {
+    console.error(error);
+    process.exit(1);
+});
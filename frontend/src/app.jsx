@@ -0,0 +1,1359 @@
+// Клієнтський додаток Travel Planner.
+//
+// React і ReactDOM тут - глобальні імена: у зібраному бандлі їх визначають
+// UMD-збірки з vendor/, що йдуть перед кодом додатка (див. build.mjs), а в
+// режимі розробки без збірки - UMD-скрипти з CDN разом із Babel у браузері
+// (див. index.html).
+
+// Глобальна деструктуризація
+const { useState, useEffect, useRef, useMemo } = React;
+
+// =====================================================================
+// GLOBAL SETTINGS
+// =====================================================================
+const API_BASE_URL = '/api';
+
+// =====================================================================
+// API CLIENT
+// =====================================================================
+const apiFetch = (url, options = {}) => {
+    return new Promise(async (resolve, reject) => {
+        try {
+            options.headers = options.headers || {};
+            if (options.body) {
+                options.headers['Content-Type'] = 'application/json';
+            }
+            const response = await fetch(`${API_BASE_URL}${url}`, options);
+            if (!response.ok) {
+                let errorData;
+                try {
+                    errorData = await response.json();
+                } catch (e) {
+                    errorData = { error: `HTTP error! status: ${response.status}` };
+                }
+                return reject(errorData);
+            }
+            if (response.status === 204) {
+                return resolve(null);
+            }
+            const data = await response.json();
+            resolve(data);
+        } catch (error) {
+            console.error("Fetch error:", error);
+            reject({ error: "Network error. Server is not responding or an error occurred." });
+        }
+    });
+};
+
+// Операції, поставлені в чергу протягом BATCH_DELAY мс, відправляються
+// одним POST /batch (одна транзакція на сервері). Кожен виклик повертає
+// Promise з результатом своєї операції; якщо пакет не вдався - усі
+// операції пакета відхиляються з помилкою сервера.
+const BATCH_DELAY = 30;
+const createBatcher = () => {
+    let queue = [];
+    let timer = null;
+    const flush = async () => {
+        const items = queue;
+        queue = [];
+        timer = null;
+        try {
+            const data = await apiFetch('/batch', {
+                method: 'POST',
+                body: JSON.stringify({ operations: items.map(item => item.op) })
+            });
+            data.results.forEach((result, i) => items[i].resolve(result.data));
+        } catch (err) {
+            items.forEach(item => item.reject(err));
+        }
+    };
+    return (op) => new Promise((resolve, reject) => {
+        queue.push({ op, resolve, reject });
+        if (!timer) {
+            timer = setTimeout(flush, BATCH_DELAY);
+        }
+    });
+};
+const batchOp = createBatcher();
+
+// Encoded Polyline (точність 5, як у /api/route) -> масив [lat, lng]
+const decodePolyline = (encoded) => {
+    const points = [];
+    let index = 0, lat = 0, lng = 0;
+    const next = () => {
+        let result = 0, shift = 0, byte;
+        do {
+            byte = encoded.charCodeAt(index++) - 63;
+            result |= (byte & 0x1f) << shift;
+            shift += 5;
+        } while (byte >= 0x20);
+        return (result & 1) ? ~(result >> 1) : (result >> 1);
+    };
+    while (index < encoded.length) {
+        lat += next();
+        lng += next();
+        points.push([lat / 1e5, lng / 1e5]);
+    }
+    return points;
+};
+
+// =====================================================================
+// HOOKS (для debounce)
+// =====================================================================
+function useDebounce(callback, delay) {
+    const timeoutRef = useRef(null);
+
+    useEffect(() => {
+        // Очистка таймера при розмонтуванні
+        return () => {
+            if (timeoutRef.current) {
+                clearTimeout(timeoutRef.current);
+            }
+        };
+    }, []);
+
+    function debouncedCallback(...args) {
+        if (timeoutRef.current) {
+            clearTimeout(timeoutRef.current);
+        }
+        timeoutRef.current = setTimeout(() => {
+            callback(...args);
+        }, delay);
+    }
+
+    return debouncedCallback;
+}
+
+
+// =====================================================================
+// COMPONENTS
+// =====================================================================
+
+function Modal({ title, message, onClose, onConfirm }) {
+    return (
+        <div
+            className="fixed inset-0 bg-black bg-opacity-75 flex items-center justify-center z-50 transition-opacity duration-200"
+            onClick={onClose}
+        >
+            <div
+                className="bg-slate-800 rounded-lg shadow-xl p-6 w-11/12 md:w-1/3 border border-slate-700"
+                onClick={e => e.stopPropagation()}
+            >
+                <h3 className="text-xl font-bold text-white mb-4">{title}</h3>
+                <p className="text-slate-300 mb-6">{message}</p>
+                <div className="flex justify-end space-x-3">
+                    <button
+                        onClick={onClose}
+                        className="bg-slate-600 hover:bg-slate-700 text-white font-bold py-2 px-4 rounded-lg transition duration-200 focus:outline-none focus:ring-2 focus:ring-slate-500"
+                    >
+                        {onConfirm ? "Cancel" : "OK"}
+                    </button>
+                    {onConfirm && (
+                        <button
+                            onClick={onConfirm}
+                            className="bg-red-600 hover:bg-red-700 text-white font-bold py-2 px-4 rounded-lg transition duration-200 focus:outline-none focus:ring-2 focus:ring-red-500"
+                        >
+                            Delete
+                        </button>
+                    )}
+                </div>
+            </div>
+        </div>
+    );
+}
+
+function CreateTripModal({ onClose, onSubmit }) {
+    const [name, setName] = useState('');
+    const handleSubmit = (e) => {
+        e.preventDefault();
+        if (name) { onSubmit(name); }
+    };
+
+    return (
+        <div className="fixed inset-0 bg-black bg-opacity-75 flex items-center justify-center z-50" onClick={onClose}>
+            <form
+                className="bg-slate-800 rounded-lg shadow-xl p-6 w-11/12 md:w-1/3 border border-slate-700"
+                onClick={e => e.stopPropagation()}
+                onSubmit={handleSubmit}
+            >
+                <h3 className="text-xl font-bold text-white mb-4">Create New Trip</h3>
+                <p className="text-slate-300 mb-4">Enter a name for your new trip:</p>
+                <input
+                    type="text"
+                    value={name}
+                    onChange={(e) => setName(e.target.value)}
+                    className="w-full px-3 py-2 bg-slate-700 border border-slate-600 rounded-lg text-white focus:outline-none focus:ring-2 focus:ring-indigo-500"
+                    placeholder="e.g., 'Summer Vacation'"
+                    autoFocus
+                />
+                <div className="flex justify-end space-x-3 mt-6">
+                    <button type="button" onClick={onClose} className="bg-slate-600 hover:bg-slate-700 text-white font-bold py-2 px-4 rounded-lg transition duration-200">
+                        Cancel
+                    </button>
+                    <button type="submit" className="bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-2 px-4 rounded-lg transition duration-200">
+                        Create
+                    </button>
+                </div>
+            </form>
+        </div>
+    );
+}
+
+function AuthScreen({ onAuthSuccess }) {
+    const [isLoginView, setIsLoginView] = useState(true);
+    const [username, setUsername] = useState('');
+    const [email, setEmail] = useState('');
+    const [password, setPassword] = useState('');
+    const [confirmPassword, setConfirmPassword] = useState('');
+    const [modalInfo, setModalInfo] = useState(null);
+
+    const handleSubmit = async (e) => {
+        e.preventDefault();
+        setModalInfo(null);
+        if (isLoginView) {
+            if (!username || !password) {
+                setModalInfo({ title: "Error", message: "Username/Email and password cannot be empty." }); return;
+            }
+        } else {
+            if (!username || !email || !password || !confirmPassword) {
+                setModalInfo({ title: "Error", message: "All fields are required for registration." }); return;
+            }
+            if (password !== confirmPassword) {
+                setModalInfo({ title: "Error", message: "Passwords do not match." }); return;
+            }
+            if (password.length < 8) {
+                setModalInfo({ title: "Error", message: "Password must be at least 8 characters long." }); return;
+            }
+            if (!email.includes('@') || !email.includes('.')) {
+                setModalInfo({ title: "Error", message: "Please enter a valid email address." }); return;
+            }
+        }
+        const url = isLoginView ? '/auth/login' : '/auth/register';
+        const body = isLoginView ? { username, password } : { username, email, password, confirmPassword };
+        try {
+            const userData = await apiFetch(url, { method: 'POST', body: JSON.stringify(body) });
+            onAuthSuccess(userData);
+        } catch (err) {
+            setModalInfo({ title: isLoginView ? "Login Failed" : "Registration Failed", message: err.error || "Unknown error" });
+        }
+    };
+
+    return (
+        <div className="flex items-center justify-center h-full bg-slate-900">
+            <div className="w-full max-w-md p-8 bg-slate-800 rounded-lg shadow-xl border border-slate-700">
+                <h2 className="text-3xl font-bold text-center text-white mb-6">{isLoginView ? 'Travel Planner 🗺' : 'Register'}</h2>
+                <form onSubmit={handleSubmit}>
+                    <div className="mb-4">
+                        <label className="block text-slate-300 text-sm font-bold mb-2" htmlFor="username">{isLoginView ? 'Username or Email' : 'Username'}</label>
+                        <input id="username" type="text" value={username} onChange={(e) => setUsername(e.target.value)} className="w-full px-3 py-2 bg-slate-700 border border-slate-600 rounded-lg text-white focus:outline-none focus:ring-2 focus:ring-indigo-500" placeholder={isLoginView ? "user123 or user@example.com" : "user123"} />
+                    </div>
+                    {!isLoginView && (
+                        <div className="mb-4">
+                            <label className="block text-slate-300 text-sm font-bold mb-2" htmlFor="email">Email</label>
+                            <input id="email" type="email" value={email} onChange={(e) => setEmail(e.target.value)} className="w-full px-3 py-2 bg-slate-700 border border-slate-600 rounded-lg text-white focus:outline-none focus:ring-2 focus:ring-indigo-500" placeholder="user@example.com" />
+                        </div>
+                    )}
+                    <div className="mb-6">
+                        <label className="block text-slate-300 text-sm font-bold mb-2" htmlFor="password">Password</label>
+                        <input id="password" type="password" value={password} onChange={(e) => setPassword(e.target.value)} className="w-full px-3 py-2 bg-slate-700 border border-slate-600 rounded-lg text-white focus:outline-none focus:ring-2 focus:ring-indigo-500" placeholder="••••••••" />
+                        {!isLoginView && (<p className="text-slate-400 text-xs mt-2">Minimum 8 characters.</p>)}
+                    </div>
+                    {!isLoginView && (
+                        <div className="mb-6">
+                            <label className="block text-slate-300 text-sm font-bold mb-2" htmlFor="confirmPassword">Confirm Password</label>
+                            <input id="confirmPassword" type="password" value={confirmPassword} onChange={(e) => setConfirmPassword(e.target.value)} className="w-full px-3 py-2 bg-slate-700 border border-slate-600 rounded-lg text-white focus:outline-none focus:ring-2 focus:ring-indigo-500" placeholder="••••••••" />
+                        </div>
+                    )}
+                    <button type="submit" className="w-full bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-2 px-4 rounded-lg transition duration-200 focus:outline-none focus:ring-2 focus:ring-indigo-500">
+                        {isLoginView ? 'Login' : 'Register'}
+                    </button>
+                </form>
+                <p className="text-center text-slate-400 text-sm mt-6">
+                    {isLoginView ? "Don't have an account?" : 'Already have an account?'}
+                    <button
+                        onClick={() => {
+                            setIsLoginView(!isLoginView); setUsername(''); setEmail(''); setPassword(''); setConfirmPassword(''); setModalInfo(null);
+                        }}
+                        className="text-indigo-400 hover:text-indigo-300 font-bold ml-2 focus:outline-none"
+                    >
+                        {isLoginView ? 'Register' : 'Login'}
+                    </button>
+                </p>
+            </div>
+            {modalInfo && (<Modal title={modalInfo.title} message={modalInfo.message} onClose={() => setModalInfo(null)} />)}
+        </div>
+    );
+}
+
+// Погода приходить одним запитом на всю подорож (див. TripManager)
+function WeatherWidget({ weather, error }) {
+    if (error) { return <div className="text-red-400 text-sm">{error}</div>; }
+    if (weather === undefined) { return <div className="text-slate-400 text-sm">Loading weather...</div>; }
+    if (!weather) { return <div className="text-slate-400 text-sm">Weather unavailable</div>; }
+
+    return (
+        <div className="flex items-center space-x-2 text-sm">
+            <img src={`https://openweathermap.org/img/wn/${weather.icon}.png`} alt={weather.description} className="w-8 h-8 -ml-1" />
+            <div>
+                <span className="font-bold text-slate-200">{Math.round(weather.temp)}°C</span>
+                <span className="text-slate-400 ml-1">({weather.description})</span>
+            </div>
+        </div>
+    );
+}
+
+function TripMap({
+    destinations,
+    isAddMode,
+    onMapClick,
+    onMarkerDragEnd,
+    poiResults,
+    onAddPoiToTrip
+}) {
+    const mapContainerRef = useRef(null);
+    const mapInstanceRef = useRef(null);
+    const markersLayerRef = useRef(null);
+    const poiMarkersLayerRef = useRef(null);
+    const routingControlRef = useRef(null);
+    const routeLayerRef = useRef(null);
+
+    const defaultCenter = [48.3794, 31.1656]; // Center of Ukraine
+    const defaultZoom = 6;
+
+    const poiIcon = L.icon({
+        iconUrl: 'data:image/svg+xml;base64,' + btoa('<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="#f59e0b" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" class="lucide lucide-map-pin"><path d="M20 10c0 6-8 12-8 12s-8-6-8-12a8 8 0 0 1 16 0Z"/><circle cx="12" cy="10" r="3"/></svg>'),
+        iconSize: [32, 32],
+        iconAnchor: [16, 32],
+        popupAnchor: [0, -32]
+    });
+
+    const defaultIcon = new L.Icon.Default();
+
+    // 1. Effect for map initialization (runs once)
+    useEffect(() => {
+        if (window.L && mapContainerRef.current && !mapInstanceRef.current) {
+            const map = window.L.map(mapContainerRef.current, {
+                center: defaultCenter,
+                zoom: defaultZoom,
+                scrollWheelZoom: true,
+            });
+            window.L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+            }).addTo(map);
+
+            markersLayerRef.current = window.L.layerGroup().addTo(map);
+            poiMarkersLayerRef.current = window.L.layerGroup().addTo(map);
+            routeLayerRef.current = window.L.layerGroup().addTo(map);
+            mapInstanceRef.current = map;
+        }
+        return () => {
+            if (mapInstanceRef.current) {
+                mapInstanceRef.current.remove();
+                mapInstanceRef.current = null;
+                markersLayerRef.current = null;
+                poiMarkersLayerRef.current = null;
+                routeLayerRef.current = null;
+                routingControlRef.current = null;
+            }
+        };
+    }, []);
+
+    // 2. Effect for 'Add Mode'
+    useEffect(() => {
+        if (!mapInstanceRef.current) return;
+        const map = mapInstanceRef.current;
+
+        if (isAddMode) {
+            L.DomUtil.addClass(map.getContainer(), 'add-mode-cursor');
+            map.on('click', onMapClick);
+        } else {
+            L.DomUtil.removeClass(map.getContainer(), 'add-mode-cursor');
+            map.off('click', onMapClick);
+        }
+
+        return () => {
+             L.DomUtil.removeClass(map.getContainer(), 'add-mode-cursor');
+             map.off('click', onMapClick);
+        }
+    }, [isAddMode, onMapClick, mapInstanceRef.current]);
+
+    // 3. Effect for updating markers, route, and center
+    useEffect(() => {
+        if (!mapInstanceRef.current || !markersLayerRef.current) return;
+        const map = mapInstanceRef.current;
+        const markersLayer = markersLayerRef.current;
+        markersLayer.clearLayers();
+        routeLayerRef.current.clearLayers();
+        if (routingControlRef.current) {
+            routingControlRef.current.remove();
+            routingControlRef.current = null;
+        }
+
+        if (!destinations || destinations.length === 0) {
+            map.setView(defaultCenter, defaultZoom);
+            return;
+        }
+
+        destinations.forEach(dest => {
+            const marker = window.L.marker([dest.lat, dest.lng], {
+                draggable: true,
+                icon: defaultIcon
+            })
+            .bindPopup(dest.name)
+            .addTo(markersLayer);
+
+            marker.on('dragend', (e) => {
+                onMarkerDragEnd(dest.id, e.target.getLatLng());
+            });
+        });
+
+        const lineStyle = {color: '#4f46e5', opacity: 0.8, weight: 6};
+        // Запасний варіант: маршрут через зовнішній OSRM (Leaflet Routing Machine)
+        const showExternalRoute = () => {
+            if (!window.L.Routing) return;
+            const waypoints = destinations.map(d => window.L.latLng(d.lat, d.lng));
+
+            const routingControl = window.L.Routing.control({
+                waypoints: waypoints,
+                show: false,
+                addWaypoints: false,
+                draggableWaypoints: false,
+                fitSelectedRoutes: 'smart',
+                createMarker: () => null,
+                lineOptions: { styles: [lineStyle] }
+            }).addTo(map);
+            routingControlRef.current = routingControl;
+        };
+
+        let cancelled = false;
+        if (destinations.length >= 2) {
+            // Маршрут власним рушієм (/api/route); якщо графа немає - зовнішній OSRM
+            apiFetch(`/route?trip_id=${destinations[0].trip_id}`)
+                .then(route => {
+                    if (cancelled || !routeLayerRef.current) return;
+                    const line = window.L.polyline(decodePolyline(route.polyline), lineStyle)
+                        .addTo(routeLayerRef.current);
+                    map.fitBounds(line.getBounds(), { padding: [50, 50] });
+                })
+                .catch(err => {
+                    if (cancelled || !mapInstanceRef.current) return;
+                    console.warn("Built-in routing unavailable, using OSRM:", err);
+                    showExternalRoute();
+                });
+        } else if (destinations.length > 0) {
+            try {
+                const bounds = window.L.latLngBounds(destinations.map(d => [d.lat, d.lng]));
+                map.fitBounds(bounds, { padding: [50, 50] });
+            } catch (e) { console.error("Error creating bounds:", e, destinations); }
+        }
+
+        setTimeout(() => {
+            if (mapInstanceRef.current) {
+                mapInstanceRef.current.invalidateSize();
+            }
+        }, 100);
+
+        return () => { cancelled = true; };
+    }, [destinations, onMarkerDragEnd]);
+
+
+    // 4. Effect for POI Markers
+    useEffect(() => {
+        if (!mapInstanceRef.current || !poiMarkersLayerRef.current) return;
+        const poiLayer = poiMarkersLayerRef.current;
+        poiLayer.clearLayers();
+
+        if (poiResults && poiResults.length > 0) {
+            poiResults.forEach(poi => {
+                const name = poi.tags.name || poi.tags.amenity || 'Point of Interest';
+                const poiMarker = L.marker([poi.lat, poi.lon], { icon: poiIcon })
+                    .addTo(poiLayer);
+
+                poiMarker.bindPopup(`<b>${name}</b><br><i>Click marker to add to trip</i>`);
+
+                poiMarker.on('click', () => {
+                    onAddPoiToTrip({
+                        name: name,
+                        lat: poi.lat,
+                        lon: poi.lon
+                    });
+                });
+            });
+
+            try {
+                const bounds = window.L.latLngBounds(poiResults.map(p => [p.lat, p.lon]));
+                mapInstanceRef.current.fitBounds(bounds, { padding: [50, 50] });
+            } catch(e) { console.error("Error fitting POI bounds", e); }
+        }
+
+    }, [poiResults, onAddPoiToTrip]);
+
+
+    if (!window.L || !window.L.Routing) {
+         return (
+            <div className="h-full w-full rounded-lg bg-slate-700 flex items-center justify-center p-4 text-center">
+                <div className="text-slate-300">
+                    { !window.L && <p className="text-red-400">Error: Base Leaflet library (L.js) failed to load.</p> }
+                    { window.L && !window.L.Routing && <p>Loading routing engine...</p> }
+                </div>
+            </div>
+         );
+    }
+
+    return (
+        <div
+            ref={mapContainerRef}
+            className="h-full w-full rounded-lg shadow-lg"
+            style={{ zIndex: 0 }}
+        />
+    );
+}
+
+function LocationSearch({ onLocationSelect }) {
+    const [query, setQuery] = useState('');
+    const [results, setResults] = useState([]);
+    const [isLoading, setIsLoading] = useState(false);
+    const debounceTimer = useRef(null);
+
+    const handleSearch = (searchQuery) => {
+        if (debounceTimer.current) { clearTimeout(debounceTimer.current); }
+        if (searchQuery.length < 3) { setResults([]); return; }
+
+        setIsLoading(true);
+        debounceTimer.current = setTimeout(async () => {
+            try {
+                const data = await apiFetch(`/geocode?q=${encodeURIComponent(searchQuery)}&limit=5`);
+                setResults(data);
+            } catch (error) { console.error("Nominatim search error:", error); }
+            finally { setIsLoading(false); }
+        }, 500);
+    };
+
+    const handleSelect = (result) => {
+        onLocationSelect({
+            name: result.display_name.split(',')[0],
+            lat: parseFloat(result.lat),
+            lon: parseFloat(result.lon)
+        });
+        setQuery('');
+        setResults([]);
+    };
+
+    return (
+        <div className="relative w-full">
+            <input
+                type="text"
+                value={query}
+                onChange={(e) => {
+                    setQuery(e.target.value);
+                    handleSearch(e.target.value);
+                }}
+                placeholder="Search for a location..."
+                className="w-full px-3 py-2 bg-slate-700 border border-slate-600 rounded-lg text-white focus:outline-none focus:ring-2 focus:ring-indigo-500"
+            />
+            {isLoading && <div className="text-slate-400 p-2">Searching...</div>}
+
+            {results.length > 0 && (
+                <ul className="absolute z-10 w-full mt-1 bg-slate-800 border border-slate-700 rounded-lg shadow-lg max-h-60 overflow-y-auto">
+                    {results.map(result => (
+                        <li
+                            key={result.place_id}
+                            onClick={() => handleSelect(result)}
+                            className="px-4 py-2 text-slate-300 hover:bg-slate-700 cursor-pointer"
+                        >
+                            {result.display_name}
+                        </li>
+                    ))}
+                </ul>
+            )}
+        </div>
+    );
+}
+
+function AdminPanel({ user, onBack }) {
+    const [users, setUsers] = useState([]);
+    const [stats, setStats] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [search, setSearch] = useState('');
+    const [adminsOnly, setAdminsOnly] = useState(false);
+    const [isLoading, setIsLoading] = useState(true);
+    const [error, setError] = useState(null);
+
+    // Сторінка списку; курсор наступної сторінки приходить у заголовку X-Next-Cursor
+    const fetchUsers = async (cursor = null) => {
+        setIsLoading(true);
+        try {
+            const params = new URLSearchParams({ limit: '50' });
+            if (cursor) params.set('cursor', cursor);
+            if (search.trim()) params.set('q', search.trim());
+            if (adminsOnly) params.set('is_admin', '1');
+            const response = await fetch(`${API_BASE_URL}/admin/users?${params}`);
+            const data = await response.json();
+            if (!response.ok) {
+                throw data;
+            }
+            setUsers(prev => cursor ? [...prev, ...data] : data);
+            setNextCursor(response.headers.get('X-Next-Cursor'));
+            setError(null);
+        } catch (err) {
+            setError(err.error || "Failed to load users. Do you have admin rights?");
+        } finally {
+            setIsLoading(false);
+        }
+    };
+
+    useEffect(() => {
+        apiFetch('/admin/stats').then(setStats).catch(() => setStats(null));
+    }, []);
+
+    // Фільтри застосовуються із затримкою, щоб не робити запит на кожну літеру
+    useEffect(() => {
+        const timer = setTimeout(() => fetchUsers(), 300);
+        return () => clearTimeout(timer);
+    }, [search, adminsOnly]);
+
+    // ВИКЛИК LUCIDE ДЛЯ ІКОНОК
+    useEffect(() => {
+        if(window.lucide) {
+            window.lucide.createIcons();
+        }
+    });
+
+    return (
+        <div className="w-full md:w-3/4 lg:w-4/5 xl:w-5/6 flex flex-col p-4 md:p-6 h-full">
+            <button
+                className="text-indigo-400 mb-4 text-left self-start"
+                onClick={onBack}
+            >
+                &larr; Back to Trips
+            </button>
+            <h1 className="text-3xl font-bold mb-4">Admin Panel</h1>
+
+            {stats && (
+                <p className="mb-4 text-slate-400">
+                    Total Users: {stats.users} &middot; Trips: {stats.trips} &middot; Destinations: {stats.destinations}
+                </p>
+            )}
+
+            <div className="flex flex-wrap items-center gap-4 mb-4">
+                <input
+                    type="text"
+                    value={search}
+                    onChange={(e) => setSearch(e.target.value)}
+                    placeholder="Username or email starts with..."
+                    className="flex-grow px-3 py-2 bg-slate-700 border border-slate-600 rounded-md text-white focus:outline-none focus:ring-2 focus:ring-indigo-500"
+                />
+                <label className="flex items-center gap-2 text-slate-300">
+                    <input type="checkbox" checked={adminsOnly} onChange={(e) => setAdminsOnly(e.target.checked)} />
+                    Admins only
+                </label>
+            </div>
+
+            {error && <p className="text-red-400">{error}</p>}
+
+            {!error && (
+                 <div className="flex-grow bg-slate-800 rounded-lg p-3 border border-slate-700 overflow-y-auto min-h-0">
+                    <ul className="divide-y divide-slate-700">
+                        {users.map(u => (
+                            <li key={u.id} className="p-3 flex justify-between items-center">
+                                <div>
+                                    <span className="font-medium text-white">{u.username}</span>
+                                    <span className="text-slate-400 ml-4">({u.email || 'No email'})</span>
+                                    <span className="text-slate-500 ml-4 text-sm">Trips: {u.trip_count}</span>
+                                </div>
+                                {u.is_admin && (
+                                    <span className="ml-2 text-xs bg-yellow-600 text-white font-bold px-2 py-0.5 rounded-full">
+                                        Admin
+                                    </span>
+                                )}
+                            </li>
+))}
+                    </ul>
+                    {isLoading && <p className="p-3">Loading user list...</p>}
+                    {!isLoading && nextCursor && (
+                        <button
+                            onClick={() => fetchUsers(nextCursor)}
+                            className="w-full mt-2 py-2 text-indigo-400 hover:text-indigo-300"
+                        >
+                            Load more
+                        </button>
+                    )}
+                </div>
+            )}
+        </div>
+    );
+}
+
+function TripManager({ user, onLogout }) {
+    const [trips, setTrips] = useState([]);
+    const [selectedTripId, setSelectedTripId] = useState(null);
+    const [isTripViewVisible, setTripViewVisible] = useState(false);
+    const [modalInfo, setModalInfo] = useState(null);
+    const [isLoading, setIsLoading] = useState(true);
+    const [isCreateModalOpen, setIsCreateModalOpen] = useState(false);
+    const [currentView, setCurrentView] = useState('trips');
+
+    // Нові стани
+    const [isAddMode, setIsAddMode] = useState(false);
+    const [isGeocoding, setIsGeocoding] = useState(false);
+    const dragItem = useRef(null);
+    const dragOverItem = useRef(null);
+    const [isOptimizing, setIsOptimizing] = useState(false);
+    const [poiMenuDest, setPoiMenuDest] = useState(null);
+    const [poiResults, setPoiResults] = useState([]);
+    const [isFetchingPoi, setIsFetchingPoi] = useState(false);
+    const [tripWeather, setTripWeather] = useState({});
+    const [weatherError, setWeatherError] = useState(null);
+
+    // Debounce для збереження нотаток/дати: зміни всіх пунктів
+    // накопичуються і відправляються одним пакетом
+    const pendingDestPatches = useRef({});
+    const debouncedUpdateDest = useDebounce(async () => {
+        const patches = pendingDestPatches.current;
+        pendingDestPatches.current = {};
+        try {
+            await Promise.all(Object.entries(patches).map(([destId, payload]) =>
+                batchOp({ op: 'update_destination', id: Number(destId), ...payload })
+            ));
+        } catch(err) {
+             setModalInfo({ title: "Save Error", message: err.error || "Failed to save note/date." });
+        }
+    }, 1000);
+
+
+    useEffect(() => {
+        if (selectedTripId) { localStorage.setItem('lastSelectedTripId', selectedTripId); }
+    }, [selectedTripId]);
+
+    useEffect(() => {
+        fetchTrips();
+    }, []);
+
+    // ЕФЕКТ ДЛЯ ЗАПУСКУ LUCIDE
+    // Цей хук спрацює щоразу, коли зміниться selectedTrip або poiMenuDest,
+    // оновлюючи іконки в DOM
+    useEffect(() => {
+        if (window.lucide) {
+            window.lucide.createIcons();
+        }
+    }, [selectedTrip, poiMenuDest, isAddMode, isOptimizing]); // Залежності, які можуть додати нові іконки
+
+    const selectedTrip = useMemo(() => {
+        return trips.find(t => t.id === selectedTripId);
+    }, [trips, selectedTripId]);
+
+    // Ключ, що змінюється лише при зміні складу або координат пунктів
+    const weatherKey = selectedTrip
+        ? selectedTrip.destinations.map(d => `${d.id}:${d.lat.toFixed(2)},${d.lng.toFixed(2)}`).join(';')
+        : '';
+
+    useEffect(() => {
+        if (!selectedTripId || !weatherKey) { setTripWeather({}); return; }
+        let cancelled = false;
+        apiFetch(`/trips/${selectedTripId}/weather`)
+            .then(data => { if (!cancelled) { setTripWeather(data); setWeatherError(null); } })
+            .catch(err => { if (!cancelled) { setWeatherError(err.error || 'Failed to load weather'); } });
+        return () => { cancelled = true; };
+    }, [selectedTripId, weatherKey]);
+
+    const fetchTrips = async () => {
+        setIsLoading(true);
+        try {
+            const data = await apiFetch('/trips');
+            setTrips(data);
+            const lastId = parseInt(localStorage.getItem('lastSelectedTripId'), 10);
+            const lastTripExists = data.some(t => t.id === lastId);
+            if (lastTripExists) {
+                setSelectedTripId(lastId);
+            } else if (data.length > 0) {
+                setSelectedTripId(data[0].id);
+            }
+            if (data.length > 0) {
+                setTripViewVisible(true);
+            }
+        } catch (err) {
+            setModalInfo({ title: "Error", message: err.error || "Failed to load trips." });
+        } finally {
+            setIsLoading(false);
+        }
+    };
+
+    const handleCreateTrip = () => {
+        setIsCreateModalOpen(true);
+    };
+
+    const handleSubmitNewTrip = async (name) => {
+        if (name) {
+            try {
+                const newTrip = await apiFetch('/trips', {
+                    method: 'POST',
+                    body: JSON.stringify({ name })
+                });
+                setTrips([...trips, newTrip]);
+                setSelectedTripId(newTrip.id);
+                setTripViewVisible(true);
+                setCurrentView('trips');
+                setIsCreateModalOpen(false);
+            } catch (err) {
+                setModalInfo({ title: "Creation Error", message: err.error || "Failed to create trip." });
+            }
+        }
+    };
+
+    const handleDeleteTrip = async (tripIdToDelete) => {
+        setModalInfo({
+            title: "Confirm Deletion",
+            message: "Are you sure you want to delete this trip?",
+            onConfirm: async () => {
+                try {
+                    setModalInfo(null);
+                    await apiFetch(`/trips/${tripIdToDelete}`, { method: 'DELETE' });
+                    const updatedTrips = trips.filter(t => t.id !== tripIdToDelete);
+                    setTrips(updatedTrips);
+                    if (selectedTripId === tripIdToDelete) {
+                        const newSelectedId = updatedTrips.length > 0 ? updatedTrips[0].id : null;
+                        setSelectedTripId(newSelectedId);
+                        if(newSelectedId) {
+                             localStorage.setItem('lastSelectedTripId', newSelectedId);
+                        } else {
+                             localStorage.removeItem('lastSelectedTripId');
+                        }
+                        if (updatedTrips.length === 0) {
+                            setTripViewVisible(false);
+                        }
+                    }
+                } catch (err) {
+                    setModalInfo({ title: "Deletion Error", message: err.error || "Failed to delete trip." });
+                }
+            }
+        });
+    };
+
+    const handleAddDestination = async (location) => {
+        if (!selectedTripId) return;
+        try {
+            const newDest = await batchOp({ op: 'create_destination', trip_id: selectedTripId, ...location });
+            const updatedTrips = trips.map(trip => {
+                if (trip.id === selectedTripId) {
+                    return { ...trip, destinations: [...trip.destinations, newDest] };
+                }
+                return trip;
+            });
+            setTrips(updatedTrips);
+            setPoiResults([]); // Очистити POI-маркери
+        } catch (err) {
+            setModalInfo({ title: "Error", message: err.error || "Failed to add location." });
+        }
+    };
+
+    const handleDeleteDestination = async (destId) => {
+         if (!selectedTripId) return;
+         try {
+            await batchOp({ op: 'delete_destination', id: destId });
+            const updatedTrips = trips.map(trip => {
+                if (trip.id === selectedTripId) {
+                    return {
+                        ...trip,
+                        destinations: trip.destinations.filter(d => d.id !== destId)
+                    };
+                }
+                return trip;
+            });
+            setTrips(updatedTrips);
+         } catch (err) {
+            setModalInfo({ title: "Error", message: err.error || "Failed to delete location." });
+         }
+    };
+
+    const handleLogout = async () => {
+        try {
+            await apiFetch('/auth/logout', { method: 'POST' });
+            localStorage.removeItem('lastSelectedTripId');
+            onLogout();
+        } catch (err) {
+             setModalInfo({ title: "Error", message: err.error || "Failed to log out." });
+        }
+    };
+
+    // Пропозиція 1: Клік по карті
+    const handleMapClick = async (e) => {
+        if (!isAddMode || isGeocoding) return;
+        setIsGeocoding(true);
+        try {
+            const { lat, lng } = e.latlng;
+            const data = await apiFetch(`/reverse-geocode?lat=${lat}&lng=${lng}`);
+            const name = (data.display_name && data.display_name.split(',')[0]) || "Clicked Location";
+            await handleAddDestination({ name, lat, lon: lng });
+        } catch(err) {
+            console.error(err);
+            setModalInfo({ title: "Error", message: err.error || err.message || "Could not get location name." });
+        } finally {
+            setIsGeocoding(false);
+            setIsAddMode(false);
+        }
+    };
+
+    // Drag-and-drop маркерів
+    const handleMarkerDragEnd = async (destId, newLatLng) => {
+        const { lat, lng } = newLatLng;
+        // 1. Оновити стан локально для миттєвого відгуку
+        setTrips(prevTrips => prevTrips.map(trip => {
+            if (trip.id !== selectedTripId) return trip;
+            return {
+                ...trip,
+                destinations: trip.destinations.map(dest =>
+                    dest.id === destId ? { ...dest, lat, lng } : dest
+                )
+            };
+        }));
+        // 2. Надіслати оновлення на бекенд
+        try {
+            await batchOp({ op: 'update_destination', id: destId, lat, lng });
+        } catch(err) {
+            setModalInfo({ title: "Save Error", message: err.error || "Failed to save new location." });
+        }
+    };
+
+    // Drag-and-drop списку
+    const handleDragStart = (e, destId) => {
+        dragItem.current = destId;
+        e.target.classList.add('dragging');
+    };
+
+    const handleDragEnter = (e, destId) => {
+        dragOverItem.current = destId;
+        e.target.classList.add('drag-over');
+    };
+
+    const handleDragLeave = (e) => {
+         e.target.classList.remove('drag-over');
+    };
+
+    const handleDrop = async (e) => {
+        e.target.classList.remove('drag-over');
+        e.target.classList.remove('dragging');
+        if (dragItem.current === dragOverItem.current) {
+            dragItem.current = null;
+            dragOverItem.current = null;
+            return;
+        }
+
+        let newDestinations = [...selectedTrip.destinations];
+        const dragItemIndex = newDestinations.findIndex(d => d.id === dragItem.current);
+        const hoverItemIndex = newDestinations.findIndex(d => d.id === dragOverItem.current);
+        const [draggedItem] = newDestinations.splice(dragItemIndex, 1);
+        newDestinations.splice(hoverItemIndex, 0, draggedItem);
+
+        // Сусід, відносно якого переміщено пункт (сервер змінює лише один рядок)
+        const movePayload = hoverItemIndex > 0
+            ? { after_id: newDestinations[hoverItemIndex - 1].id }
+            : { before_id: newDestinations[1].id };
+        const movedId = dragItem.current;
+
+        // Оновити стан локально
+        setTrips(prevTrips => prevTrips.map(trip =>
+            trip.id === selectedTripId ? { ...trip, destinations: newDestinations } : trip
+        ));
+
+        dragItem.current = null;
+        dragOverItem.current = null;
+
+        // Надіслати переміщення на бекенд
+        try {
+            await batchOp({ op: 'move_destination', id: movedId, ...movePayload });
+        } catch(err) {
+             setModalInfo({ title: "Save Error", message: err.error || "Failed to save new order." });
+        }
+    };
+
+    const handleDragEnd = (e) => {
+        e.target.classList.remove('dragging');
+        dragItem.current = null;
+        dragOverItem.current = null;
+    };
+
+    // Оптимізація маршруту
+    const handleOptimizeRoute = async () => {
+        if (!selectedTrip || selectedTrip.destinations.length < 3) {
+             setModalInfo({ title: "Optimization", message: "You need at least 3 destinations to optimize a route." });
+             return;
+        }
+        setIsOptimizing(true);
+        try {
+            // Оптимізація виконується на бекенді; перша точка лишається першою
+            const optimizedTrip = await apiFetch(`/trips/${selectedTripId}/optimize`, {
+                method: 'POST',
+                body: JSON.stringify({})
+            });
+
+            setTrips(prevTrips => prevTrips.map(trip =>
+                trip.id === selectedTripId ? { ...trip, destinations: optimizedTrip.destinations } : trip
+            ));
+        } catch(err) {
+            setModalInfo({ title: "Optimization Error", message: err.error || "Could not optimize route." });
+        } finally {
+            setIsOptimizing(false);
+        }
+    };
+
+    // Нотатки і дати
+    const handleDestUpdate = (destId, payload) => {
+        // Оновити стан локально негайно
+        setTrips(prevTrips => prevTrips.map(trip => {
+            if (trip.id !== selectedTripId) return trip;
+            return {
+                ...trip,
+                destinations: trip.destinations.map(dest =>
+                    dest.id === destId ? { ...dest, ...payload } : dest
+                )
+            };
+        }));
+        // Надіслати на бекенд з затримкою
+        pendingDestPatches.current[destId] = { ...pendingDestPatches.current[destId], ...payload };
+        debouncedUpdateDest();
+    };
+
+    // Пошук POI
+    const handleShowPoiMenu = (dest) => {
+        if (poiMenuDest && poiMenuDest.id === dest.id) {
+            setPoiMenuDest(null); // Закрити, якщо клікнули вдруге
+        } else {
+            setPoiMenuDest(dest);
+        }
+        setPoiResults([]); // Завжди очищати старі результати
+    };
+
+    const handleFetchPoi = async (type) => {
+        if (!poiMenuDest) return;
+        setIsFetchingPoi(true);
+        setPoiResults([]);
+        try {
+            const { lat, lng } = poiMenuDest;
+            const radius = 1000; // 1 км
+            // Локальний індекс POI на бекенді (центроїди ways/relations уже обчислені)
+            const data = await apiFetch(`/poi?lat=${lat}&lng=${lng}&radius=${radius}&type=${encodeURIComponent(type)}`);
+            setPoiResults(data);
+        } catch(err) {
+            setModalInfo({ title: "POI Error", message: err.error || "Could not fetch Points of Interest." });
+        } finally {
+            setIsFetchingPoi(false);
+            setPoiMenuDest(null); // Закрити меню
+        }
+    };
+
+    // Допоміжна функція для кнопки "Add to Trip" на POI-маркері
+    const handleAddPoiToTrip = (location) => {
+        handleAddDestination(location);
+        setPoiResults([]); // Очистити POI-маркери
+    };
+
+    if (isLoading) {
+         return <div className="flex items-center justify-center h-full text-xl">Loading...</div>;
+    }
+
+    // Категорії POI
+    const POI_CATEGORIES = [
+        { name: "Restaurants", type: "restaurant", icon: "utensils" },
+        { name: "Hotels", type: "hotel", icon: "hotel" },
+        { name: "Museums", type: "museum", icon: "landmark" }
+    ];
+
+    return (
+        <div className="flex h-full flex-col md:flex-row">
+            {/* Sidebar */}
+            <div className={`${isTripViewVisible && currentView === 'trips' ? 'hidden md:flex' : 'flex'} w-full md:w-1/4 lg:w-1/5 xl:w-1/6 bg-slate-800 border-r border-slate-700 flex-col p-4`}>
+                <div className="mb-6">
+                    <h2 className="text-xl font-bold">Hello, {user.username}!</h2>
+                    <button
+                        onClick={handleLogout}
+                        className="text-sm text-indigo-400 hover:text-indigo-300 focus:outline-none"
+                    >
+                        (Logout)
+                    </button>
+                </div>
+
+                <button
+                    onClick={handleCreateTrip}
+                    className="w-full bg-gradient-to-r from-indigo-600 to-indigo-700 hover:from-indigo-700 hover:to-indigo-800 text-white font-bold py-2 px-4 rounded-lg mb-4 transition-all duration-200 shadow-lg"
+                >
+                    + Create Trip
+                </button>
+
+                <h3 className="text-lg font-semibold mb-2">My Trips</h3>
+                <div className="flex-grow overflow-y-auto pr-2 min-h-0">
+                    {trips.length === 0 && (
+                        <p className="text-slate-400">You have no trips yet.</p>
+                    )}
+                    <ul>
+                        {trips.map(trip => (
+                            <li
+                                key={trip.id}
+                                className={`p-3 rounded-lg mb-2 cursor-pointer transition-all duration-200 group ${selectedTripId === trip.id && currentView === 'trips' ? 'bg-indigo-700' : 'hover:bg-slate-700'}`}
+                                onClick={() => {
+                                    setSelectedTripId(trip.id);
+                                    setTripViewVisible(true);
+                                    setCurrentView('trips');
+                                    setPoiResults([]); // Очистити POI при зміні поїздки
+                                    setPoiMenuDest(null);
+                                }}
+                            >
+                                <div className="flex justify-between items-center">
+                                    <span className="font-medium">{trip.name}</span>
+                                    <button
+                                        onClick={(e) => {
+                                            e.stopPropagation();
+                                            handleDeleteTrip(trip.id);
+                                        }}
+                                        className="text-slate-400 hover:text-red-500 opacity-0 group-hover:opacity-100 transition-opacity"
+                                    >
+                                        ✕
+                                    </button>
+                                </div>
+                            </li>
+                        ))}
+                    </ul>
+                </div>
+
+                <div className="mt-auto pt-4 border-t border-slate-700">
+                    {user.is_admin && (
+                        <button
+                            onClick={() => {
+                                setCurrentView('admin');
+                                setTripViewVisible(true);
+                            }}
+                            className={`w-full text-left p-2 rounded-lg mb-2 transition-all duration-200 ${currentView === 'admin' ? 'bg-indigo-700 text-white' : 'text-indigo-400 hover:text-indigo-300 hover:bg-slate-700'}`}
+                        >
+                            Admin Panel
+                        </button>
+                    )}
+                     <a
+                        href="/about"
+                        className="text-sm text-slate-400 hover:text-slate-300 mt-2 block text-center"
+                    >
+                        About
+                    </a>
+                </div>
+            </div>
+
+            {/* Main Content */}
+            {currentView === 'trips' ? (
+                 <div className={`${isTripViewVisible ? 'flex' : 'hidden md:flex'} w-full md:w-3/4 lg:w-4/5 xl:w-5/6 flex-col p-4 md:p-6 h-full`}>
+                    {!selectedTrip ? (
+                        <div className="flex items-center justify-center h-full">
+                            <p className="text-xl text-slate-400">
+                                {trips.length > 0 ? 'Select a trip from the list' : 'Create your first trip'}
+                            </p>
+                        </div>
+                    ) : (
+                        <div className="flex flex-col h-full">
+                            <button
+                                className="md:hidden text-indigo-400 mb-2 text-left"
+                                onClick={() => setTripViewVisible(false)}
+                            >
+                                &larr; Back to trip list
+                            </button>
+                            <h1 className="text-4xl font-bold mb-4">{selectedTrip.name}</h1>
+                            <div className="flex flex-col sm:flex-row gap-4 mb-4">
+                                <div className="flex-grow">
+                                    <LocationSearch onLocationSelect={handleAddDestination} />
+                                </div>
+                                <div className="flex gap-2 flex-shrink-0">
+                                    <button
+                                        onClick={() => setIsAddMode(!isAddMode)}
+                                        className={`flex items-center gap-2 px-4 py-2 rounded-lg font-medium transition-colors ${isAddMode ? 'bg-indigo-600 text-white' : 'bg-slate-700 text-slate-200 hover:bg-slate-600'}`}
+                                    >
+                                        {isAddMode ? <i data-lucide="check" style={{width:18, height:18}}></i> : <i data-lucide="map-pin" style={{width:18, height:18}}></i>}
+                                        {isGeocoding ? "..." : (isAddMode ? "On" : "Add by Click")}
+                                    </button>
+                                    <button
+                                        onClick={handleOptimizeRoute}
+                                        disabled={isOptimizing || selectedTrip.destinations.length < 3}
+                                        className="flex items-center gap-2 px-4 py-2 rounded-lg font-medium bg-slate-700 text-slate-200 hover:bg-slate-600 disabled:opacity-50 disabled:cursor-not-allowed"
+                                        title={selectedTrip.destinations.length < 3 ? "Add at least 3 destinations to optimize" : "Optimize route"}
+                                    >
+                                        <i data-lucide="arrow-down-up" style={{width:18, height:18}}></i>
+                                        {isOptimizing ? "Optimizing..." : "Optimize"}
+                                    </button>
+                                </div>
+                            </div>
+                            <div className="flex flex-col md:flex-row flex-grow min-h-0 gap-4">
+                                <div className="w-full md:w-1/3 h-1/2 md:h-full flex flex-col">
+                                    <h3 className="text-xl font-semibold mb-2">Locations</h3>
+                                    <div className="flex-grow bg-slate-800 rounded-lg p-3 overflow-y-auto border border-slate-700 min-h-0">
+                                        {selectedTrip.destinations.length === 0 && (
+                                            <p className="text-slate-400">Add locations using search or "Add by Click".</p>
+                                        )}
+                                        <ul>
+                                            {selectedTrip.destinations.map(dest => (
+                                                <li
+                                                    key={dest.id}
+                                                    className="mb-4 p-3 bg-slate-700 rounded-lg shadow-md group relative"
+                                                    draggable="true"
+                                                    onDragStart={(e) => handleDragStart(e, dest.id)}
+                                                    onDragEnter={(e) => handleDragEnter(e, dest.id)}
+                                                    onDragLeave={handleDragLeave}
+                                                    onDragEnd={handleDragEnd}
+                                                    onDrop={handleDrop}
+                                                    onDragOver={(e) => e.preventDefault()}
+                                                >
+                                                    <div className="absolute top-3 left-1 text-slate-500 cursor-move opacity-30 group-hover:opacity-100">
+                                                        <i data-lucide="grip-vertical" style={{width:18, height:18}}></i>
+                                                    </div>
+                                                    <div className="flex justify-between items-start ml-4">
+                                                        <span className="font-medium text-white">{dest.name}</span>
+                                                        <button onClick={() => handleDeleteDestination(dest.id)} className="text-slate-400 hover:text-red-500 text-lg -mt-1 z-10">✕</button>
+                                                    </div>
+                                                    <div className="ml-4">
+                                                        <WeatherWidget weather={tripWeather[dest.id]} error={weatherError} />
+                                                        <input
+                                                            type="date"
+                                                            defaultValue={dest.visit_date || ''}
+                                                            onChange={(e) => handleDestUpdate(dest.id, { visit_date: e.target.value })}
+                                                            className="w-full bg-slate-600 text-slate-200 text-sm rounded mt-2 px-2 py-1 border border-slate-500"
+                                                        />
+                                                        <textarea
+                                                            placeholder="Your notes..."
+                                                            defaultValue={dest.notes || ''}
+                                                            onChange={(e) => handleDestUpdate(dest.id, { notes: e.target.value })}
+                                                            className="w-full bg-slate-600 text-slate-200 text-sm rounded mt-2 px-2 py-1 border border-slate-500 h-16 resize-none"
+                                                        />
+                                                        <button
+                                                            onClick={() => handleShowPoiMenu(dest)}
+                                                            className={`mt-2 flex items-center gap-1 text-sm ${poiMenuDest && poiMenuDest.id === dest.id ? 'text-indigo-300' : 'text-indigo-400'} hover:text-indigo-300`}
+                                                        >
+                                                            <i data-lucide="search" style={{width:16, height:16}}></i> Find nearby
+                                                        </button>
+                                                        {poiMenuDest && poiMenuDest.id === dest.id && (
+                                                            <div className="mt-2 p-2 bg-slate-800 rounded border border-slate-600">
+                                                                {isFetchingPoi ? <p className="text-slate-400 text-sm">Searching...</p> : (
+                                                                    <div className="flex flex-wrap gap-2">
+                                                                        {POI_CATEGORIES.map(cat => (
+                                                                            <button
+                                                                                key={cat.type}
+                                                                                onClick={() => handleFetchPoi(cat.type)}
+                                                                                className="flex items-center gap-2 text-sm bg-slate-700 hover:bg-slate-600 px-3 py-1 rounded"
+                                                                            >
+                                                                                <i data-lucide={cat.icon} style={{width:18, height:18}}></i> {cat.name}
+                                                                            </button>
+                                                                        ))}
+                                                                    </div>
+                                                                )}
+                                                            </div>
+                                                        )}
+                                                    </div>
+                                                </li>
+                                            ))}
+                                        </ul>
+                                    </div>
+                                </div>
+                                <div className="w-full md:w-2/3 h-1/2 md:h-full min-h-[300px] md:min-h-0 overflow-hidden rounded-lg shadow-lg border border-slate-700">
+                                    <TripMap
+                                        destinations={selectedTrip.destinations}
+                                        isAddMode={isAddMode}
+                                        onMapClick={handleMapClick}
+                                        onMarkerDragEnd={handleMarkerDragEnd}
+                                        poiResults={poiResults}
+                                        onAddPoiToTrip={handleAddPoiToTrip}
+                                    />
+                                </div>
+                            </div>
+                        </div>
+                    )}
+                </div>
+            ) : (
+                <AdminPanel user={user} onBack={() => setCurrentView('trips')} />
+            )}
+            {modalInfo && (
+                <Modal
+                    title={modalInfo.title}
+                    message={modalInfo.message}
+                    onClose={() => setModalInfo(null)}
+                    onConfirm={modalInfo.onConfirm}
+                />
+            )}
+            {isCreateModalOpen && (
+                <CreateTripModal
+                    onClose={() => setIsCreateModalOpen(false)}
+                    onSubmit={handleSubmitNewTrip}
+                />
+            )}
+        </div>
+    );
+}
+
+function App() {
+    const [user, setUser] = useState(null);
+    const [isLoading, setIsLoading] = useState(true);
+
+    useEffect(() => {
+        const checkAuthStatus = async () => {
+            try {
+                const data = await apiFetch('/auth/status');
+                if (data.isAuthenticated) {
+                    setUser(data.user);
+                }
+            } catch (error) {
+                console.error("Could not check auth status: ", error.error);
+            } finally {
+                setIsLoading(false);
+            }
+        };
+        checkAuthStatus();
+    }, []);
+
+    const handleLogin = (userData) => {
+        setUser(userData);
+    };
+
+    const handleLogout = () => {
+        setUser(null);
+    };
+
+    if (isLoading) {
+        return (
+            <div className="flex items-center justify-center h-full text-xl">
+                Loading...
+            </div>
+        );
+    }
+
+    return (
+        <div className="h-full">
+            {user ? (
+                <TripManager user={user} onLogout={handleLogout} />
+            ) : (
+                <AuthScreen onAuthSuccess={handleLogin} />
+            )}
+        </div>
+    );
+}
+
+// =====================================================================
+// REACT INITIALIZATION
+// =====================================================================
+
+function startApp() {
+    const container = document.getElementById('root');
+    const root = ReactDOM.createRoot(container);
+    root.render(<App />);
+}
+
+let attempts = 0;
+function checkReactAndStart() {
+    if (React && ReactDOM && window.L && window.L.Routing && window.lucide) {
+        console.log("React, ReactDOM, Leaflet (L), L.Routing, and Lucide loaded. Starting App...");
+        startApp();
+    } else if (attempts < 50) { // 5 seconds
+        attempts++;
+        setTimeout(checkReactAndStart, 100);
+    } else {
+        console.error("Critical Error: Libraries failed to load.");
+        let errorMsg = "Critical Error: Failed to load base libraries. Missing: ";
+        if (!window.L) errorMsg += "Leaflet ";
+        if (!window.L.Routing) errorMsg += "Leaflet-Routing ";
+        if (!window.lucide) errorMsg += "Lucide-Icons ";
+        document.getElementById('root').innerHTML = `<div class="flex items-center justify-center h-full text-xl text-red-500 p-8">${errorMsg}</div>`;
+    }
+}
+
+checkReactAndStart();